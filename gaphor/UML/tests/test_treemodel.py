@@ -2,6 +2,7 @@ import pytest
 
 from gaphor import UML
 from gaphor.i18n import gettext
+from gaphor.transaction import Transaction
 from gaphor.UML.treemodel import (
     Branch,
     RelationshipItem,
@@ -266,3 +267,72 @@ def test_element_with_member_and_no_owner(tree_model, element_factory):
     association_model = tree_model.branches.get(association_item)
 
     assert property_item in association_model.elements
+
+
+def test_branch_extend_splices_elements_at_once(element_factory):
+    branch = Branch()
+    items_changed = ItemChangedHandler()
+    branch.elements.connect("items-changed", items_changed)
+    elements = [element_factory.create(UML.Class) for _ in range(3)]
+
+    branch.extend(elements)
+
+    assert [ti.element for ti in branch] == elements
+    assert items_changed.positions == [0]
+    assert items_changed.added == 3
+
+
+def test_tree_model_changes_are_applied_after_transaction(
+    tree_model, event_manager, element_factory
+):
+    items_changed = ItemChangedHandler()
+    tree_model.root.connect("items-changed", items_changed)
+
+    with Transaction(event_manager):
+        package = element_factory.create(UML.Package)
+        class_ = element_factory.create(UML.Class)
+        class_.package = package
+        element_factory.create(UML.Class)
+
+        assert tree_model.tree_item_for_element(package) is None
+
+    assert tree_model.tree_item_for_element(package)
+    assert tree_model.tree_item_for_element(class_) is None
+    assert len(tree_model.root) == 2
+    assert items_changed.positions == [0]
+
+
+def test_tree_model_move_element_in_transaction(event_manager, element_factory):
+    selected = []
+    tree_model = TreeModel(event_manager, element_factory, on_select=selected.append)
+    package = element_factory.create(UML.Package)
+    class_ = element_factory.create(UML.Class)
+    tree_model.child_model(tree_model.tree_item_for_element(package))
+
+    with Transaction(event_manager):
+        class_.package = package
+
+        assert tree_model.tree_item_for_element(class_) is None
+
+    package_item = tree_model.tree_item_for_element(package)
+    class_item = tree_model.tree_item_for_element(class_)
+
+    assert class_item not in tree_model.root
+    assert class_item in tree_model.branches[package_item]
+    assert selected == [class_]
+
+
+def test_tree_model_syncs_once_per_transaction(event_manager, element_factory):
+    synced = []
+    tree_model = TreeModel(
+        event_manager, element_factory, on_sync=lambda: synced.append(True)
+    )
+    class_ = element_factory.create(UML.Class)
+
+    with Transaction(event_manager):
+        class_.name = "A"
+        class_.name = "B"
+        class_.isAbstract = True
+
+    assert tree_model.tree_item_for_element(class_).readonly_text == "B"
+    assert synced == [True]
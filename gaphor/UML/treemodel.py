@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import importlib.resources
+from collections.abc import Iterable
 from unicodedata import normalize
 
 from gi.repository import Gio, GObject, Pango
@@ -17,12 +18,14 @@ from gaphor.core.modeling import (
     ElementCreated,
     ElementDeleted,
     ElementUpdated,
+    Id,
     ModelFlushed,
     ModelReady,
 )
 from gaphor.diagram.group import Root, RootType, owner, owns
 from gaphor.diagram.iconname import icon_name
 from gaphor.i18n import gettext
+from gaphor.transaction import TransactionBegin, TransactionCommit, TransactionRollback
 
 
 class TreeItem(GObject.Object):
@@ -81,14 +84,34 @@ class Branch:
     def __init__(self):
         self.elements = Gio.ListStore.new(TreeItem.__gtype__)
         self.relationships = Gio.ListStore.new(TreeItem.__gtype__)
-
-    def append(self, element: Base):
-        if isinstance(element, UML.Relationship):
+        self._tree_items: dict[Id, TreeItem] = {}
+
+    def append(self, element: Base) -> TreeItem:
+        return self.extend([element])[0]
+
+    def extend(self, elements: Iterable[Base]) -> list[TreeItem]:
+        """Add tree items for elements, with one splice per list store."""
+        items: list[TreeItem] = []
+        relationships: list[TreeItem] = []
+        for element in elements:
+            tree_item = self._tree_items[element.id] = TreeItem(element)
+            if isinstance(element, UML.Relationship):
+                relationships.append(tree_item)
+            else:
+                items.append(tree_item)
+
+        if relationships:
             if self.relationships.get_n_items() == 0:
                 self.elements.insert(0, RelationshipItem(self.relationships))
-            self.relationships.append(TreeItem(element))
-        else:
-            self.elements.append(TreeItem(element))
+            self.relationships.splice(
+                self.relationships.get_n_items(), 0, relationships
+            )
+        if items:
+            self.elements.splice(self.elements.get_n_items(), 0, items)
+        return [*relationships, *items]
+
+    def get(self, element: Base) -> TreeItem | None:
+        return self._tree_items.get(element.id)
 
     def remove(self, element):
         list_store = (
@@ -96,13 +119,10 @@ class Branch:
             if isinstance(element, UML.Relationship)
             else self.elements
         )
-        if (
-            index := next(
-                (i for i, ti in enumerate(list_store) if ti.element is element),
-                None,
-            )
-        ) is not None:
-            list_store.remove(index)
+        if tree_item := self._tree_items.pop(element.id, None):
+            found, index = list_store.find(tree_item)
+            if found:
+                list_store.remove(index)
 
         # Clean up empty relationships node
         if list_store is self.relationships and self.relationships.get_n_items() == 0:
@@ -112,6 +132,7 @@ class Branch:
                     break
 
     def remove_all(self):
+        self._tree_items.clear()
         self.relationships.remove_all()
         self.elements.remove_all()
 
@@ -121,9 +142,7 @@ class Branch:
             if isinstance(element, UML.Relationship)
             else self.elements
         )
-        if not (
-            tree_item := next((ti for ti in list_store if ti.element is element), None)
-        ):
+        if not (tree_item := self._tree_items.get(element.id)):
             return
         found, index = list_store.find(tree_item)
         if found:
@@ -151,20 +170,36 @@ def tree_item_sort(a: TreeItem, b: TreeItem) -> int:
 
 
 class TreeModel:
+    """The model for the model browser.
+
+    Changes made in a transaction are applied once the transaction ends,
+    so every branch is updated with as few list store changes as possible.
+    """
+
     def __init__(self, event_manager, element_factory, on_select=None, on_sync=None):
         super().__init__()
         self.branches: dict[TreeItem | RootType, Branch] = {Root: Branch()}
+        # The branch that contains the tree item of an element
+        self.element_branches: dict[Id, Branch] = {}
         self._on_select = on_select
         self._on_sync = on_sync
         self.event_manager = event_manager
         self.element_factory = element_factory
 
+        self._in_transaction = False
+        # Elements to add to, or move in, the tree; True if moved
+        self._pending_elements: dict[Base, bool] = {}
+        self._pending_notify: dict[Base, None] = {}
+        self._pending_sync: dict[Base, None] = {}
+
         event_manager.subscribe(self.on_element_created)
         event_manager.subscribe(self.on_element_deleted)
         event_manager.subscribe(self.on_owner_changed)
         event_manager.subscribe(self.on_owned_element_changed)
         event_manager.subscribe(self.on_attribute_changed)
         event_manager.subscribe(self.on_model_ready)
+        event_manager.subscribe(self.on_transaction_begin)
+        event_manager.subscribe(self.on_transaction_end)
 
         self.on_model_ready()
 
@@ -175,6 +210,8 @@ class TreeModel:
         self.event_manager.unsubscribe(self.on_owned_element_changed)
         self.event_manager.unsubscribe(self.on_attribute_changed)
         self.event_manager.unsubscribe(self.on_model_ready)
+        self.event_manager.unsubscribe(self.on_transaction_begin)
+        self.event_manager.unsubscribe(self.on_transaction_end)
 
     @property
     def template(self) -> str:
@@ -187,32 +224,33 @@ class TreeModel:
         return self.branches[Root].elements
 
     def sync(self, element, seen=None):
-        if seen is None:
-            seen = set()
+        if self._sync(element, set() if seen is None else seen) and self._on_sync:
+            self._on_sync()
 
+    def _sync(self, element, seen) -> bool:
         if (
             element in seen
             or not owner(element)
             or not (tree_item := self.tree_item_for_element(element))
         ):
-            return
+            return False
 
         seen.add(element)
         tree_item.sync()
-        if self._on_sync:
-            self._on_sync()
 
         if own := owner(element):
-            self.sync(own, seen)
+            self._sync(own, seen)
 
         if isinstance(element, UML.Parameter) and element.activityParameterNode:
             for node in element.activityParameterNode:
-                self.sync(node, seen)
+                self._sync(node, seen)
 
         if isinstance(element, UML.Type):
             for e in self.element_factory.select(UML.TypedElement):
                 if e.type is element:
-                    self.sync(e, seen)
+                    self._sync(e, seen)
+
+        return True
 
     def child_model(self, item: TreeItem) -> Gio.ListStore | None:
         """This method will create branches on demand (lazy)."""
@@ -226,8 +264,7 @@ class TreeModel:
         elif owned_elements := owns(item.element):
             new_branch = Branch()
             self.branches[item] = new_branch
-            for e in owned_elements:
-                new_branch.append(e)
+            self._extend(new_branch, owned_elements)
             return new_branch.elements
         return None
 
@@ -243,20 +280,21 @@ class TreeModel:
         if (own := owner(element)) is Root:
             return self.branches[Root]
 
-        return next(
-            (
-                m
-                for ti, m in self.branches.items()
-                if isinstance(ti, TreeItem) and ti.element is own
-            ),
-            None,
-        )
+        if (
+            isinstance(own, Base)
+            and (branch := self.element_branches.get(own.id))
+            and (tree_item := branch.get(own))
+        ):
+            return self.branches.get(tree_item)
+        return None
 
     def tree_item_for_element(self, element: Base | RootType) -> TreeItem | None:
         if element is Root:
             return None
-        if owner_branch := self.owner_branch_for_element(element):
-            return next((ti for ti in owner_branch if ti.element is element), None)
+        if (
+            branch := self.element_branches.get(element.id)
+        ) and branch is self.owner_branch_for_element(element):
+            return branch.get(element)
         return None
 
     def add_element(self, element: Base) -> None:
@@ -264,10 +302,14 @@ class TreeModel:
             return
 
         if (owner_branch := self.owner_branch_for_element(element)) is not None:
-            owner_branch.append(element)
+            self._extend(owner_branch, [element])
         elif isinstance((own := owner(element)), Base):
             self.notify_child_model(own)
 
+    def _extend(self, branch: Branch, elements: list[Base]) -> None:
+        branch.extend(elements)
+        self.element_branches.update((e.id, branch) for e in elements)
+
     def remove_element(self, element: Base) -> None:
         if not isinstance(element, Base):
             return
@@ -275,9 +317,7 @@ class TreeModel:
         for child in owns(element):
             self.remove_element(child)
 
-        for owner_branch in [
-            b for b in self.branches.values() if element in (i.element for i in b)
-        ]:
+        if owner_branch := self.element_branches.pop(element.id, None):
             owner_branch.remove(element)
 
             if not len(owner_branch):
@@ -308,20 +348,78 @@ class TreeModel:
         root.remove_all()
         self.branches.clear()
         self.branches[Root] = root
+        self.element_branches.clear()
+
+    def apply_pending_changes(self) -> None:
+        """Update the tree for changes made since the last update."""
+        pending = self._pending_elements
+        notify = self._pending_notify
+        to_sync = self._pending_sync
+        self._pending_elements = {}
+        self._pending_notify = {}
+        self._pending_sync = {}
+
+        # First take out elements that moved, since that may remove branches
+        for element in pending:
+            if (
+                owner(element)
+                and (branch := self.element_branches.get(element.id))
+                and branch is not self.owner_branch_for_element(element)
+            ):
+                self.remove_element(element)
+
+        additions: dict[Branch, list[Base]] = {}
+        for element in pending:
+            if not owner(element) or element.id in self.element_branches:
+                continue
+            if (owner_branch := self.owner_branch_for_element(element)) is not None:
+                additions.setdefault(owner_branch, []).append(element)
+            elif isinstance((own := owner(element)), Base):
+                notify[own] = None
+
+        for branch, elements in additions.items():
+            self._extend(branch, elements)
+
+        # New tree items do not need a notification
+        for element in notify:
+            if element not in pending:
+                self.notify_child_model(element)
+
+        seen: set[Base] = set()
+        synced = False
+        for element in to_sync:
+            synced = self._sync(element, seen) or synced
+        if synced and self._on_sync:
+            self._on_sync()
+
+        if self._on_select:
+            for element, moved in pending.items():
+                if moved and owner(element):
+                    self._on_select(element)
+
+    def _changed(self) -> None:
+        if not self._in_transaction:
+            self.apply_pending_changes()
 
     @event_handler(ElementCreated)
     def on_element_created(self, event: ElementCreated):
-        self.add_element(event.element)
+        self._pending_elements.setdefault(event.element, False)
+        self._changed()
 
     @event_handler(ElementDeleted)
     def on_element_deleted(self, event: ElementDeleted):
-        self.remove_element(event.element)
+        element = event.element
+        self._pending_elements.pop(element, None)
+        self._pending_notify.pop(element, None)
+        self._pending_sync.pop(element, None)
+        self.remove_element(element)
 
     @event_handler(DerivedAdded, DerivedDeleted)
     def on_owned_element_changed(self, event):
         """Ensure we update the node once owned elements change."""
         if event.property in (UML.Element.ownedElement, UML.Namespace.member):
-            self.notify_child_model(event.element)
+            self._pending_notify[event.element] = None
+            self._changed()
 
     @event_handler(DerivedSet)
     def on_owner_changed(self, event: DerivedSet):
@@ -330,22 +428,35 @@ class TreeModel:
         if (
             event.property in (UML.Element.owner, UML.NamedElement.memberNamespace)
         ) and owner(event.element):
-            element = event.element
-            self.remove_element(element)
-            self.add_element(element)
-            if self._on_select:
-                self._on_select(element)
+            self._pending_elements[event.element] = True
+            self._changed()
 
     @event_handler(ElementUpdated)
     def on_attribute_changed(self, event: ElementUpdated):
-        self.sync(event.element)
+        self._pending_sync[event.element] = None
+        self._changed()
+
+    @event_handler(TransactionBegin)
+    def on_transaction_begin(self, _event: TransactionBegin):
+        self._in_transaction = True
+
+    @event_handler(TransactionCommit, TransactionRollback)
+    def on_transaction_end(self, _event):
+        self._in_transaction = False
+        self.apply_pending_changes()
 
     @event_handler(ModelReady, ModelFlushed)
     def on_model_ready(self, _event=None):
         self.clear()
-
-        for element in self.element_factory.select(owner):
-            self.add_element(element)
+        self._pending_elements.clear()
+        self._pending_notify.clear()
+        self._pending_sync.clear()
+
+        # Other elements are added once their owner's branch is created
+        self._extend(
+            self.branches[Root],
+            list(self.element_factory.select(lambda e: owner(e) is Root)),
+        )
 
 
 def pango_attributes(element):
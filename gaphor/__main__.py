@@ -1,6 +1,9 @@
+import multiprocessing
 import sys
 
 from gaphor.main import main
 
 if __name__ == "__main__":
+    # Worker processes of packaged (frozen) applications start here
+    multiprocessing.freeze_support()
     sys.exit(main(sys.argv))
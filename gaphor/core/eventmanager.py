@@ -2,13 +2,15 @@
 
 import asyncio
 import inspect
+import time
 from collections import deque
-
-from generic.event import Event, Handler
-from generic.event import Manager as _Manager
+from collections.abc import Callable
 
 from gaphor.abc import Service
 
+Event = object
+Handler = Callable[[Event], None]
+
 
 def event_handler(*event_types):
     """Mark a function/method as an event handler for a particular type of
@@ -41,6 +43,70 @@ def event_handler(*event_types):
     return wrapper
 
 
+class _Dispatcher:
+    """Dispatch events to the handlers subscribed to the event type, or any
+    of its base classes.
+
+    The handlers for an event type are looked up once, and kept in a
+    dispatch table until handlers are (un)subscribed.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: dict[type, dict[Handler, None]] = {}
+        self._table: dict[type, tuple[tuple[Handler, ...], ...]] = {}
+
+    def subscribe(self, handler: Handler, event_type: type) -> None:
+        self._handlers.setdefault(event_type, {})[handler] = None
+        self._table.clear()
+
+    def unsubscribe(self, handler: Handler, event_type: type) -> None:
+        handlers = self._handlers.get(event_type)
+        if handlers and handler in handlers:
+            del handlers[handler]
+            self._table.clear()
+
+    def handlers_for(self, event_type: type) -> tuple[tuple[Handler, ...], ...]:
+        """Handlers, grouped by type from most to least specific."""
+        try:
+            return self._table[event_type]
+        except KeyError:
+            pass
+        handlers = self._handlers
+        table = self._table[event_type] = tuple(
+            tuple(handlers[t]) for t in event_type.__mro__ if handlers.get(t)
+        )
+        return table
+
+    def handle(
+        self, event: Event, timings: dict[Handler, tuple[float, int]] | None = None
+    ) -> None:
+        """Call the handlers for an event.
+
+        All handlers of a type are called, even if one raises an
+        exception. Exceptions are raised as an :obj:`ExceptionGroup`.
+        """
+        for handlers in self.handlers_for(type(event)):
+            exceptions = []
+            for handler in handlers:
+                try:
+                    if timings is None:
+                        handler(event)
+                    else:
+                        start = time.perf_counter()
+                        try:
+                            handler(event)
+                        finally:
+                            total, calls = timings.get(handler, (0.0, 0))
+                            timings[handler] = (
+                                total + time.perf_counter() - start,
+                                calls + 1,
+                            )
+                except BaseException as e:
+                    exceptions.append(e)
+            if exceptions:
+                raise BaseExceptionGroup("Error while handling events", exceptions)
+
+
 class EventManager(Service):
     """The Event Manager provides a flexible way to dispatch events.
 
@@ -51,11 +117,12 @@ class EventManager(Service):
     """
 
     def __init__(self) -> None:
-        self._events = _Manager()
-        self._priority = _Manager()
+        self._events = _Dispatcher()
+        self._priority = _Dispatcher()
         self._queue: deque[Event] = deque()
         self._async_tasks: set[asyncio.Task] = set()
         self._handling = False
+        self._timings: dict[Handler, tuple[float, int]] | None = None
 
     def shutdown(self) -> None:
         for task in set(self._async_tasks):
@@ -99,7 +166,9 @@ class EventManager(Service):
         """
         self._subscribe(self._priority, handler)
 
-    def _subscribe(self, manager: _Manager, handler: Handler, event_types=None) -> None:
+    def _subscribe(
+        self, manager: _Dispatcher, handler: Handler, event_types=None
+    ) -> None:
         event_types = getattr(handler, "__event_types__", event_types)
         if not event_types:
             raise Exception(f"No event types provided for function {handler}")
@@ -121,14 +190,38 @@ class EventManager(Service):
         """Send event notifications to registered handlers."""
         queue = self._queue
         queue.extendleft(events)
+        timings = self._timings
 
         for event in events:
-            self._priority.handle(event)
+            self._priority.handle(event, timings)
 
         if not self._handling:
             self._handling = True
             try:
                 while queue:
-                    self._events.handle(queue.pop())
+                    self._events.handle(queue.pop(), timings)
             finally:
                 self._handling = False
+
+    def enable_timing(self, enabled: bool = True) -> None:
+        """Measure the time spent in each handler.
+
+        Timing adds some overhead to every handler call, so it's off by
+        default. Enabling timing resets the measurements.
+        """
+        self._timings = {} if enabled else None
+
+    def slowest_handlers(self, count: int = 10) -> list[tuple[Handler, float, int]]:
+        """The handlers that took the most time, with the total time spent
+        in the handler and the number of calls.
+
+        Only handlers called while timing is enabled are reported.
+        """
+        return sorted(
+            (
+                (handler, total, calls)
+                for handler, (total, calls) in (self._timings or {}).items()
+            ),
+            key=lambda t: t[1],
+            reverse=True,
+        )[:count]
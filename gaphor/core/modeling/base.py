@@ -12,7 +12,7 @@ from uuid import uuid1
 
 from gaphor.core.modeling.collection import collection
 from gaphor.core.modeling.event import ElementTypeUpdated, ElementUpdated
-from gaphor.core.modeling.properties import modelproperty, relation_many
+from gaphor.core.modeling.properties import derived, modelproperty, relation_many
 
 if TYPE_CHECKING:
     from gaphor.core.modeling.diagram import Diagram
@@ -257,6 +257,10 @@ def swap_element_type(element: Base, new_class: type[Base]) -> None:
     if element.__class__ is not new_class:
         old_class = element.__class__
         element.__class__ = new_class
+        # Union values depend on the properties a class has
+        for prop in old_class.__properties__:
+            if isinstance(prop, derived):
+                prop.invalidate(element)
         element.handle(ElementTypeUpdated(element, old_class))
 
 
@@ -3,14 +3,97 @@
 from __future__ import annotations
 
 import contextlib
-from collections.abc import Iterator, Sequence
-from typing import TypeVar, overload
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import Self, SupportsIndex, TypeVar, overload
 
 from gaphor.core.modeling.event import AssociationUpdated
 
 T = TypeVar("T")
 
 
+class indexedlist(list[T]):
+    """A list with fast membership tests.
+
+    Once the list grows beyond ``threshold`` items, the occurrences of
+    items are counted in a dictionary, so ``in`` does not have to scan
+    the list. Order and list behavior are not affected.
+    """
+
+    __slots__ = ("_counts",)
+
+    threshold = 16
+
+    def __init__(self, iterable: Iterable[T] = ()):
+        super().__init__(iterable)
+        self._counts: dict[T, int] | None = None
+
+    def __contains__(self, item) -> bool:
+        if (counts := self._counts) is None:
+            if len(self) < self.threshold:
+                return super().__contains__(item)
+            counts = self._counts = {}
+            for i in self:
+                counts[i] = counts.get(i, 0) + 1
+        return item in counts
+
+    def _added(self, item: T) -> None:
+        if (counts := self._counts) is not None:
+            counts[item] = counts.get(item, 0) + 1
+
+    def _removed(self, item: T) -> None:
+        if (counts := self._counts) is not None:
+            if (n := counts[item]) == 1:
+                del counts[item]
+            else:
+                counts[item] = n - 1
+
+    def append(self, item: T) -> None:
+        super().append(item)
+        self._added(item)
+
+    def insert(self, index, item: T) -> None:
+        super().insert(index, item)
+        self._added(item)
+
+    def extend(self, iterable: Iterable[T]) -> None:
+        for item in iterable:
+            self.append(item)
+
+    def remove(self, item: T) -> None:
+        super().remove(item)
+        self._removed(item)
+
+    def pop(self, index=-1) -> T:
+        item = super().pop(index)
+        self._removed(item)
+        return item
+
+    def clear(self) -> None:
+        super().clear()
+        self._counts = None
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self._counts = None
+
+    def __delitem__(self, key) -> None:
+        if isinstance(key, int):
+            self._removed(self[key])
+            super().__delitem__(key)
+        else:
+            super().__delitem__(key)
+            self._counts = None
+
+    def __iadd__(self, iterable: Iterable[T]) -> Self:  # type: ignore[override, misc]
+        self.extend(iterable)
+        return self
+
+    def __imul__(self, n: SupportsIndex) -> Self:
+        super().__imul__(n)
+        self._counts = None
+        return self
+
+
 class collection[T]:
     """Collection (set-like) for model elements' 1:n and n:m relationships."""
 
@@ -18,7 +101,7 @@ class collection[T]:
         self.property = property
         self.object = object
         self.type = type
-        self.items: list[T] = []
+        self.items: list[T] = indexedlist()
 
     def __len__(self) -> int:
         return len(self.items)
@@ -132,6 +215,45 @@ class collection[T]:
         self.property.handle(AssociationUpdated(self.object, self.property))
 
 
+class lazycollection(collection[T]):
+    """A collection that is populated when its items are first accessed.
+
+    ``materialize`` is called before the items are accessed. It should
+    return ``True`` once the collection is complete. If it returns
+    ``False``, it's called again on the next access.
+    """
+
+    def __init__(
+        self, property, object, type: type[T], materialize: Callable[[], bool]
+    ):
+        self._materialize: Callable[[], bool] | None = None
+        super().__init__(property, object, type)
+        self._materialize = materialize
+
+    @property
+    def items(self) -> list[T]:
+        if materialize := self._materialize:
+            self._materialize = None
+            if not materialize():
+                self._materialize = materialize
+        return self._items
+
+    @items.setter
+    def items(self, items: list[T]) -> None:
+        self._items = items
+
+    def is_materialized(self) -> bool:
+        return self._materialize is None
+
+    def materialize(self) -> None:
+        """Populate the collection now."""
+        self.items  # noqa: B018
+
+    def discard(self) -> None:
+        """Do not populate the collection at all."""
+        self._materialize = None
+
+
 _recurseproxy_trigger = slice(None, None, None)
 
 
@@ -25,6 +25,7 @@ from gaphor.core.modeling.event import (
     AssociationAdded,
     AssociationDeleted,
     DiagramUpdateRequested,
+    ElementUpdated,
 )
 from gaphor.core.modeling.presentation import Presentation
 from gaphor.core.modeling.properties import (
@@ -134,6 +135,10 @@ class StyledDiagram:
         self.selection = selection
         self.pseudo: str | None = None
 
+    @property
+    def owner(self) -> Diagram:
+        return self.diagram
+
     def name(self) -> str:
         return "diagram"
 
@@ -196,6 +201,10 @@ class StyledItem:
             else ()
         )
 
+    @property
+    def owner(self) -> Presentation:
+        return self.item
+
     def name(self) -> str:
         return css_name(self.item)
 
@@ -266,6 +275,12 @@ class Diagram(Base):
 
         self._registered_views: set[gaphas.model.View] = set()
         self._dirty_items: set[gaphas.Item] = set()
+        # Position of items in the depth-first order of ownedPresentation,
+        # and the next sibling of each top level item
+        self._order: dict[Presentation, int] | None = None
+        self._next_top_level: dict[Presentation, Presentation] = {}
+        # Set if all styles should be recomputed on the next update
+        self._styles_outdated = True
 
         self._watcher = self.watcher()
         self._watcher.watch("ownedPresentation", self._owned_presentation_changed)
@@ -275,6 +290,35 @@ class Diagram(Base):
         "ownedPresentation", Presentation, composite=True, opposite="diagram"
     )
 
+    def handle(self, event: object) -> None:
+        if isinstance(event, ElementUpdated) and event.element is self:
+            # Items are added, removed or reordered, or the diagram
+            # itself changed. Structural selectors may match differently.
+            self._styles_outdated = True
+            if event.property is Diagram.ownedPresentation:
+                self._order = None
+        super().handle(event)
+
+    def item_parent_changed(
+        self,
+        item: Presentation,
+        old_parent: Presentation | None,
+        new_parent: Presentation | None,
+    ) -> None:
+        """The parent of an item changed.
+
+        Styles of the old and new parent, and their ancestors, may depend
+        on the item, for example through ``:has()``.
+        """
+        self._order = None
+        if old_parent is None or new_parent is None:
+            # Top level items are children of the diagram
+            self._styles_outdated = True
+        self.request_update(item)
+        for parent in (old_parent, new_parent):
+            if parent:
+                self.request_update(parent)
+
     def _owned_presentation_changed(self, event):
         if isinstance(event, AssociationDeleted) and event.old_value:
             self._update_dirty_items(removed_items={event.old_value})
@@ -396,10 +440,16 @@ class Diagram(Base):
 
         self._update_dirty_items(dirty_items)
 
+        items = list(self.sort(dirty_items_with_ancestors()))
+
         style_sheet = self.model.style_sheet or StyleSheet()
-        style_sheet.clear_caches()
+        if self._styles_outdated:
+            style_sheet.clear_caches([self])
+            self._styles_outdated = False
+        else:
+            style_sheet.clear_caches(self._outdated_items(items))
 
-        for item in reversed(list(self.sort(dirty_items_with_ancestors()))):
+        for item in reversed(items):
             if update := getattr(item, "update", None):
                 update(UpdateContext(style=style_sheet.compute_style(StyledItem(item))))
 
@@ -407,6 +457,31 @@ class Diagram(Base):
 
         self._dirty_items.clear()
 
+    def _outdated_items(self, items: Sequence[Presentation]) -> set[Presentation]:
+        """Items with outdated styles.
+
+        The next sibling of top level items is included, since sibling
+        selectors depend on it. Other siblings have a common ancestor in
+        ``items``.
+        """
+        self._presentation_order()
+        next_top_level = self._next_top_level
+        outdated = set(items)
+        outdated.update(
+            next_top_level[item] for item in items if item in next_top_level
+        )
+        return outdated
+
+    def _presentation_order(self) -> dict[Presentation, int]:
+        order = self._order
+        owned_presentation = self.ownedPresentation
+        # Changes made while events are blocked are not noticed
+        if order is None or len(order) != len(owned_presentation):
+            order = self._order = {item: n for n, item in enumerate(owned_presentation)}
+            top_level = [item for item in owned_presentation if not item.parent]
+            self._next_top_level = dict(zip(top_level, top_level[1:], strict=False))
+        return order
+
     # gaphas.model.Model protocol:
 
     @property
@@ -424,8 +499,8 @@ class Diagram(Base):
         return iter(item.children)
 
     def sort(self, items: Sequence[Presentation]) -> Iterable[Presentation]:
-        items_set = set(items)
-        return (n for n in self.get_all_items() if n in items_set)
+        order = self._presentation_order()
+        return sorted((n for n in set(items) if n in order), key=order.__getitem__)
 
     def request_update(self, item: gaphas.item.Item) -> None:
         """Schedule an item for updating.
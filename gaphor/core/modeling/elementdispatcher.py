@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import logging
+from collections import Counter
+from collections.abc import Iterable
 
 from gaphor.abc import Service
 from gaphor.core import event_handler
@@ -108,12 +110,20 @@ class ElementDispatcher(Service):
         self.modeling_language = modeling_language
 
         # Table used to fire events:
-        # (event.element, event.property): { handler: set(path, ..), ..}
-        self._handlers: dict[tuple[Base, modelproperty], dict[Handler, set]] = {}
+        # (event.element, event.property): { handler: {watch path, ..}, ..}
+        self._handlers: dict[
+            tuple[Base, modelproperty], dict[Handler, set[WatchPath]]
+        ] = {}
 
         # Fast resolution when handlers are disconnected
-        # handler: [(element, property), ..]
-        self._reverse: dict[Handler, list[tuple[Base, modelproperty]]] = {}
+        # handler: {(element, property): None, ..}
+        self._reverse: dict[Handler, dict[tuple[Base, modelproperty], None]] = {}
+
+        # Compiled paths, shared by all elements of a type
+        self._paths: dict[tuple[type[Base], str], WatchPath] = {}
+
+        # The number of handler invocations per watched path
+        self.dispatch_counts: Counter[str] = Counter()
 
         self.event_manager.subscribe(self.on_model_loaded)
         self.event_manager.subscribe(self.on_element_change_event)
@@ -123,8 +133,7 @@ class ElementDispatcher(Service):
         self.event_manager.unsubscribe(self.on_model_loaded)
 
     def subscribe(self, handler: Handler, element: Base, path: str) -> None:
-        props = self._path_to_properties(element, path)
-        self._add_handlers(element, props, handler)
+        self._add_handlers(element, self._compile(type(element), path), handler)
 
     def unsubscribe(self, handler: Handler) -> None:
         """Unregister a handler from the registry."""
@@ -140,10 +149,20 @@ class ElementDispatcher(Service):
                     del self._handlers[key]
         del self._reverse[handler]
 
-    def _path_to_properties(self, element: Base, path: str) -> tuple[modelproperty]:
+    def _compile(self, element_type: type[Base], path: str) -> WatchPath:
+        key = (element_type, path)
+        if not (watch_path := self._paths.get(key)):
+            watch_path = self._paths[key] = WatchPath(
+                path, self._path_to_properties(element_type, path)
+            )
+        return watch_path
+
+    def _path_to_properties(
+        self, element: Base | type[Base], path: str
+    ) -> tuple[modelproperty, ...]:
         """Given a start element and a path, return a tuple of properties
         (association, attribute, etc.) representing the path."""
-        c = type(element)
+        c = element if isinstance(element, type) else type(element)
         tpath = []
         for attr in path.split("."):
             cname = ""
@@ -166,47 +185,31 @@ class ElementDispatcher(Service):
                 c = prop.type
         return tuple(tpath)
 
-    def _add_handlers(
-        self, element: Base, props: tuple[modelproperty], handler: Handler
-    ):
-        """Provided an element and a path of properties (props), register the
-        handler for each property."""
-        property, remainder = props[0], props[1:]
-        key = (element, property)
+    def _add_handlers(self, element: Base, watch_path: WatchPath, handler: Handler):
+        """Provided an element and a path of properties, register the handler
+        for each property."""
+        key = (element, watch_path.property)
 
-        # Register key
+        # Register handler and its position in the path
         try:
             handlers = self._handlers[key]
         except KeyError:
-            handlers = {}
-            self._handlers[key] = handlers
-
-        # Register handler and it's remaining paths
+            handlers = self._handlers[key] = {}
         try:
-            remainders = handlers[handler]
+            handlers[handler].add(watch_path)
         except KeyError:
-            remainders = handlers[handler] = set()
-        if remainder:
-            remainders.add(remainder)
+            handlers[handler] = {watch_path}
 
         # Also add them to the reverse table, easing disconnecting
         try:
-            reverse = self._reverse[handler]
+            self._reverse[handler][key] = None
         except KeyError:
-            reverse = []
-            self._reverse[handler] = reverse
-
-        reverse.append(key)
+            self._reverse[handler] = {key: None}
 
         # Apply remaining path
-        if remainder:
-            if property.upper == "*" or property.upper > 1:
-                for e in property.get(element):
-                    self._add_handlers(e, remainder, handler)
-            else:
-                e = property.get(element)
-                if e and remainder:
-                    self._add_handlers(e, remainder, handler)
+        if remainder := watch_path.remainder:
+            for e in watch_path.values(element):
+                self._add_handlers(e, remainder, handler)
 
     def _remove_handlers(self, element: Base, property, handler: Handler):
         """Remove the handler of the path of elements."""
@@ -215,14 +218,10 @@ class ElementDispatcher(Service):
         if not handlers:
             return
 
-        if property.upper == "*" or property.upper > 1:
-            for remainder in handlers.get(handler, ()):
-                for e in property.get(element):
-                    self._remove_handlers(e, remainder[0], handler)
-        else:
-            for remainder in handlers.get(handler, ()):
-                if e := property.get(element):
-                    self._remove_handlers(e, remainder[0], handler)
+        for watch_path in handlers.get(handler, ()):
+            if remainder := watch_path.remainder:
+                for e in watch_path.values(element):
+                    self._remove_handlers(e, remainder.property, handler)
         try:
             del handlers[handler]
         except KeyError:
@@ -233,37 +232,77 @@ class ElementDispatcher(Service):
                 property,
                 exc_info=True,
             )
+        else:
+            if reverse := self._reverse.get(handler):
+                reverse.pop(key, None)
 
         if not handlers:
             del self._handlers[key]
 
     @event_handler(ElementUpdated)
     def on_element_change_event(self, event: ElementUpdated):
-        if not (handlers := self._handlers.get((event.element, event.property))):
+        key = (event.element, event.property)
+        if not (handlers := self._handlers.get(key)):
             return
         try:
-            for handler in set(handlers.keys()):
+            counts = self.dispatch_counts
+            for handler, watch_paths in list(handlers.items()):
+                for watch_path in watch_paths:
+                    counts[watch_path.path] += 1
                 handler(event)
         finally:
-            # Handle add/removal of handlers based on the kind of event
-            # Filter out handlers that have no remaining properties
+            # Handle add/removal of handlers based on the kind of event,
+            # only for the part of the path after the changed property.
+            # Handlers may have been (un)subscribed while dispatching.
+            subscriptions = list(self._handlers.get(key, {}).items())
             if (
                 isinstance(event, AssociationSet | AssociationDeleted)
                 and event.old_value
             ):
-                for handler, remainders in handlers.items():
-                    for remainder in remainders:
-                        self._remove_handlers(event.old_value, remainder[0], handler)
+                for handler, watch_paths in subscriptions:
+                    for watch_path in list(watch_paths):
+                        if remainder := watch_path.remainder:
+                            self._remove_handlers(
+                                event.old_value, remainder.property, handler
+                            )
 
             if isinstance(event, AssociationSet | AssociationAdded) and event.new_value:
-                for handler, remainders in handlers.items():
-                    for remainder in remainders:
-                        self._add_handlers(event.new_value, remainder, handler)
+                for handler, watch_paths in subscriptions:
+                    for watch_path in list(watch_paths):
+                        if remainder := watch_path.remainder:
+                            self._add_handlers(event.new_value, remainder, handler)
 
     @event_handler(ModelReady)
     def on_model_loaded(self, event):
-        for (elem, prop), value in list(self._handlers.items()):
-            prefix = (prop,)
-            for h, remainders in list(value.items()):
-                for remainder in remainders:
-                    self._add_handlers(elem, prefix + remainder, h)
+        for (elem, _prop), value in list(self._handlers.items()):
+            for h, watch_paths in list(value.items()):
+                for watch_path in list(watch_paths):
+                    self._add_handlers(elem, watch_path, h)
+
+
+class WatchPath:
+    """A compiled path, as watched by the element dispatcher.
+
+    A watch path is a linked list of properties. Every node knows the
+    path it's part of, the property to watch, and the remainder of the
+    path. Re-subscribing after a change only follows the remainder.
+    """
+
+    __slots__ = ("path", "property", "remainder", "many")
+
+    def __init__(self, path: str, properties: tuple):
+        self.path = path
+        self.property = properties[0]
+        self.remainder = WatchPath(path, properties[1:]) if properties[1:] else None
+        upper = getattr(self.property, "upper", 1)
+        self.many = upper == "*" or upper > 1
+
+    def values(self, element: Base) -> Iterable[Base]:
+        """The elements the property refers to."""
+        value = self.property.get(element)
+        if self.many:
+            return value  # type: ignore[no-any-return]
+        return (value,) if value else ()
+
+    def __repr__(self):
+        return f"<WatchPath {self.path} @ {self.property.name}>"
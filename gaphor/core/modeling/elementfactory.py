@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from collections import OrderedDict
-from collections.abc import Callable, Iterator
+from collections.abc import Callable, Iterable, Iterator
 from contextlib import contextmanager
 from typing import Protocol, TypeVar, overload
 
@@ -18,14 +18,22 @@ from gaphor.core.modeling.base import (
     UnlinkEvent,
     generate_id,
 )
+from gaphor.core.modeling.collection import lazycollection
 from gaphor.core.modeling.diagram import Diagram
 from gaphor.core.modeling.elementdispatcher import ElementDispatcher, EventWatcher
 from gaphor.core.modeling.event import (
+    AssociationAdded,
+    AssociationDeleted,
+    AssociationSet,
+    AssociationUpdated,
+    AttributeUpdated,
     ElementCreated,
     ElementDeleted,
+    ElementTypeUpdated,
     ModelFlushed,
 )
 from gaphor.core.modeling.presentation import Presentation
+from gaphor.core.modeling.properties import attribute, derivedunion
 from gaphor.core.modeling.stylesheet import StyleSheet
 
 T = TypeVar("T", bound=Base)
@@ -49,6 +57,143 @@ class RecordingEventManager:
             self.event_manager.handle(*self.events)
 
 
+class BulkUpdate(RecordingEventManager):
+    """Record the events of a bulk update.
+
+    See :obj:`~gaphor.core.modeling.ElementFactory.bulk`.
+    """
+
+    def __init__(self, event_manager, on_unlink: Callable[[UnlinkEvent], None]):
+        super().__init__(event_manager)
+        self.on_unlink = on_unlink
+        # (element, derived union) -> union values before the update
+        self.unions: dict[tuple[Base, derivedunion], set] = {}
+        self.updated_unions: set[tuple[Base, derivedunion]] = set()
+
+    def handle(self, *events):
+        self.events.extend(events)
+        for event in events:
+            # Elements should leave the model right away
+            if isinstance(event, UnlinkEvent):
+                self.on_unlink(event)
+
+    def defer_union(self, union: derivedunion, event: AssociationUpdated) -> None:
+        """Postpone the notifications of a derived union until the update
+        is done."""
+        key = (event.element, union)
+        if key not in self.unions:
+            self.unions[key] = union.values_before(event)
+        if not isinstance(
+            event, AssociationSet | AssociationAdded | AssociationDeleted
+        ):
+            self.updated_unions.add(key)
+
+    def replay(self):
+        if self.event_manager and (events := coalesce_events(self.events)):
+            self.event_manager.handle(*events)
+        for (element, union), values in self.unions.items():
+            union.propagate_values(
+                element, values, (element, union) in self.updated_unions
+            )
+
+
+def coalesce_events(events: Iterable[object]) -> list[object]:
+    """Merge subsequent changes of the same attribute or single-valued
+    association of an element into one event.
+
+    Changes that cancel out are dropped altogether.
+    """
+    result: list[object | None] = []
+    positions: dict[tuple[object, object, type], int] = {}
+    for event in events:
+        if isinstance(event, AttributeUpdated | AssociationSet):
+            key = (event.element, event.property, type(event))
+            if (pos := positions.get(key)) is None:
+                positions[key] = len(result)
+                result.append(event)
+                continue
+            first = result[pos]
+            assert isinstance(first, AttributeUpdated | AssociationSet)
+            first.new_value = event.new_value
+            if (
+                first.old_value is first.new_value
+                or isinstance(first, AttributeUpdated)
+                and first.old_value == first.new_value
+            ):
+                result[pos] = None
+                del positions[key]
+        else:
+            result.append(event)
+    return [e for e in result if e is not None]
+
+
+class AttributeIndex:
+    """Elements of a type, by the value of one of their attributes.
+
+    Elements are selected in the order they were added, which is model
+    order. An element keeps its position when its value changes.
+    """
+
+    def __init__(self, type: type[Base], name: str):
+        self.type = type
+        self.name = name
+        self._values: dict[Id, object] = {}
+        self._positions: dict[Id, int] = {}
+        self._next_position = 0
+        self._elements: dict[object, dict[Id, Base]] = {}
+        # Values with elements that are not in model order
+        self._unordered: set[object] = set()
+
+    def select(self, value: object) -> list[Base]:
+        elements = self._elements.get(value)
+        if not elements:
+            return []
+        if value in self._unordered:
+            positions = self._positions
+            elements = self._elements[value] = dict(
+                sorted(elements.items(), key=lambda item: positions[item[0]])
+            )
+            self._unordered.discard(value)
+        return list(elements.values())
+
+    def add(self, element: Base) -> None:
+        assert element.id
+        self._positions[element.id] = self._next_position
+        self._next_position += 1
+        self._add(element, getattr(element, self.name))
+
+    def _add(self, element: Base, value: object) -> None:
+        assert element.id
+        self._values[element.id] = value
+        elements = self._elements.setdefault(value, {})
+        if elements and value not in self._unordered:
+            last = next(reversed(elements))
+            if self._positions[last] > self._positions[element.id]:
+                self._unordered.add(value)
+        elements[element.id] = element
+
+    def remove(self, element: Base) -> None:
+        assert element.id
+        self._remove(element.id)
+        self._positions.pop(element.id, None)
+
+    def _remove(self, id: Id) -> None:
+        try:
+            value = self._values.pop(id)
+        except KeyError:
+            return
+        elements = self._elements[value]
+        del elements[id]
+        if not elements:
+            del self._elements[value]
+            self._unordered.discard(value)
+
+    def update(self, element: Base) -> None:
+        if element.id in self._values:
+            self._remove(element.id)
+            self._add(element, getattr(element, self.name))
+
+
 class ElementFactory(Service):
     """The ``ElementFactory`` is used as a central repository for a model.
 
@@ -57,6 +202,11 @@ class ElementFactory(Service):
 
     Methods like :obj:`~gaphor.core.modeling.ElementFactory.select` can
     be used to find elements in the model.
+
+    Types passed to :obj:`~gaphor.core.modeling.ElementFactory.select`
+    are indexed, so later queries for those types only visit matching
+    elements. The indexes are kept up to date as elements are created,
+    deleted or change type.
     """
 
     def __init__(
@@ -67,7 +217,14 @@ class ElementFactory(Service):
         self.event_manager: EventHandler | None = event_manager
         self.element_dispatcher = element_dispatcher
         self._elements: dict[Id, Base] = OrderedDict()
+        # Indexed type -> elements of that type, or a subtype
+        self._type_indexes: dict[type, dict[Id, Base]] = {}
+        # Element class -> indexes the class is part of
+        self._indexes_by_class: dict[type, list[dict[Id, Base]]] = {}
+        self._attribute_indexes: dict[tuple[type, str], AttributeIndex] = {}
+        self._bulk_update: BulkUpdate | None = None
         self._style_sheet: StyleSheet | None = None
+        self._element_loader: Callable[[Id], Base | None] | None = None
         if event_manager:
             event_manager.subscribe(self._on_unlink_event)
 
@@ -116,6 +273,7 @@ class ElementFactory(Service):
         with self.block_events(event_recorder):
             element = type(id=id, **type_args)  # type: ignore[arg-type]
         self._elements[id] = element
+        self._add_to_indexes(element)
         self.handle(ElementCreated(self, element, diagram))
         event_recorder.replay()
         return element
@@ -125,15 +283,33 @@ class ElementFactory(Service):
         return len(self._elements)
 
     def lookup(self, id: Id) -> Base | None:
-        """Find element with a specific id."""
-        return self._elements.get(id)
+        """Find element with a specific id.
+
+        Elements that are not created yet, such as the presentation items
+        of a lazily loaded diagram, are created by the element loader.
+        """
+        element = self._elements.get(id)
+        if element is None and self._element_loader:
+            return self._element_loader(id)
+        return element
 
     def __getitem__(self, id: Id) -> Base:
-        return self._elements[id]
+        if (element := self.lookup(id)) is None:
+            raise KeyError(id)
+        return element
 
     def __iter__(self):
         return iter(self._elements.values())
 
+    def set_element_loader(self, loader: Callable[[Id], Base | None] | None) -> None:
+        """Set a function that creates elements that are not loaded yet.
+
+        The loader is called by :obj:`lookup` with the id of an element
+        that is not in the factory. Set it to ``None`` once all elements
+        are loaded.
+        """
+        self._element_loader = loader
+
     def __contains__(self, element: Base) -> bool:
         assert isinstance(element.id, Id)
         return self.lookup(element.id) is element
@@ -156,12 +332,14 @@ class ElementFactory(Service):
         * A type: return all elements of that type, or subtypes.
         * An expression.
         """
-        if expression is None:
-            yield from self._elements.values()
+        # Iterate a copy: elements can be created while iterating, e.g. when
+        # presentation items of a lazily loaded diagram are materialized.
+        if expression is None or expression is Base:
+            yield from list(self._elements.values())
         elif isinstance(expression, type):
-            yield from (e for e in self._elements.values() if isinstance(e, expression))
+            yield from list(self._type_index(expression).values())
         else:
-            yield from (e for e in self._elements.values() if expression(e))
+            yield from (e for e in list(self._elements.values()) if expression(e))
 
     def lselect(
         self, expression: Callable[[Base], bool] | type[T] | None = None
@@ -171,6 +349,82 @@ class ElementFactory(Service):
         """
         return list(self.select(expression))
 
+    def select_by_attribute(
+        self, type: type[T], name: str, value: object
+    ) -> Iterator[T]:
+        """Iterate elements of ``type`` with attribute ``name`` set to ``value``.
+
+        An index is created for the attribute on first use. Elements are
+        returned in model order, like :obj:`select`.
+        """
+        if not isinstance(getattr(type, name, None), attribute):
+            raise AttributeError(f"{type.__name__}.{name} is not an attribute")
+
+        key = (type, name)
+        if not (index := self._attribute_indexes.get(key)):
+            index = self._attribute_indexes[key] = AttributeIndex(type, name)
+            for element in self._type_index(type).values():
+                index.add(element)
+        yield from index.select(value)  # type: ignore[misc]
+
+    def _type_index(self, type: type[Base]) -> dict[Id, Base]:
+        if (index := self._type_indexes.get(type)) is None:
+            index = self._type_indexes[type] = {
+                id: e for id, e in self._elements.items() if isinstance(e, type)
+            }
+            self._indexes_by_class.clear()
+        return index
+
+    def _indexes_for(self, cls: type[Base]) -> list[dict[Id, Base]]:
+        try:
+            return self._indexes_by_class[cls]
+        except KeyError:
+            indexes = self._indexes_by_class[cls] = [
+                index
+                for type, index in self._type_indexes.items()
+                if issubclass(cls, type)
+            ]
+            return indexes
+
+    def _add_to_indexes(self, element: Base) -> None:
+        assert element.id
+        for index in self._indexes_for(element.__class__):
+            index[element.id] = element
+        for attribute_index in self._attribute_indexes.values():
+            if isinstance(element, attribute_index.type):
+                attribute_index.add(element)
+
+    def _remove_from_indexes(self, element: Base, cls: type[Base]) -> None:
+        assert element.id
+        for index in self._indexes_for(cls):
+            index.pop(element.id, None)
+        for attribute_index in self._attribute_indexes.values():
+            attribute_index.remove(element)
+
+    def _update_type(self, element: Base, old_class: type[Base]) -> None:
+        # Indexes are rebuilt on next use, so elements stay in model order
+        new_class = element.__class__
+        if stale := [
+            type
+            for type in self._type_indexes
+            if issubclass(old_class, type) != issubclass(new_class, type)
+        ]:
+            for type in stale:
+                del self._type_indexes[type]
+            self._indexes_by_class.clear()
+        for key, attribute_index in list(self._attribute_indexes.items()):
+            if issubclass(old_class, attribute_index.type) != isinstance(
+                element, attribute_index.type
+            ):
+                del self._attribute_indexes[key]
+            else:
+                attribute_index.update(element)
+
+    def _clear_indexes(self) -> None:
+        self._type_indexes.clear()
+        self._indexes_by_class.clear()
+        self._attribute_indexes.clear()
+
     def keys(self) -> Iterator[Id]:
         """Iterate all id's in the factory."""
         return iter(self._elements.keys())
@@ -179,6 +433,16 @@ class ElementFactory(Service):
         """Iterate all elements in the factory."""
         return iter(self._elements.values())
 
+    def reorder(self, key: Callable[[Base], int]) -> None:
+        """Change the order of the elements in the factory.
+
+        Elements are iterated, and saved, in this order.
+        """
+        self._elements = OrderedDict(
+            sorted(self._elements.items(), key=lambda item: key(item[1]))
+        )
+        self._clear_indexes()
+
     def is_empty(self) -> bool:
         """Returns ``True`` if the factory holds no elements."""
         return not bool(self._elements)
@@ -202,15 +466,50 @@ class ElementFactory(Service):
         Diagram elements are flushed first. The remaining elements are
         flushed next.
         """
+        self._element_loader = None
         with self.block_events():
-            for element in self.lselect(Diagram):
-                element.unlink()
+            for diagram in self.lselect(Diagram):
+                # Presentation items that are not loaded yet can be dropped
+                assert isinstance(diagram, Diagram)
+                if isinstance(owned := diagram.ownedPresentation, lazycollection):
+                    owned.discard()
+                diagram.unlink()
 
             for element in self.lselect():
                 element.unlink()
 
+        self._clear_indexes()
         self.handle(ModelFlushed(self))
 
+    @contextmanager
+    def bulk(self):
+        """Make many changes to the model at once.
+
+        Events are held back until the end of the update. Then changes to
+        the same attribute of an element are merged, and the events are
+        emitted in one go. Derived unions are not notified per change, but
+        once for every element they changed for.
+
+        Bulk updates can be nested.
+        """
+        if self._bulk_update:
+            yield self
+            return
+
+        bulk = self._bulk_update = BulkUpdate(self.event_manager, self._on_unlink_event)
+        self.event_manager = bulk
+        try:
+            yield self
+        finally:
+            self.event_manager = bulk.event_manager
+            self._bulk_update = None
+            bulk.replay()
+
+    @property
+    def bulk_update(self) -> BulkUpdate | None:
+        """The bulk update in progress, if any."""
+        return self._bulk_update
+
     @contextmanager
     def block_events(self, new_event_manager: EventHandler | None = None):
         """Block events from being emitted.
@@ -227,6 +526,14 @@ class ElementFactory(Service):
 
     def handle(self, event: object) -> None:
         """Handle events coming from elements."""
+        # Indexes are updated here, since events may be blocked
+        if isinstance(event, AttributeUpdated):
+            for index in self._attribute_indexes.values():
+                if index.name == event.property.name:
+                    index.update(event.element)
+        elif isinstance(event, ElementTypeUpdated) and event.element in self:
+            self._update_type(event.element, event.old_class)
+
         if self.event_manager:
             self.event_manager.handle(event)
         elif isinstance(event, UnlinkEvent):
@@ -241,6 +548,7 @@ class ElementFactory(Service):
             del self._elements[element.id]
         except KeyError:
             return
+        self._remove_from_indexes(element, element.__class__)
         if self.event_manager:
             self.event_manager.handle(
                 ElementDeleted(self, event.element, event.diagram)
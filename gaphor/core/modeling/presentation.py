@@ -10,7 +10,7 @@ from typing import TYPE_CHECKING, Any, Self, TypeVar
 from gaphas.item import Matrices
 
 from gaphor.core.modeling.base import Base, Handler, Id, UnlinkEvent
-from gaphor.core.modeling.event import RevertibleEvent
+from gaphor.core.modeling.event import AssociationSet, RevertibleEvent
 from gaphor.core.modeling.properties import relation_many, relation_one
 
 if TYPE_CHECKING:
@@ -78,6 +78,15 @@ class Presentation[S](Matrices, Base):
         self._watcher.watch(path, handler)
         return self
 
+    def handle(self, event: object) -> None:
+        if (
+            isinstance(event, AssociationSet)
+            and event.property is Presentation.parent
+            and (diagram := self.diagram)
+        ):
+            diagram.item_parent_changed(self, event.old_value, event.new_value)
+        super().handle(event)
+
     def change_parent(self, new_parent: Presentation | None) -> None:
         """Change the parent and update the item's matrix so the item visually
         remains in the same place."""
@@ -25,6 +25,7 @@ methods:
 
 from __future__ import annotations
 
+import contextlib
 import enum
 import logging
 from collections.abc import Callable, Iterable
@@ -37,7 +38,7 @@ from typing import (
     overload,
 )
 
-from gaphor.core.modeling.collection import collection
+from gaphor.core.modeling.collection import collection, lazycollection
 from gaphor.core.modeling.event import (
     AssociationAdded,
     AssociationDeleted,
@@ -446,6 +447,26 @@ class association(subsettable, modelproperty):
             setattr(obj, self._name, v)
         return v
 
+    def peek(self, obj):
+        """Like ``get()``, but do not create an empty collection.
+
+        Collections are only allocated once they're accessed or populated,
+        reading a value internally should not allocate one.
+        """
+        return getattr(obj, self._name, None)
+
+    def defer(self, obj, materialize: Callable[[], bool]) -> None:
+        """Populate the collection of ``obj`` on first access.
+
+        The collection is populated by ``materialize``, see
+        :class:`~gaphor.core.modeling.collection.lazycollection`.
+        """
+        assert self.upper != 1, "Only collections can be loaded lazily"
+        lazy: lazycollection[object] = lazycollection(self, obj, self.type, materialize)
+        if (c := getattr(obj, self._name, None)) is not None:
+            lazy.items = c.items
+        setattr(obj, self._name, lazy)
+
     def set(
         self, obj, value: T | None, index: int | None = None, from_opposite=False
     ) -> None:
@@ -573,12 +594,12 @@ class association(subsettable, modelproperty):
 
         self._del_opposite(obj, value, from_opposite)
 
-        c: collection
-        if c := self._get_many(obj):
+        c: collection | None
+        if c := self.peek(obj):
             items: list = c.items
             try:
                 index = items.index(value)
-                items.remove(value)
+                del items[index]
             except ValueError:
                 pass
             else:
@@ -603,7 +624,7 @@ class association(subsettable, modelproperty):
                 self.stub.delete(value, obj, from_opposite=True)
 
     def unlink(self, obj):
-        if values := self.get(obj):
+        if values := self.peek(obj):
             if self.upper == 1:
                 values = [values]
 
@@ -740,6 +761,8 @@ class derived[T](subsettable, modelproperty):
         self.upper = upper
         self.filter = filter
         self.subsets = set()
+        self.cache_hits = 0
+        self.cache_misses = 0
 
         for s in subsets:
             self.add(s)
@@ -775,16 +798,28 @@ class derived[T](subsettable, modelproperty):
 
     def get(self, obj):
         if self.subsets:
-            try:
-                uc = getattr(obj, self._name)
-                if uc.version != self.version:
-                    uc = self._update(obj)
+            uc = getattr(obj, self._name, None)
+            if uc and uc.version == self.version:
                 assert self is uc.owner
-            except AttributeError:
-                uc = self._update(obj)
-        else:
-            uc = self._update(obj)
-        return uc.data
+                self.cache_hits += 1
+                return uc.data
+            self.cache_misses += 1
+        return self._update(obj).data
+
+    def invalidate(self, obj) -> None:
+        """Forget the value cached for ``obj``.
+
+        Derived unions that depend on this property are invalidated as well.
+        """
+        with contextlib.suppress(AttributeError):
+            delattr(obj, self._name)
+        for d in self.dependent_properties:
+            if isinstance(d, derivedunion) and d.precise:
+                d.invalidate(obj)
+            elif isinstance(d, redefine):
+                for dd in d.dependent_properties:
+                    if isinstance(dd, derivedunion) and dd.precise:
+                        dd.invalidate(obj)
 
     def set(self, obj, value):
         raise AttributeError(f"Cannot set values on union {self.name}: {self.type}")
@@ -836,6 +871,11 @@ class derived[T](subsettable, modelproperty):
                 )
 
 
+def _bulk_update(obj):
+    """The bulk update the model of ``obj`` is in, if any."""
+    return getattr(obj._model, "bulk_update", None)  # noqa: SLF001
+
+
 def object_has_property(obj, prop):
     found = getattr(type(obj), prop.name, None)
     while isinstance(found, redefine):
@@ -859,8 +899,38 @@ class derivedunion(derived[T]):
         upper: Upper = "*",
         *subsets: association | derived | redefine,
     ):
+        self._precise: bool | None = None
         super().__init__(name, type, lower, upper, self._union, *subsets)
 
+    def add(self, subset: association | derived | redefine):
+        super().add(subset)
+        self._precise = None
+
+    @property
+    def precise(self) -> bool:
+        """Can the union be invalidated per element.
+
+        This is the case if the union is made up of associations and
+        other precise unions only: then the value for an element only
+        changes if a subset of that element changes. Custom derived
+        properties may depend on other elements, unions with such subsets
+        are invalidated for all elements on change.
+        """
+        if self._precise is None:
+            self._precise = all(
+                isinstance(s, association)
+                or (isinstance(s, derivedunion) and s.precise)
+                or (
+                    isinstance(s, redefine)
+                    and (
+                        isinstance(s.original, association)
+                        or (isinstance(s.original, derivedunion) and s.original.precise)
+                    )
+                )
+                for s in self.subsets
+            )
+        return self._precise
+
     def _union(self, obj, exclude=None):
         """Returns a union of all values as a set."""
         u: set[T] = set()
@@ -868,7 +938,9 @@ class derivedunion(derived[T]):
             if s is exclude or not object_has_property(obj, s):
                 continue
 
-            tmp: Iterable[T] | T | None = s.get(obj)
+            tmp: Iterable[T] | T | None = (
+                s.peek(obj) if isinstance(s, association) else s.get(obj)
+            )
             if isinstance(tmp, Iterable):
                 u.update(tmp)
             elif tmp:
@@ -886,11 +958,18 @@ class derivedunion(derived[T]):
         if event.property not in self.subsets:
             return
         # Make sure unions are created again
-        self.version += 1
+        if self.precise:
+            self.invalidate(event.element)
+        else:
+            self.version += 1
 
         if not isinstance(event, AssociationUpdated):
             return
 
+        if bulk_update := _bulk_update(event.element):
+            bulk_update.defer_union(self, event)
+            return
+
         values = set(self._union(event.element, exclude=event.property))
 
         if self.upper == 1:
@@ -932,6 +1011,46 @@ class derivedunion(derived[T]):
         else:
             log.error(f"Don't know how to handle event {event} for derived union")
 
+    def values_before(self, event: AssociationUpdated) -> set:
+        """The values of the union, as they were before ``event``."""
+        element = event.element
+        values = set(self._union(element))
+        if isinstance(event, AssociationSet | AssociationAdded) and (
+            new_value := event.new_value
+        ):
+            if new_value not in self._union(element, exclude=event.property):
+                values.discard(new_value)
+        if isinstance(event, AssociationSet | AssociationDeleted) and event.old_value:
+            values.add(event.old_value)
+        return values
+
+    def propagate_values(self, obj, old_values: set, updated=False) -> None:
+        """Emit the changes of the union since it had ``old_values``.
+
+        This is used when notifications have been held back, e.g. during
+        a bulk update.
+        """
+        new_values = set(self._union(obj))
+        if self.upper == 1:
+            # Do not notify in-between states
+            if old_values != new_values and len(old_values) < 2 and len(new_values) < 2:
+                self.handle(
+                    DerivedSet(
+                        obj,
+                        self,
+                        next(iter(old_values), None),
+                        next(iter(new_values), None),
+                    )
+                )
+            return
+
+        for old_value in old_values - new_values:
+            self.handle(DerivedDeleted(obj, self, old_value))
+        for new_value in new_values - old_values:
+            self.handle(DerivedAdded(obj, self, new_value))
+        if updated and old_values == new_values:
+            self.handle(DerivedUpdated(obj, self))
+
 
 class redefine(modelproperty):
     """Redefined association.
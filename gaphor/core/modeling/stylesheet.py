@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import importlib.resources
 import textwrap
+from collections.abc import Hashable, Iterable
 
 from gaphor.core.modeling.base import Base, Id, RepositoryProtocol
 from gaphor.core.modeling.event import AttributeUpdated, StyleSheetUpdated
@@ -76,9 +77,9 @@ class StyleSheet(Base):
         self._compiled_cache[prefers_color_scheme] = compiled_style_sheet
         return compiled_style_sheet
 
-    def clear_caches(self):
+    def clear_caches(self, outdated: Iterable[Hashable] | None = None):
         for compiled in self._compiled_cache.values():
-            compiled.compute_style.cache_clear()
+            compiled.clear_caches(outdated)
 
     def _style_sheet_updated(self):
         self._compiled_cache.clear()
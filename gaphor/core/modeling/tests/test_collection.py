@@ -2,7 +2,7 @@
 
 import pytest
 
-from gaphor.core.modeling.collection import collection
+from gaphor.core.modeling.collection import collection, indexedlist, lazycollection
 
 
 class MockElement:
@@ -130,3 +130,87 @@ def test_swap():
     c.swap("a", "c")
     assert c.items == ["c", "b", "a"]
     assert o.events
+
+
+def test_collection_items_are_indexed():
+    c: collection[int] = collection(None, None, int)
+
+    assert isinstance(c.items, indexedlist)
+
+
+def test_indexed_list_membership():
+    items = indexedlist(range(100))
+
+    assert 50 in items
+    assert 100 not in items
+
+    items.remove(50)
+    items.append(100)
+    items.insert(0, 101)
+    del items[1]
+    items.pop()
+
+    assert 50 not in items
+    assert 100 not in items
+    assert 0 not in items
+    assert 101 in items
+    assert list(items) == [101, *range(1, 50), *range(51, 100)]
+
+
+def test_indexed_list_membership_with_duplicates():
+    items = indexedlist([1] * 20)
+
+    assert 1 in items
+    items.remove(1)
+    assert 1 in items
+
+    del items[1:]
+    assert 1 in items
+    items.remove(1)
+    assert 1 not in items
+
+
+def test_indexed_list_keeps_order():
+    items = indexedlist(range(20))
+
+    items[0], items[19] = items[19], items[0]
+    items.sort()
+
+    assert items.index(19) == 19
+    assert 19 in items
+
+
+def test_lazy_collection_is_populated_on_first_access():
+    def materialize():
+        c.items.append(1)
+        return True
+
+    c: lazycollection[int] = lazycollection(None, None, int, materialize)
+
+    assert not c.is_materialized()
+    assert list(c) == [1]
+    assert c.is_materialized()
+    assert list(c) == [1]
+
+
+def test_lazy_collection_can_postpone_materialization():
+    calls = []
+
+    def materialize():
+        calls.append(1)
+        return len(calls) > 1
+
+    c: lazycollection[int] = lazycollection(None, None, int, materialize)
+
+    assert not c
+    assert not c.is_materialized()
+    assert not c
+    assert c.is_materialized()
+
+
+def test_discarded_lazy_collection_is_not_populated():
+    c: lazycollection[int] = lazycollection(None, None, int, lambda: 1 / 0)
+
+    c.discard()
+
+    assert c.isEmpty()
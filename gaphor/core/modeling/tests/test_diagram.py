@@ -164,3 +164,27 @@ def test_unlink_order_with_parent_element_in_diagram(
     example.unlink()
 
     assert events[-1].element is not example
+
+
+def test_sort_items_in_depth_first_order(diagram):
+    example_1 = diagram.create(Example)
+    example_2 = diagram.create(Example)
+    example_3 = diagram.create(Example)
+
+    example_1.parent = example_3
+
+    assert list(diagram.sort([example_1, example_2, example_3])) == [
+        example_2,
+        example_3,
+        example_1,
+    ]
+
+
+def test_sort_skips_removed_items(diagram):
+    example_1 = diagram.create(Example)
+    example_2 = diagram.create(Example)
+    assert list(diagram.sort([example_2, example_1])) == [example_1, example_2]
+
+    example_1.unlink()
+
+    assert list(diagram.sort([example_2, example_1])) == [example_2]
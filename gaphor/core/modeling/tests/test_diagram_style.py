@@ -52,3 +52,51 @@ def test_style_sheet_has_default_style():
     style_sheet = StyleSheet()
 
     assert "diagram {" in style_sheet.styleSheet
+
+
+def test_update_keeps_styles_of_untouched_items(element_factory, diagram):
+    style_sheet = element_factory.create(StyleSheet)
+    item_1 = diagram.create(DemoItem)
+    item_2 = diagram.create(DemoItem)
+    item_3 = diagram.create(DemoItem)
+
+    styles = [
+        style_sheet.compute_style(StyledItem(i)) for i in (item_1, item_2, item_3)
+    ]
+    diagram.update({item_2})
+
+    assert style_sheet.compute_style(StyledItem(item_1)) is styles[0]
+    assert style_sheet.compute_style(StyledItem(item_2)) is not styles[1]
+    # Sibling selectors may depend on the updated item
+    assert style_sheet.compute_style(StyledItem(item_3)) is not styles[2]
+
+
+def test_update_recomputes_styles_when_diagram_changes(element_factory, diagram):
+    style_sheet = element_factory.create(StyleSheet)
+    style_sheet.styleSheet = "diagram[name=a] demo { font-size: 42 }"
+    item = diagram.create(DemoItem)
+
+    assert style_sheet.compute_style(StyledItem(item))["font-size"] != 42
+
+    diagram.name = "a"
+    diagram.update()
+
+    assert style_sheet.compute_style(StyledItem(item))["font-size"] == 42
+
+
+def test_update_recomputes_styles_of_old_and_new_parent(element_factory, diagram):
+    style_sheet = element_factory.create(StyleSheet)
+    style_sheet.styleSheet = "demo:has(demo) { font-size: 42 }"
+    old_parent = diagram.create(DemoItem)
+    new_parent = diagram.create(DemoItem)
+    item = diagram.create(DemoItem, parent=old_parent)
+    diagram.update()
+
+    assert style_sheet.compute_style(StyledItem(old_parent))["font-size"] == 42
+    assert style_sheet.compute_style(StyledItem(new_parent))["font-size"] != 42
+
+    item.parent = new_parent
+    diagram.update()
+
+    assert style_sheet.compute_style(StyledItem(old_parent))["font-size"] != 42
+    assert style_sheet.compute_style(StyledItem(new_parent))["font-size"] == 42
@@ -433,3 +433,61 @@ def test_cyclic(element_factory, dispatcher, handler):
 
     a.unlink()
     assert 1 == len(dispatcher._handlers)
+
+
+def test_compiled_paths_are_shared(element_factory, dispatcher, handler):
+    a1 = element_factory.create(A)
+    a2 = element_factory.create(A)
+
+    dispatcher.subscribe(handler, a1, "one.two")
+    dispatcher.subscribe(handler, a2, "one.two")
+
+    assert len(dispatcher._paths) == 1
+    assert (
+        dispatcher._handlers[a1, A.one][handler]
+        == dispatcher._handlers[a2, A.one][handler]
+    )
+
+
+def test_resubscribe_does_not_grow_reverse_table(element_factory, dispatcher, handler):
+    a = element_factory.create(A)
+    b = element_factory.create(A)
+    dispatcher.subscribe(handler, a, "one.two")
+
+    for _ in range(3):
+        a.one = b
+        del a.one
+
+    assert list(dispatcher._reverse[handler]) == [(a, A.one)]
+
+
+def test_dispatch_counts_per_path(element_factory, dispatcher, handler):
+    a = element_factory.create(A)
+    dispatcher.subscribe(handler, a, "one.two")
+    dispatcher.subscribe(handler, a, "two")
+
+    a.one = element_factory.create(A)
+    a.one.two = element_factory.create(A)
+    a.two = element_factory.create(A)
+
+    assert dispatcher.dispatch_counts == {"one.two": 2, "two": 1}
+
+
+def test_handler_unsubscribed_while_dispatching_stays_unsubscribed(
+    element_factory, dispatcher
+):
+    a = element_factory.create(A)
+    b = element_factory.create(A)
+    events = []
+
+    def handler(event):
+        events.append(event)
+        dispatcher.unsubscribe(handler)
+
+    dispatcher.subscribe(handler, a, "one.two")
+    a.one = b
+    b.two = element_factory.create(A)
+
+    assert len(events) == 1
+    assert handler not in dispatcher._reverse
+    assert not dispatcher._handlers
@@ -4,7 +4,12 @@ from collections.abc import Container, Iterable
 import pytest
 
 from gaphor.core import event_handler
+from gaphor.core.modeling.base import swap_element_type
 from gaphor.core.modeling.event import (
+    AttributeUpdated,
+    DerivedAdded,
+    DerivedSet,
+    DerivedUpdated,
     ElementCreated,
     ElementDeleted,
     ModelChanged,
@@ -12,7 +17,16 @@ from gaphor.core.modeling.event import (
 )
 from gaphor.core.modeling.presentation import Presentation
 from gaphor.core.modeling.stylesheet import StyleSheet
-from gaphor.UML import LiteralString, Operation, Parameter
+from gaphor.UML import (
+    Class,
+    Classifier,
+    Element,
+    Interface,
+    LiteralString,
+    Operation,
+    Package,
+    Parameter,
+)
 
 
 def test_element_factory_is_an_iterable(element_factory):
@@ -62,6 +76,125 @@ def test_flush(element_factory):
     assert not list(element_factory.values()), list(element_factory.values())
 
 
+def test_reorder(element_factory):
+    p1 = element_factory.create(Parameter)
+    p2 = element_factory.create(Parameter)
+    p3 = element_factory.create(Parameter)
+
+    element_factory.reorder([p3, p1, p2].index)
+
+    assert list(element_factory) == [p3, p1, p2]
+
+
+def test_select_type_includes_subtypes(element_factory):
+    c = element_factory.create(Class)
+    i = element_factory.create(Interface)
+    element_factory.create(Operation)
+
+    assert element_factory.lselect(Classifier) == [c, i]
+    assert element_factory.lselect(Class) == [c]
+
+
+def test_select_type_after_create_and_delete(element_factory):
+    c1 = element_factory.create(Class)
+    assert element_factory.lselect(Class) == [c1]
+
+    c2 = element_factory.create(Class)
+    c1.unlink()
+
+    assert element_factory.lselect(Class) == [c2]
+    assert element_factory.lselect(Classifier) == [c2]
+
+
+def test_select_type_after_type_change(element_factory):
+    c1 = element_factory.create(Class)
+    c2 = element_factory.create(Class)
+    assert element_factory.lselect(Class) == [c1, c2]
+    assert element_factory.lselect(Interface) == []
+
+    swap_element_type(c1, Interface)
+
+    assert element_factory.lselect(Class) == [c2]
+    assert element_factory.lselect(Interface) == [c1]
+    assert element_factory.lselect(Classifier) == [c1, c2]
+
+
+def test_select_type_after_reorder(element_factory):
+    c1 = element_factory.create(Class)
+    c2 = element_factory.create(Class)
+    assert element_factory.lselect(Class) == [c1, c2]
+
+    element_factory.reorder([c2, c1].index)
+
+    assert element_factory.lselect(Class) == [c2, c1]
+
+
+def test_select_type_after_flush(element_factory):
+    element_factory.create(Class)
+    assert element_factory.lselect(Class)
+
+    element_factory.flush()
+
+    assert element_factory.lselect(Class) == []
+
+
+def test_select_by_attribute(element_factory):
+    c1 = element_factory.create(Class)
+    c1.name = "A"
+    c2 = element_factory.create(Class)
+    c2.name = "B"
+    i = element_factory.create(Interface)
+    i.name = "A"
+
+    assert list(element_factory.select_by_attribute(Class, "name", "A")) == [c1]
+    assert list(element_factory.select_by_attribute(Classifier, "name", "A")) == [
+        c1,
+        i,
+    ]
+
+
+def test_select_by_attribute_follows_changes(element_factory):
+    c1 = element_factory.create(Class)
+    c1.name = "A"
+    assert list(element_factory.select_by_attribute(Class, "name", "A")) == [c1]
+
+    c1.name = "B"
+    c2 = element_factory.create(Class)
+    with element_factory.block_events():
+        c2.name = "A"
+
+    assert list(element_factory.select_by_attribute(Class, "name", "A")) == [c2]
+    assert list(element_factory.select_by_attribute(Class, "name", "B")) == [c1]
+
+    c2.unlink()
+
+    assert list(element_factory.select_by_attribute(Class, "name", "A")) == []
+
+
+def test_select_by_attribute_keeps_model_order(element_factory):
+    c1 = element_factory.create(Class)
+    c2 = element_factory.create(Class)
+    c3 = element_factory.create(Class)
+    c1.name = c2.name = c3.name = "A"
+    assert list(element_factory.select_by_attribute(Class, "name", "A")) == [
+        c1,
+        c2,
+        c3,
+    ]
+
+    c1.name = "B"
+    c1.name = "A"
+
+    assert list(element_factory.select_by_attribute(Class, "name", "A")) == list(
+        element_factory.select(Class)
+    )
+
+
+def test_select_by_attribute_requires_an_attribute(element_factory):
+    with pytest.raises(AttributeError):
+        next(element_factory.select_by_attribute(Class, "ownedAttribute", None))
+
+
 def test_without_application(element_factory):
     element_factory.create(Parameter)
     assert element_factory.size() == 1, element_factory.size()
@@ -186,3 +319,75 @@ def test_indirect_delete_of_element(event_manager, element_factory):
     with pytest.raises(TypeError):
         assert operation.model
     assert operation not in element_factory
+
+
+def test_no_create_events_during_bulk_update(element_factory):
+    with element_factory.bulk():
+        element_factory.create(Parameter)
+        assert events == []
+
+    assert isinstance(last_event, ElementCreated)
+
+
+def test_bulk_update_removes_unlinked_elements(element_factory):
+    p = element_factory.create(Parameter)
+    clear_events()
+
+    with element_factory.bulk():
+        p.unlink()
+        assert p not in element_factory
+
+    assert len(events) == 1
+    assert isinstance(last_event, ElementDeleted)
+
+
+def test_bulk_update_merges_attribute_changes(event_manager, element_factory):
+    updates = []
+    event_manager.subscribe(event_handler(AttributeUpdated)(updates.append))
+    c = element_factory.create(Class)
+
+    with element_factory.bulk():
+        c.name = "a"
+        c.name = "b"
+        c.name = "c"
+
+    assert len(updates) == 1
+    assert updates[0].old_value is None
+    assert updates[0].new_value == "c"
+
+
+def test_bulk_update_drops_reverted_changes(event_manager, element_factory):
+    updates = []
+    event_manager.subscribe(event_handler(AttributeUpdated)(updates.append))
+    c = element_factory.create(Class)
+
+    with element_factory.bulk():
+        c.name = "a"
+        c.name = None
+
+    assert updates == []
+
+
+def test_bulk_update_notifies_derived_unions_once(event_manager, element_factory):
+    derived = []
+    event_manager.subscribe(event_handler(DerivedUpdated)(derived.append))
+    package = element_factory.create(Package)
+    other_package = element_factory.create(Package)
+    c = element_factory.create(Class)
+
+    with element_factory.bulk():
+        c.package = other_package
+        c.package = package
+        assert c.owner is package
+        assert derived == []
+
+    owned_element_added = [
+        e
+        for e in derived
+        if isinstance(e, DerivedAdded) and e.property is Element.ownedElement
+    ]
+    owner_set = [
+        e for e in derived if isinstance(e, DerivedSet) and e.property is Element.owner
+    ]
+    assert [(e.element, e.new_value) for e in owned_element_added] == [(package, c)]
+    assert [(e.old_value, e.new_value) for e in owner_set] == [(None, package)]
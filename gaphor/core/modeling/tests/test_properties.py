@@ -776,6 +776,96 @@ def test_derivedunion():
     assert d in a.u
 
 
+def test_derivedunion_is_cached():
+    class A(Base):
+        a: relation_many[A]
+        u: relation_many[A]
+
+    A.a = association("a", A)
+    A.u = derivedunion("u", object, 0, "*", A.a)
+
+    a = A()
+    a.a = b = A()
+
+    assert list(a.u) == [b]
+    assert list(a.u) == [b]
+    assert A.u.cache_misses == 1
+    assert A.u.cache_hits == 1
+
+
+def test_derivedunion_is_invalidated_per_element():
+    class A(Base):
+        a: relation_many[A]
+        u: relation_many[A]
+
+    A.a = association("a", A)
+    A.u = derivedunion("u", object, 0, "*", A.a)
+
+    a1 = A()
+    a2 = A()
+    assert A.u.precise
+    assert len(a1.u) == 0
+    assert len(a2.u) == 0
+
+    a1.a = b = A()
+
+    assert list(a1.u) == [b]
+    assert len(a2.u) == 0
+    assert A.u.cache_misses == 3
+    assert A.u.cache_hits == 1
+
+
+def test_nested_derivedunion_is_invalidated():
+    class A(Base):
+        a: relation_many[A]
+        b: relation_one[A]
+        u: relation_many[A]
+        uu: relation_many[A]
+
+    A.a = association("a", A)
+    A.b = association("b", A, 0, 1)
+    A.u = derivedunion("u", object, 0, "*", A.a)
+    A.uu = derivedunion("uu", object, 0, "*", A.u, A.b)
+
+    a = A()
+    assert len(a.uu) == 0
+
+    a.a = b = A()
+    assert list(a.uu) == [b]
+
+    del a.a[b]
+    assert len(a.uu) == 0
+
+
+def test_derivedunion_does_not_allocate_collections():
+    class A(Base):
+        a: relation_many[A]
+        u: relation_many[A]
+
+    A.a = association("a", A)
+    A.u = derivedunion("u", object, 0, "*", A.a)
+
+    a = A()
+    assert len(a.u) == 0
+    assert A.a.peek(a) is None
+
+    a.a = b = A()
+    assert list(a.u) == [b]
+    assert A.a.peek(a) == [b]
+
+
+def test_unlink_does_not_allocate_collections():
+    class A(Base):
+        a: relation_many[A]
+
+    A.a = association("a", A)
+
+    a = A()
+    a.unlink()
+
+    assert A.a.peek(a) is None
+
+
 def test_derivedunion_notify_for_single_derived_property():
     class A(Base):
         pass
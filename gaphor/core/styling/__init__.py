@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-import functools
-from collections.abc import Callable, Hashable, Iterator, Sequence
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Iterator, Sequence
 from typing import Protocol, TypedDict
 
 from gaphor.core.styling.compiler import compile_style_sheet
@@ -95,6 +95,15 @@ class StyleNode(Hashable, Protocol):
     def state(self) -> Sequence[str]: ...
 
 
+def style_node_owner(node: StyleNode) -> Hashable:
+    """The object a style node is for, such as a presentation item.
+
+    Nodes can provide it as ``owner``. Nodes for the same object, in
+    another state or for a pseudo element, should have the same owner.
+    """
+    return getattr(node, "owner", node)
+
+
 def merge_styles(*styles: Style) -> Style:
     style = Style()
     abs_font_size = None
@@ -147,10 +156,15 @@ def resolve_variables(style: Style, style_layers: Sequence[Style]) -> Style:
     return new_style
 
 
+# Maximum number of styles shared between nodes, per compiled style sheet
+MAX_SHARED_STYLES = 4096
+
+
 class CompiledStyleSheet:
     """A style sheet, ready to compute styles for any StyleNode.
 
     The computed styles are cached, to speed up subsequent lookups.
+    Call :meth:`clear_caches` when the model changes.
     """
 
     def __init__(
@@ -165,17 +179,191 @@ class CompiledStyleSheet:
             )
             if selector != "error"
         ]
-        # Use this trick to bind a cache per instance, instead of globally.
-        # This avoids recalculating (parent) styles.
-        self.compute_style = functools.lru_cache(maxsize=1000)(
-            self._compute_style_uncached
-        )
+        self._index_rules()
+        # Nodes with the same style key share a style. Those survive
+        # changes to the model: the key contains all a style depends on.
+        # Keys contain attribute values, so the least recently used styles
+        # are dropped once there are MAX_SHARED_STYLES.
+        self._shared_styles: OrderedDict[tuple, Style] = OrderedDict()
+        # Keys and styles per node are valid until the model changes.
+        self._node_keys: dict[StyleNode, tuple] = {}
+        self._node_styles: dict[StyleNode, Style] = {}
+        # Nodes with a key, by owner and by parent, so outdated nodes
+        # can be forgotten without visiting all nodes.
+        self._owned_nodes: dict[Hashable, set[StyleNode]] = {}
+        self._child_nodes: dict[StyleNode, set[StyleNode]] = {}
+        self._root_nodes: set[StyleNode] = set()
+        # Nodes with candidate rules that depend on any other node
+        self._relational_nodes: set[StyleNode] = set()
+
+    def _index_rules(self) -> None:
+        # Rules are indexed by a name, class or attribute a node must have,
+        # so only candidate rules have to be tested.
+        self._universal_rules: list[int] = []
+        self._rules_by_name: dict[str, list[int]] = {}
+        self._rules_by_class: dict[str, list[int]] = {}
+        self._rules_by_attribute: dict[str, list[int]] = {}
+        indexes = {
+            "name": self._rules_by_name,
+            "class": self._rules_by_class,
+            "attribute": self._rules_by_attribute,
+        }
+        # Attributes local rules depend on. Other rules are structural.
+        self._rule_attributes: dict[int, frozenset[str]] = {}
+        self._relational_rules: set[int] = set()
+        for n, (selector, _declarations) in enumerate(self.rules):
+            if keys := getattr(selector, "__selector_keys__", None):
+                for kind, value in keys:
+                    indexes[kind].setdefault(value, []).append(n)
+            else:
+                self._universal_rules.append(n)
+            if (
+                attributes := getattr(selector, "__local_attributes__", None)
+            ) is not None:
+                self._rule_attributes[n] = attributes
+            if getattr(selector, "__relational__", False):
+                self._relational_rules.add(n)
+
+    def candidate_rules(self, node: StyleNode) -> list[int]:
+        """The positions of the rules that may match ``node``, in order."""
+        candidates = list(self._universal_rules)
+        if rules := self._rules_by_name.get(node.name()):
+            candidates.extend(rules)
+        if self._rules_by_class:
+            for class_name in node.classes():
+                if rules := self._rules_by_class.get(class_name):
+                    candidates.extend(rules)
+        for name, rules in self._rules_by_attribute.items():
+            if node.attribute(name) is not None:
+                candidates.extend(rules)
+        return sorted(set(candidates))
+
+    def match(self, node: StyleNode) -> Iterator[Style]:
+        """The declarations of all rules that match ``node``, in order."""
+        rules = self.rules
+        for n in self.candidate_rules(node):
+            selector, declarations = rules[n]
+            if selector(node):
+                yield declarations
+
+    def compute_style(self, node: StyleNode) -> Style:
+        if (style := self._node_styles.get(node)) is None:
+            style = self._shared_style(node, self.style_key(node)).copy()
+            style["-gaphor-style-node"] = node
+            style["-gaphor-compiled-style-sheet"] = self
+            self._node_styles[node] = style
+        return style
+
+    def style_key(self, node: StyleNode) -> tuple:
+        """A key for everything the style of ``node`` depends on.
 
-    def _compute_style_uncached(self, node: StyleNode) -> Style:
-        parent = node.parent()
-        parent_style = self.compute_style(parent) if parent else {}
-        return merge_styles(
-            {n: v for n, v in parent_style.items() if n in INHERITED_DECLARATIONS},  # type: ignore[arg-type]
-            *(declarations for selector, declarations in self.rules if selector(node)),
-            {"-gaphor-style-node": node, "-gaphor-compiled-style-sheet": self},
+        That is the name, classes, state and pseudo element of the node,
+        the attributes tested by rules, the structural rules that match,
+        and the key of the parent node.
+        """
+        if (key := self._node_keys.get(node)) is None:
+            rules = self.rules
+            rule_attributes = self._rule_attributes
+            attributes: set[str] = set()
+            structural = []
+            candidates = self.candidate_rules(node)
+            for n in candidates:
+                if (local_attributes := rule_attributes.get(n)) is not None:
+                    attributes.update(local_attributes)
+                elif rules[n][0](node):
+                    structural.append(n)
+            if not self._relational_rules.isdisjoint(candidates):
+                self._relational_nodes.add(node)
+            parent = node.parent()
+            key = (
+                node.name(),
+                tuple(node.classes()),
+                tuple(node.state()),
+                node.pseudo,
+                tuple((name, node.attribute(name)) for name in sorted(attributes)),
+                tuple(structural),
+                self.style_key(parent) if parent else None,
+            )
+            self._node_keys[node] = key
+            self._owned_nodes.setdefault(style_node_owner(node), set()).add(node)
+            if parent:
+                self._child_nodes.setdefault(parent, set()).add(node)
+            else:
+                self._root_nodes.add(node)
+        return key
+
+    def clear_caches(self, outdated: Iterable[Hashable] | None = None) -> None:
+        """Forget styles and keys of nodes.
+
+        Styles shared between nodes are kept.
+
+        If ``outdated`` is provided, only the nodes of those owners (see
+        :func:`style_node_owner`), and their descendants, are forgotten.
+        It should contain the owners of all nodes that changed, and of
+        their ancestors, except for root nodes. Root nodes are checked
+        again: if the key of a root node changed, the root node and all its
+        descendants are forgotten. Nodes matched by relational selectors,
+        such as ``:has(a) b``, are always forgotten. Nodes that are added,
+        removed or moved require their root node to be forgotten.
+        """
+        if outdated is None:
+            self._node_keys.clear()
+            self._node_styles.clear()
+            self._owned_nodes.clear()
+            self._child_nodes.clear()
+            self._root_nodes.clear()
+            self._relational_nodes.clear()
+            return
+
+        owned_nodes = self._owned_nodes
+        self._forget(
+            [
+                *(node for owner in outdated for node in owned_nodes.get(owner, ())),
+                *self._relational_nodes,
+            ]
         )
+
+        node_keys = self._node_keys
+        for root in list(self._root_nodes):
+            if (key := node_keys.pop(root, None)) and self.style_key(root) != key:
+                self._forget([root])
+
+    def _forget(self, nodes: list[StyleNode]) -> None:
+        """Forget nodes, and all their descendants."""
+        node_keys = self._node_keys
+        node_styles = self._node_styles
+        owned_nodes = self._owned_nodes
+        child_nodes = self._child_nodes
+        while nodes:
+            node = nodes.pop()
+            if node_keys.pop(node, None) is None:
+                continue
+            node_styles.pop(node, None)
+            self._relational_nodes.discard(node)
+            owner = style_node_owner(node)
+            if (owned := owned_nodes.get(owner)) is not None:
+                owned.discard(node)
+                if not owned:
+                    del owned_nodes[owner]
+            # Nodes may have moved since: their old parent keeps a reference
+            if (parent := node.parent()) is None:
+                self._root_nodes.discard(node)
+            elif (siblings := child_nodes.get(parent)) is not None:
+                siblings.discard(node)
+            nodes.extend(child_nodes.pop(node, ()))
+
+    def _shared_style(self, node: StyleNode, key: tuple) -> Style:
+        shared_styles = self._shared_styles
+        if (style := shared_styles.get(key)) is None:
+            parent = node.parent()
+            parent_style = self._shared_style(parent, key[-1]) if parent else {}
+            style = merge_styles(
+                {n: v for n, v in parent_style.items() if n in INHERITED_DECLARATIONS},  # type: ignore[arg-type]
+                *self.match(node),
+            )
+            shared_styles[key] = style
+            if len(shared_styles) > MAX_SHARED_STYLES:
+                shared_styles.popitem(last=False)
+        else:
+            shared_styles.move_to_end(key)
+        return style
@@ -117,11 +117,128 @@ def compile_selector_list(input):
     Returns a list of compiled selectors.
     """
     return [
-        (compile_node(selector), selector.specificity)
+        (compile_selector(selector), selector.specificity)
         for selector in selectors.selectors(input)
     ]
 
 
+def compile_selector(selector):
+    """Compile a selector.
+
+    The compiled selector has attributes ``__selector_keys__``, see
+    :func:`selector_keys`, ``__local_attributes__``, see
+    :func:`local_attributes`, and ``__relational__``, see
+    :func:`is_relational`.
+    """
+    compiled = compile_node(selector)
+    compiled.__selector_keys__ = selector_keys(selector)
+    compiled.__local_attributes__ = local_attributes(selector)
+    compiled.__relational__ = is_relational(selector)
+    return compiled
+
+
+def selector_keys(selector) -> tuple[tuple[str, str], ...]:
+    """Find names, classes or attributes a node should have to match a selector.
+
+    A node should have at least one of them. Only the rightmost compound
+    selector is considered, since that should match the node itself. Local
+    names are preferred over class names, class names over attribute names.
+    The alternatives of ``:is()`` are used if none of those is present. An
+    empty tuple is returned if the selector can match any node.
+    """
+    if isinstance(selector, selectors.CombinedSelector):
+        selector = selector.right
+
+    keys = {}
+    alternatives: tuple[tuple[str, str], ...] = ()
+    for simple_selector in selector.simple_selectors:
+        if isinstance(simple_selector, selectors.LocalNameSelector):
+            keys["name"] = simple_selector.lower_local_name
+        elif isinstance(simple_selector, selectors.ClassSelector):
+            keys["class"] = simple_selector.class_name
+        elif isinstance(simple_selector, selectors.AttributeSelector):
+            keys["attribute"] = simple_selector.lower_name
+        elif (
+            isinstance(simple_selector, selectors.FunctionalPseudoClassSelector)
+            and simple_selector.name == "is"
+            and not alternatives
+        ):
+            sub_keys = [
+                selector_keys(s) for s in selectors.selectors(simple_selector.arguments)
+            ]
+            if all(sub_keys):
+                alternatives = tuple(key for k in sub_keys for key in k)
+
+    for kind in ("name", "class", "attribute"):
+        if kind in keys:
+            return ((kind, keys[kind]),)
+    return alternatives
+
+
+def local_attributes(selector) -> frozenset[str] | None:
+    """The attributes a selector depends on, if it only tests the node itself.
+
+    A local selector matches based on the name, classes, attributes, state
+    and pseudo element of a node. ``None`` is returned for selectors that
+    also depend on other nodes, such as combinators, ``:has()`` and
+    ``:first-child``.
+    """
+    if isinstance(selector, selectors.CombinedSelector):
+        return None
+    elif isinstance(selector, selectors.CompoundSelector):
+        attributes: frozenset[str] = frozenset()
+        for simple_selector in selector.simple_selectors:
+            simple_attributes = local_attributes(simple_selector)
+            if simple_attributes is None:
+                return None
+            attributes |= simple_attributes
+        return attributes
+    elif isinstance(selector, selectors.AttributeSelector):
+        return frozenset([selector.lower_name])
+    elif isinstance(selector, selectors.PseudoClassSelector):
+        return (
+            None if selector.name in ("empty", "root", "first-child") else frozenset()
+        )
+    elif isinstance(selector, selectors.FunctionalPseudoClassSelector):
+        if selector.name == "has":
+            return None
+        attributes = frozenset()
+        for sub_selector in selectors.selectors(selector.arguments):
+            sub_attributes = local_attributes(sub_selector)
+            if sub_attributes is None:
+                return None
+            attributes |= sub_attributes
+        return attributes
+    return frozenset()
+
+
+def is_relational(selector) -> bool:
+    """Tell if a selector tests the descendants of ancestors or siblings.
+
+    Those selectors have a ``:has()`` pseudo-class left of a combinator.
+    A change to any node can change what they match.
+    """
+    if isinstance(selector, selectors.CombinedSelector):
+        return _contains_has(selector.left) or is_relational(selector.right)
+    elif isinstance(selector, selectors.CompoundSelector):
+        return any(is_relational(s) for s in selector.simple_selectors)
+    elif isinstance(selector, selectors.FunctionalPseudoClassSelector):
+        return any(is_relational(s) for s in selectors.selectors(selector.arguments))
+    return False
+
+
+def _contains_has(selector) -> bool:
+    if isinstance(selector, selectors.CombinedSelector):
+        return _contains_has(selector.left) or _contains_has(selector.right)
+    elif isinstance(selector, selectors.CompoundSelector):
+        return any(_contains_has(s) for s in selector.simple_selectors)
+    elif isinstance(selector, selectors.FunctionalPseudoClassSelector):
+        return selector.name == "has" or any(
+            _contains_has(s) for s in selectors.selectors(selector.arguments)
+        )
+    return False
+
+
 @singledispatch
 def compile_node(selector):
     """Dynamic dispatch selector nodes.
@@ -1,6 +1,11 @@
-from collections.abc import Iterator, Sequence
+from collections.abc import Hashable, Iterator, Sequence
 
-from gaphor.core.styling import CompiledStyleSheet, Style, StyleNode
+from gaphor.core.styling import (
+    CompiledStyleSheet,
+    Style,
+    StyleNode,
+    style_node_owner,
+)
 
 
 class PseudoStyleNode:
@@ -8,6 +13,14 @@ class PseudoStyleNode:
         self._node = node
         self.pseudo = psuedo
 
+    @property
+    def node(self) -> StyleNode:
+        return self._node
+
+    @property
+    def owner(self) -> Hashable:
+        return style_node_owner(self._node)
+
     def name(self) -> str:
         return self._node.name()
 
@@ -17,6 +30,9 @@ class PseudoStyleNode:
     def children(self) -> Iterator[StyleNode]:
         return self._node.children()
 
+    def classes(self) -> Sequence[str]:
+        return self._node.classes()
+
     def attribute(self, name: str) -> str | None:
         return self._node.attribute(name)
 
@@ -430,3 +430,65 @@ def test_media_query(css):
 def test_invalid_media_query(css, exc_type):
     with pytest.raises(exc_type):
         next(compile_style_sheet(css))
+
+
+@pytest.mark.parametrize(
+    "css,keys",
+    [
+        ["* {}", ()],
+        [":hover {}", ()],
+        ["classitem {}", (("name", "classitem"),)],
+        ["ClassItem.foo[bar] {}", (("name", "classitem"),)],
+        [".foo[bar] {}", (("class", "foo"),)],
+        ["[bar=baz] {}", (("attribute", "bar"),)],
+        ["classitem > nested {}", (("name", "nested"),)],
+        ["classitem * {}", ()],
+        [
+            ":is(classitem, .foo) {}",
+            (("name", "classitem"), ("class", "foo")),
+        ],
+        [":is(classitem, *) {}", ()],
+        [":is(classitem, packageitem).foo {}", (("class", "foo"),)],
+    ],
+)
+def test_selector_keys(css, keys):
+    selector, _declarations = next(compile_style_sheet(css))
+
+    assert selector.__selector_keys__ == keys
+
+
+@pytest.mark.parametrize(
+    "css,attributes",
+    [
+        ["* {}", frozenset()],
+        ["classitem.foo:hover::after {}", frozenset()],
+        ["classitem[Name][bar=baz] {}", frozenset(["name", "bar"])],
+        [":not([name]) {}", frozenset(["name"])],
+        [":is(classitem, [bar]) {}", frozenset(["bar"])],
+        ["classitem nested {}", None],
+        ["nested:first-child {}", None],
+        [":has(nested) {}", None],
+        [":not(:root) {}", None],
+    ],
+)
+def test_local_attributes(css, attributes):
+    selector, _declarations = next(compile_style_sheet(css))
+
+    assert selector.__local_attributes__ == attributes
+
+
+@pytest.mark.parametrize(
+    "css,relational",
+    [
+        ["* {}", False],
+        [":has(nested) {}", False],
+        ["classitem > nested:has(name) {}", False],
+        [":has(nested) name {}", True],
+        [":is(:has(nested) + name) {}", True],
+        [":has(:has(nested) name) {}", True],
+    ],
+)
+def test_relational_selectors(css, relational):
+    selector, _declarations = next(compile_style_sheet(css))
+
+    assert selector.__relational__ == relational
@@ -1,5 +1,6 @@
 import pytest
 
+from gaphor.core import styling
 from gaphor.core.styling import (
     CompiledStyleSheet,
     compile_style_sheet,
@@ -405,3 +406,167 @@ def test_pseudo_element_inherits_normal_declarations():
 
     assert after
     assert after.get("content") == "Hi"
+
+
+def test_candidate_rules_are_selected_by_name_class_and_attribute():
+    css = """
+    * {}
+    classitem {}
+    packageitem {}
+    .foo {}
+    .bar {}
+    [name] {}
+    """
+
+    compiled_style_sheet = CompiledStyleSheet(css)
+
+    assert compiled_style_sheet.candidate_rules(Node("classitem")) == [0, 1]
+    assert compiled_style_sheet.candidate_rules(
+        Node("packageitem", classes=["bar"], attributes={"name": "a"})
+    ) == [0, 2, 4, 5]
+
+
+def test_matching_rules_keep_cascade_order():
+    css = """
+    .foo { font-size: 1 }
+    node { font-size: 2 }
+    [name] { font-size: 3 }
+    * { font-size: 4 }
+    """
+
+    compiled_style_sheet = CompiledStyleSheet(css)
+    node = Node("node", classes=["foo"], attributes={"name": "a"})
+
+    assert [d["font-size"] for d in compiled_style_sheet.match(node)] == [4, 2, 1, 3]
+
+
+def test_nodes_with_the_same_key_share_a_style():
+    css = """
+    node { color: red }
+    node[name=a] { font-size: 12 }
+    node:first-child { font-family: sans }
+    """
+
+    compiled_style_sheet = CompiledStyleSheet(css)
+    parent = Node("parent")
+    first = Node("node", parent=parent, attributes={"name": "a"})
+    second = Node("node", parent=parent, attributes={"name": "a"})
+    third = Node("node", parent=parent, attributes={"name": "b"})
+    fourth = Node("node", parent=parent, attributes={"name": "a"})
+
+    first_style = compiled_style_sheet.compute_style(first)
+    second_style = compiled_style_sheet.compute_style(second)
+    third_style = compiled_style_sheet.compute_style(third)
+
+    assert compiled_style_sheet.style_key(second) == compiled_style_sheet.style_key(
+        fourth
+    )
+    assert compiled_style_sheet.style_key(first) != compiled_style_sheet.style_key(
+        second
+    )
+    assert first_style["font-family"] == "sans"
+    assert "font-family" not in second_style
+    assert second_style["font-size"] == 12
+    assert "font-size" not in third_style
+    assert second_style["-gaphor-style-node"] is second
+    assert third_style["-gaphor-style-node"] is third
+
+
+def test_shared_styles_follow_attribute_changes():
+    css = "node[name=a] { font-size: 12 }"
+
+    compiled_style_sheet = CompiledStyleSheet(css)
+    attributes = {"name": "a"}
+    node = Node("node", attributes=attributes)
+
+    assert compiled_style_sheet.compute_style(node)["font-size"] == 12
+
+    attributes["name"] = "b"
+    compiled_style_sheet.clear_caches()
+
+    assert "font-size" not in compiled_style_sheet.compute_style(node)
+
+    attributes["name"] = "a"
+    compiled_style_sheet.clear_caches()
+
+    assert compiled_style_sheet.compute_style(node)["font-size"] == 12
+
+
+def test_number_of_shared_styles_is_bounded(monkeypatch):
+    monkeypatch.setattr(styling, "MAX_SHARED_STYLES", 3)
+    css = "node[name=a] { font-size: 12 }"
+
+    compiled_style_sheet = CompiledStyleSheet(css)
+    root = Node("root")
+    nodes = [Node("node", parent=root, attributes={"name": name}) for name in "abcde"]
+    for node in nodes:
+        compiled_style_sheet.compute_style(node)
+    compiled_style_sheet.clear_caches()
+
+    assert len(compiled_style_sheet._shared_styles) == 3  # noqa: SLF001
+    assert compiled_style_sheet.compute_style(nodes[0])["font-size"] == 12
+
+
+def test_clear_caches_of_outdated_nodes():
+    css = "node { font-size: 12 }"
+
+    compiled_style_sheet = CompiledStyleSheet(css)
+    root = Node("root")
+    first = Node("node", parent=root)
+    second = Node("node", parent=root)
+    first_style = compiled_style_sheet.compute_style(first)
+    second_style = compiled_style_sheet.compute_style(second)
+
+    compiled_style_sheet.clear_caches([first])
+
+    assert compiled_style_sheet.compute_style(first) is not first_style
+    assert compiled_style_sheet.compute_style(second) is second_style
+
+
+def test_clear_caches_forgets_descendants_of_outdated_nodes():
+    css = "node { font-size: 12 }"
+
+    compiled_style_sheet = CompiledStyleSheet(css)
+    root = Node("root")
+    first = Node("node", parent=root)
+    child = Node("node", parent=first)
+    other = Node("node", parent=Node("node", parent=root))
+    child_style = compiled_style_sheet.compute_style(child)
+    other_style = compiled_style_sheet.compute_style(other)
+
+    compiled_style_sheet.clear_caches([first])
+
+    assert compiled_style_sheet.compute_style(child) is not child_style
+    assert compiled_style_sheet.compute_style(other) is other_style
+
+
+def test_clear_caches_forgets_nodes_matched_by_relational_selectors():
+    css = ":has(.new) child { font-size: 12 }"
+
+    compiled_style_sheet = CompiledStyleSheet(css)
+    root = Node("root")
+    first = Node("node", parent=root)
+    child = Node("child", parent=Node("node", parent=root))
+
+    assert "font-size" not in compiled_style_sheet.compute_style(child)
+
+    first._classes.append("new")  # noqa: SLF001
+    compiled_style_sheet.clear_caches([first])
+
+    assert compiled_style_sheet.compute_style(child)["font-size"] == 12
+
+
+def test_clear_caches_checks_root_nodes():
+    css = ":has(.new) { font-size: 12 }"
+
+    compiled_style_sheet = CompiledStyleSheet(css)
+    root = Node("root")
+    first = Node("node", parent=root)
+    child = Node("child", parent=Node("node", parent=root))
+
+    assert "font-size" not in compiled_style_sheet.compute_style(child)
+
+    first._classes.append("new")  # noqa: SLF001
+    compiled_style_sheet.clear_caches([first])
+
+    assert compiled_style_sheet.compute_style(child)["font-size"] == 12
@@ -117,3 +117,55 @@ async def test_async_event_handler(event_manager):
     await event_manager.gather_tasks()
 
     assert event in events
+
+
+class SubEvent(Event):
+    pass
+
+
+def test_handlers_for_base_classes_are_called(event_manager, subscriber):
+    event = SubEvent()
+
+    event_manager.handle(event)
+
+    assert event in subscriber.events
+
+
+def test_subscribe_after_event_is_handled(event_manager, subscriber):
+    event_manager.handle(SubEvent())
+    handler, events = create_handler(SubEvent)
+
+    event_manager.subscribe(handler)
+    event = SubEvent()
+    event_manager.handle(event)
+
+    assert events == [event]
+    assert event in subscriber.events
+
+
+def test_unsubscribe_after_event_is_handled(event_manager, subscriber):
+    event_manager.handle(Event())
+
+    event_manager.unsubscribe(subscriber)
+    event_manager.handle(Event())
+
+    assert len(subscriber.events) == 1
+
+
+def test_handler_timing(event_manager, subscriber):
+    handler, _events = create_handler(OtherEvent)
+    event_manager.subscribe(handler)
+
+    event_manager.handle(Event())
+    event_manager.enable_timing()
+    event_manager.handle(Event(), Event(), OtherEvent())
+
+    timings = {h: calls for h, _total, calls in event_manager.slowest_handlers()}
+
+    assert timings == {subscriber: 2, handler: 1}
+
+
+def test_slowest_handlers_without_timing(event_manager, subscriber):
+    event_manager.handle(Event())
+
+    assert event_manager.slowest_handlers() == []
@@ -1,6 +1,7 @@
 """Service dedicated to exporting diagrams to a variety of file formats."""
 
 import contextlib
+import io
 import re
 from typing import NamedTuple
 
@@ -76,7 +77,11 @@ def _prepare_render(
 
 def render(
     diagram: Diagram, new_surface, items=None, with_diagram_type=True, padding=8
-) -> None:
+) -> tuple[float, float]:
+    """Render a diagram on a new surface.
+
+    Returns the (tx, ty) translation offset of the diagram on the surface.
+    """
     ctx = _prepare_render(diagram, items, with_diagram_type)
 
     w, h = (
@@ -95,11 +100,14 @@ def render(
             cr.set_source_rgba(*bg_color)
             cr.fill()
 
-        cr.translate(*ctx.get_offsets(padding))
+        offsets = ctx.get_offsets(padding)
+        cr.translate(*offsets)
         ctx.painter.paint(ctx.items, cr)
         cr.show_page()
         surface.flush()
 
+    return offsets
+
 
 def diagram_render_offsets(diagram: Diagram, padding: int = 8) -> tuple[float, float]:
     """Return the (tx, ty) translation offset applied during diagram export.
@@ -133,6 +141,17 @@ def save_svg(filename, diagram):
     render(diagram, lambda w, h: cairo.SVGSurface(filename, w, h))
 
 
+def render_svg(diagram, padding=8) -> tuple[str, tuple[float, float]]:
+    """Render a diagram to an SVG document in memory.
+
+    Returns the document and the (tx, ty) translation offset of the
+    diagram in the document.
+    """
+    out = io.BytesIO()
+    offsets = render(diagram, lambda w, h: cairo.SVGSurface(out, w, h), padding=padding)
+    return out.getvalue().decode("utf-8"), offsets
+
+
 def save_png(filename, diagram):
     @contextlib.contextmanager
     def new_png_surface(w, h):
@@ -3,6 +3,7 @@ import pytest
 from gaphor.diagram.export import (
     diagram_render_offsets,
     escape_filename,
+    render_svg,
     save_eps,
     save_pdf,
     save_png,
@@ -26,6 +27,13 @@ def test_export_to_svg(diagram_with_box, tmp_path):
     assert "<svg" in content
 
 
+def test_render_svg_in_memory(diagram_with_box):
+    content, offsets = render_svg(diagram_with_box)
+
+    assert "<svg" in content
+    assert offsets == diagram_render_offsets(diagram_with_box)
+
+
 def test_export_to_png(diagram_with_box, tmp_path):
     f = tmp_path / "test.png"
 
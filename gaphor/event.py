@@ -65,9 +65,35 @@ class SessionShutdown:
     quitting: bool
 
 
+@dataclass
+class ModelSaving:
+    """The model is about to be saved.
+
+    Changes made after this event are not in the saved file.
+    """
+
+    filename: Path | None = None
+
+
+@dataclass
+class ModelSaveFailed:
+    """The model could not be saved.
+
+    It's still modified, like it was before the save.
+    """
+
+    filename: Path | None = None
+
+
 @dataclass
 class ModelSaved:
+    """The model has been saved.
+
+    ``modified`` is set if the model was changed while it was saved.
+    """
+
     filename: Path | None = None
+    modified: bool = False
 
 
 @dataclass
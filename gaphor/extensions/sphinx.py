@@ -87,9 +87,7 @@ class DiagramDirective(sphinx.util.docutils.SphinxDirective):
         )
 
         if not diagram:
-            diagram = next(
-                model.select(lambda e: isinstance(e, Diagram) and e.name == name), None
-            )
+            diagram = next(model.select_by_attribute(Diagram, "name", name), None)
 
         if not diagram:
             return self.logging_error_node(
@@ -1,4 +1,6 @@
 import logging
+import time
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 from gaphor.core.modeling import Diagram
@@ -16,7 +18,13 @@ def pkg2dir(package):
     return "/".join(name)
 
 
-def export_all(factory, path, save_fn, suffix, name_re=None, underscore=None):
+def diagram_filenames(
+    factory, path, suffix, name_re=None, underscore=None
+) -> Iterator[tuple[Diagram, str]]:
+    """Find the diagrams to export, and the file they're exported to.
+
+    Diagrams are returned in model order.
+    """
     for diagram in factory.select(Diagram):
         odir = f"{path}/{pkg2dir(diagram.owner)}"
         # just diagram name
@@ -33,12 +41,42 @@ def export_all(factory, path, save_fn, suffix, name_re=None, underscore=None):
             log.debug("skipping %s", pname)
             continue
 
-        outfilename = f"{odir}/{dname}.{suffix}"
+        yield diagram, f"{odir}/{dname}.{suffix}"
+
+
+def create_directory(filename: str) -> None:
+    odir = Path(filename).parent
+    if not odir.exists():
+        log.debug("creating dir %s", odir)
+        odir.mkdir(parents=True)
+
 
-        if not Path(odir).exists():
-            log.debug("creating dir %s", odir)
-            Path(odir).mkdir(parents=True)
+def export_diagrams(
+    diagrams: Iterable[tuple[Diagram, str]], save_fn
+) -> list[tuple[str, float]]:
+    """Export diagrams to their file.
 
-        log.info("rendering: %s -> %s...", pname, outfilename)
+    Returns the file names written, with the time it took to render them.
+    """
+    timings = []
+    for diagram, outfilename in diagrams:
+        create_directory(outfilename)
 
+        log.info("rendering: %s -> %s...", diagram.name, outfilename)
+
+        start = time.perf_counter()
         save_fn(outfilename, diagram)
+        timings.append((outfilename, time.perf_counter() - start))
+    return timings
+
+
+def export_all(
+    factory, path, save_fn, suffix, name_re=None, underscore=None
+) -> list[tuple[str, float]]:
+    """Export diagrams.
+
+    Returns the file names written, with the time it took to render them.
+    """
+    return export_diagrams(
+        diagram_filenames(factory, path, suffix, name_re, underscore), save_fn
+    )
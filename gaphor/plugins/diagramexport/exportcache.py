@@ -0,0 +1,162 @@
+"""Skip exporting diagrams that did not change since the last export.
+
+A fingerprint is made of everything that ends up in a diagram. The
+fingerprints of exported diagrams are stored in a manifest file in the
+output directory.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+from gaphor import application
+from gaphor.core.modeling import Diagram, ElementFactory, Id, Presentation
+from gaphor.core.modeling.stylesheet import SYSTEM_STYLE_SHEET
+from gaphor.storage.save import REFERENCE, REFERENCE_LIST, freeze_element
+
+log = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".gaphor-export.json"
+MANIFEST_VERSION = 1
+
+# The number of references followed from presentation items. Items show
+# for example the types of attributes of their subject, and stereotypes
+# applied to the subject.
+FINGERPRINT_DEPTH = 4
+
+
+class DiagramFingerprints:
+    """Compute fingerprints of diagrams in a model.
+
+    The fingerprint contains the diagram, its presentation items, and
+    elements referenced by those, up to ``FINGERPRINT_DEPTH`` references
+    away. Other diagrams, and their presentation items, are left out.
+    The style sheet, the Gaphor version and the export format are added
+    as well.
+    """
+
+    def __init__(self, factory: ElementFactory, suffix: str):
+        self.factory = factory
+        self._elements: dict[Id, tuple[bytes, tuple[Id, ...]]] = {}
+        style_sheet = factory.style_sheet
+        self._base = hashlib.sha256(
+            "\0".join(
+                (
+                    application.distribution().version,
+                    suffix,
+                    SYSTEM_STYLE_SHEET,
+                    style_sheet.styleSheet if style_sheet else "",
+                    (style_sheet and style_sheet.naturalLanguage) or "",
+                )
+            ).encode()
+        )
+
+    def __call__(self, diagram: Diagram) -> str:
+        assert diagram.id
+        fingerprint = self._base.copy()
+        for id in sorted(self._reachable(diagram)):
+            fingerprint.update(self._element(id)[0])
+        return fingerprint.hexdigest()
+
+    def _reachable(self, diagram: Diagram) -> set[Id]:
+        items = {item.id for item in diagram.ownedPresentation}
+        reachable = {diagram.id} | items
+        edge = list(items)
+        for _ in range(FINGERPRINT_DEPTH):
+            next_edge = []
+            for id in edge:
+                for ref in self._element(id)[1]:
+                    if ref not in reachable and self._follow(ref):
+                        reachable.add(ref)
+                        next_edge.append(ref)
+            edge = next_edge
+        return reachable
+
+    def _follow(self, id: Id) -> bool:
+        element = self.factory.lookup(id)
+        return element is not None and not isinstance(element, Diagram | Presentation)
+
+    def _element(self, id: Id) -> tuple[bytes, tuple[Id, ...]]:
+        """The serialized state of an element, and the elements it references."""
+        if (frozen := self._elements.get(id)) is None:
+            element = self.factory[id]
+            frozen_element = freeze_element(element, self.factory)
+            refs: list[Id] = []
+            for kind, _name, value in frozen_element.properties:
+                if kind == REFERENCE:
+                    refs.append(value)  # type: ignore[arg-type]
+                elif kind == REFERENCE_LIST:
+                    refs.extend(value)
+            frozen = self._elements[id] = (
+                repr(frozen_element).encode(),
+                tuple(refs),
+            )
+        return frozen
+
+
+class ExportManifest:
+    """The fingerprints of diagrams exported to a directory."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.filename = self.path / MANIFEST_NAME
+        self.fingerprints: dict[str, str] = {}
+        try:
+            manifest = json.loads(self.filename.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError):
+            log.warning("Can not read export manifest %s", self.filename)
+        else:
+            if manifest.get("version") == MANIFEST_VERSION:
+                self.fingerprints = manifest.get("diagrams", {})
+
+    def _key(self, filename: str | Path) -> str:
+        return Path(os.path.relpath(filename, self.path)).as_posix()
+
+    def is_unchanged(self, filename: str | Path, fingerprint: str) -> bool:
+        return (
+            self.fingerprints.get(self._key(filename)) == fingerprint
+            and Path(filename).exists()
+        )
+
+    def update(self, filename: str | Path, fingerprint: str) -> None:
+        self.fingerprints[self._key(filename)] = fingerprint
+
+    def save(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self.filename.with_name(f"{MANIFEST_NAME}.tmp")
+        tmp.write_text(
+            json.dumps(
+                {"version": MANIFEST_VERSION, "diagrams": self.fingerprints},
+                indent=1,
+                sort_keys=True,
+            ),
+            encoding="utf-8",
+        )
+        tmp.replace(self.filename)
+
+
+def changed_diagrams(
+    diagrams: Iterable[tuple[Diagram, str]],
+    manifest: ExportManifest,
+    fingerprints: DiagramFingerprints,
+) -> tuple[list[tuple[Diagram, str]], dict[str, str]]:
+    """Filter diagrams that changed since they were last exported.
+
+    Returns the changed diagrams, and the fingerprints of those, to be
+    added to the manifest once they're exported.
+    """
+    changed = []
+    new_fingerprints = {}
+    for diagram, filename in diagrams:
+        fingerprint = fingerprints(diagram)
+        if manifest.is_unchanged(filename, fingerprint):
+            log.debug("skipping unchanged diagram %s", filename)
+        else:
+            changed.append((diagram, filename))
+            new_fingerprints[filename] = fingerprint
+    return changed, new_fingerprints
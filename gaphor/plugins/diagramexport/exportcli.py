@@ -1,14 +1,40 @@
 import argparse
 import logging
+import os
 import re
+import time
+from collections.abc import Iterable
+from concurrent.futures import Executor
+from contextlib import ExitStack
 
 import gaphor.storage as storage
-from gaphor.application import Session
+from gaphor.core.modeling import Diagram
 from gaphor.diagram.export import save_eps, save_pdf, save_png, save_svg
-from gaphor.plugins.diagramexport.exportall import export_all
+from gaphor.plugins.diagramexport.exportall import (
+    create_directory,
+    diagram_filenames,
+    export_diagrams,
+)
+from gaphor.plugins.diagramexport.exportcache import (
+    DiagramFingerprints,
+    ExportManifest,
+    changed_diagrams,
+)
+from gaphor.plugins.diagramexport.workers import (
+    create_session,
+    worker_diagram,
+    worker_pool,
+)
 
 log = logging.getLogger(__name__)
 
+SAVE_FUNCTIONS = {
+    "pdf": save_pdf,
+    "svg": save_svg,
+    "png": save_png,
+    "eps": save_eps,
+}
+
 
 def export_parser():
     parser = argparse.ArgumentParser(description="Export diagrams from a Gaphor model.")
@@ -39,6 +65,28 @@ def export_parser():
         help="process diagrams which name matches given regular expression;"
         " name includes package name; regular expressions are case insensitive",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        metavar="jobs",
+        type=int,
+        default=1,
+        help="number of processes used to export diagrams, 0 uses all processors;"
+        " default 1",
+    )
+    parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="skip diagrams that did not change since they were last exported"
+        " to the output directory",
+    )
+    parser.add_argument(
+        "-t",
+        "--timings",
+        action="store_true",
+        help="print how long exporting each diagram took",
+    )
     parser.add_argument("model", nargs="+")
     parser.set_defaults(command=export_command)
 
@@ -46,36 +94,97 @@ def export_parser():
 
 
 def export_command(args):
-    session = Session(
-        services=[
-            "event_manager",
-            "component_registry",
-            "element_factory",
-            "element_dispatcher",
-            "modeling_language",
-        ]
-    )
+    session = create_session()
     factory = session.get_service("element_factory")
     modeling_language = session.get_service("modeling_language")
 
+    save_fn = SAVE_FUNCTIONS.get(args.format)
+    if not save_fn:
+        raise RuntimeError(f"Unknown file format: {args.format}")
+
+    jobs = args.jobs or os.cpu_count() or 1
     name_re = re.compile(args.regex, re.IGNORECASE) if args.regex else None
-    # we should have some gaphor files to be processed at this point
-    for model in args.model:
-        log.debug("loading model %s", model)
-        with open(model, encoding="utf-8") as file_obj:
-            storage.load(file_obj, factory, modeling_language)
-        log.debug("ready for rendering")
-
-        out_fn = None
-        if args.format == "pdf":
-            out_fn = save_pdf
-        elif args.format == "svg":
-            out_fn = save_svg
-        elif args.format == "png":
-            out_fn = save_png
-        elif args.format == "eps":
-            out_fn = save_eps
-        else:
-            raise RuntimeError(f"Unknown file format: {args.format}")
-
-        export_all(factory, args.dir, out_fn, args.format, name_re, args.underscores)
+    manifest = ExportManifest(args.dir) if args.incremental else None
+    timings: list[tuple[str, float]] = []
+    skipped = 0
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        # One pool for all models: worker processes are started on demand
+        executor = (
+            stack.enter_context(worker_pool((), jobs, jobs)) if jobs > 1 else None
+        )
+        # we should have some gaphor files to be processed at this point
+        for model in args.model:
+            log.debug("loading model %s", model)
+            with open(model, encoding="utf-8") as file_obj:
+                storage.load(file_obj, factory, modeling_language)
+            log.debug("ready for rendering")
+
+            diagrams = list(
+                diagram_filenames(
+                    factory, args.dir, args.format, name_re, args.underscores
+                )
+            )
+            fingerprints: dict[str, str] = {}
+            if manifest:
+                all_diagrams = len(diagrams)
+                diagrams, fingerprints = changed_diagrams(
+                    diagrams, manifest, DiagramFingerprints(factory, args.format)
+                )
+                skipped += all_diagrams - len(diagrams)
+
+            if executor:
+                timings.extend(export_parallel(diagrams, model, args.format, executor))
+            else:
+                timings.extend(export_diagrams(diagrams, save_fn))
+
+            if manifest:
+                for filename, fingerprint in fingerprints.items():
+                    manifest.update(filename, fingerprint)
+                manifest.save()
+
+    if args.timings:
+        report_timings(timings, time.perf_counter() - start, skipped)
+
+
+def export_parallel(
+    diagrams: Iterable[tuple[Diagram, str]], model: str, suffix, executor: Executor
+) -> list[tuple[str, float]]:
+    """Export diagrams of ``model`` from the workers of ``executor``.
+
+    Each worker loads the model once, diagrams are exported by id. If
+    diagrams are exported to the same file, only the last one is exported,
+    just like it ends up when exporting sequentially.
+    """
+    diagram_ids = {filename: diagram.id for diagram, filename in diagrams}
+    if not diagram_ids:
+        return []
+
+    for filename in diagram_ids:
+        create_directory(filename)
+
+    durations = executor.map(
+        _export_diagram,
+        [suffix] * len(diagram_ids),
+        [model] * len(diagram_ids),
+        diagram_ids.values(),
+        diagram_ids.keys(),
+    )
+    return list(zip(diagram_ids, durations, strict=True))
+
+
+def _export_diagram(suffix, model, diagram_id, filename) -> float:
+    start = time.perf_counter()
+    diagram = worker_diagram(diagram_id, model)
+    log.info("rendering: %s -> %s...", diagram.name, filename)
+    SAVE_FUNCTIONS[suffix](filename, diagram)
+    return time.perf_counter() - start
+
+
+def report_timings(
+    timings: list[tuple[str, float]], elapsed: float, skipped: int = 0
+) -> None:
+    for filename, duration in timings:
+        print(f"{duration:>8.3f}s  {filename}")  # noqa: T201
+    unchanged = f", {skipped} unchanged" if skipped else ""
+    print(f"Exported {len(timings)} diagrams in {elapsed:.3f}s{unchanged}")  # noqa: T201
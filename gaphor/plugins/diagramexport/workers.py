@@ -0,0 +1,78 @@
+"""Worker processes for exporting diagrams.
+
+Every worker loads the models once. Work is sent to workers by element
+id, so nothing but ids and results go between processes. A pool can be
+reused for another model: workers load it with the first task for it.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import gaphor.storage as storage
+from gaphor.application import Session
+from gaphor.core.modeling import Diagram, ElementFactory, Id
+
+
+def create_session() -> Session:
+    return Session(
+        services=[
+            "event_manager",
+            "component_registry",
+            "element_factory",
+            "element_dispatcher",
+            "modeling_language",
+        ]
+    )
+
+
+def worker_pool(models, jobs: int | None, tasks: int) -> ProcessPoolExecutor:
+    """A pool of worker processes that have ``models`` loaded.
+
+    No more workers are started than there are ``tasks``.
+    """
+    # Do not fork: GTK and GLib do not survive that
+    return ProcessPoolExecutor(
+        max_workers=max(1, min(jobs or os.cpu_count() or 1, tasks)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(models,),
+    )
+
+
+_worker_session: Session | None = None
+_worker_factory: ElementFactory | None = None
+_worker_models: tuple[str, ...] = ()
+
+
+def _init_worker(models) -> None:
+    _load_models(tuple(models))
+
+
+def _load_models(models: tuple[str, ...]) -> None:
+    global _worker_session, _worker_factory, _worker_models
+    if models == _worker_models:
+        return
+    if not _worker_session:
+        _worker_session = create_session()
+    factory = _worker_session.get_service("element_factory")
+    modeling_language = _worker_session.get_service("modeling_language")
+    for model in models:
+        with open(model, encoding="utf-8") as file_obj:
+            storage.load(file_obj, factory, modeling_language)
+    _worker_factory = factory
+    _worker_models = models
+
+
+def worker_diagram(diagram_id: Id, model: str | None = None) -> Diagram:
+    """Look up a diagram in the models loaded by this worker.
+
+    If a ``model`` is given, it is loaded first, unless the worker has
+    loaded it already.
+    """
+    if model is not None:
+        _load_models((model,))
+    assert _worker_factory, "Not running in a worker process"
+    diagram = _worker_factory.lookup(diagram_id)
+    assert isinstance(diagram, Diagram)
+    return diagram
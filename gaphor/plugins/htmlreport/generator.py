@@ -10,10 +10,11 @@ from pathlib import Path
 
 from gaphor.core.format import format
 from gaphor.core.modeling import Base, Diagram, Presentation
-from gaphor.diagram.export import escape_filename, save_svg
+from gaphor.diagram.export import escape_filename, render_svg
 from gaphor.diagram.group import Root, owner, owns
 from gaphor.diagram.iconname import icon_name
-from gaphor.plugins.htmlreport.svg_overlay import inject_overlays
+from gaphor.plugins.diagramexport.workers import worker_diagram, worker_pool
+from gaphor.plugins.htmlreport.svg_overlay import overlay_svg
 from gaphor.UML import uml as UML
 from gaphor.UML.recipes import get_applied_stereotypes
 from gaphor.UML.umlfmt import format_association_end
@@ -21,8 +22,22 @@ from gaphor.UML.umlfmt import format_association_end
 log = logging.getLogger(__name__)
 
 
-def generate_report(factory, output_dir: str | Path) -> None:
-    """Generate an HTML model report to the given directory."""
+def generate_report(
+    factory,
+    output_dir: str | Path,
+    model: str | None = None,
+    jobs: int | None = 1,
+    split_diagrams: bool = False,
+) -> None:
+    """Generate an HTML model report to the given directory.
+
+    If the ``model`` file loaded in ``factory`` is provided, diagrams are
+    rendered by ``jobs`` worker processes (``None`` uses all processors).
+
+    With ``split_diagrams``, diagrams are not embedded in ``index.html``.
+    They're written to separate scripts instead, that are loaded once a
+    diagram is shown.
+    """
     template_dir = Path(__file__).parent
     HTML_TEMPLATE = (template_dir / "report.html").read_text(encoding="utf-8")
     CSS_TEMPLATE = (template_dir / "report.css").read_text(encoding="utf-8")
@@ -33,18 +48,29 @@ def generate_report(factory, output_dir: str | Path) -> None:
 
     diagrams_dir.mkdir(parents=True, exist_ok=True)
 
-    # Export each diagram as SVG and inject overlays
-    svg_contents = {}
-    for diagram in factory.select(Diagram):
+    # Render each diagram as SVG with overlays
+    diagrams = list(factory.select(Diagram))
+    if model and jobs != 1 and len(diagrams) > 1:
+        svg_contents = _render_diagrams_parallel(diagrams, model, jobs)
+    else:
+        svg_contents = {d.id: render_diagram_svg(d) for d in diagrams}
+
+    svg_chunks = {}
+    for diagram in diagrams:
         filename = _diagram_filename(diagram)
-        svg_path = diagrams_dir / filename
-        log.info("Exporting diagram: %s -> %s", diagram.name, svg_path)
-        save_svg(str(svg_path), diagram)
-        inject_overlays(str(svg_path), diagram)
-        svg_contents[diagram.id] = svg_path.read_text(encoding="utf-8")
+        (diagrams_dir / filename).write_text(svg_contents[diagram.id], encoding="utf-8")
+        if split_diagrams:
+            svg_chunks[diagram.id] = f"diagrams/{filename}.js"
+            (diagrams_dir / f"{filename}.js").write_text(
+                _diagram_chunk(diagram.id, svg_contents[diagram.id]),
+                encoding="utf-8",
+            )
 
     # Build model data
-    model_data = build_model_data(factory, svg_contents)
+    if split_diagrams:
+        model_data = build_model_data(factory, svg_chunks=svg_chunks)
+    else:
+        model_data = build_model_data(factory, svg_contents)
 
     # Write index.html
     html = HTML_TEMPLATE.format(
@@ -57,16 +83,57 @@ def generate_report(factory, output_dir: str | Path) -> None:
     log.info("Report generated at %s", output_dir)
 
 
+def render_diagram_svg(diagram: Diagram) -> str:
+    """Render a diagram as SVG, with clickable overlays."""
+    log.info("Rendering diagram: %s", diagram.name)
+    svg, offsets = render_svg(diagram)
+    return overlay_svg(svg, diagram, offsets)
+
+
+def _render_diagrams_parallel(diagrams, model: str, jobs) -> dict[str, str]:
+    diagram_ids = [d.id for d in diagrams]
+    with worker_pool((model,), jobs, len(diagram_ids)) as executor:
+        return dict(
+            zip(
+                diagram_ids,
+                executor.map(_render_diagram, diagram_ids),
+                strict=True,
+            )
+        )
+
+
+def _render_diagram(diagram_id) -> str:
+    return render_diagram_svg(worker_diagram(diagram_id))
+
+
+def _diagram_chunk(diagram_id: str, svg_content: str) -> str:
+    """A script that hands a diagram to the report.
+
+    Scripts, unlike JSON files, can be loaded from ``file:`` URLs.
+    """
+    data = json.dumps({"svg_content": svg_content}, ensure_ascii=False)
+    return f"gaphorReportChunk({json.dumps(diagram_id)}, {data});\n"
+
+
 def _diagram_filename(diagram: Diagram) -> str:
     name = escape_filename(diagram.name) or "diagram"
     return f"{name}_{diagram.id}.svg"
 
 
-def build_model_data(factory, svg_contents: dict[str, str] | None = None) -> dict:
-    """Extract all model info as a JSON-serializable dict."""
+def build_model_data(
+    factory,
+    svg_contents: dict[str, str] | None = None,
+    svg_chunks: dict[str, str] | None = None,
+) -> dict:
+    """Extract all model info as a JSON-serializable dict.
+
+    Diagrams are either embedded as ``svg_contents``, or refer to scripts
+    that provide them, as ``svg_chunks``.
+    """
     elements = {}
     diagrams = {}
     svg_contents = svg_contents or {}
+    svg_chunks = svg_chunks or {}
 
     for diagram in factory.select(Diagram):
         diagram_subjects = list(
@@ -78,6 +145,7 @@ def build_model_data(factory, svg_contents: dict[str, str] | None = None) -> dic
             "name": diagram.name or "",
             "type": diagram.diagramType or "",
             "svg_content": svg_contents.get(diagram.id, ""),
+            "svg_chunk": svg_chunks.get(diagram.id, ""),
             "owner_id": _owner_id(diagram),
             "elements": diagram_subjects,
         }
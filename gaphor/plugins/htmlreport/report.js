@@ -141,6 +141,29 @@
     }
   }
 
+  /*
+   * Diagrams of large models can be split off in separate scripts, so
+   * the report opens fast. A script is loaded when its diagram is shown
+   * and hands the diagram over via gaphorReportChunk(). Scripts are used
+   * instead of fetch(), since those also load from file: URLs.
+   */
+  var chunkScripts = {};
+
+  window.gaphorReportChunk = function(id, chunk) {
+    var d = data.diagrams[id];
+    if (!d) return;
+    d.svg_content = chunk.svg_content;
+    if (location.hash === "#diagram/" + id) route();
+  };
+
+  function loadChunk(id) {
+    if (chunkScripts[id]) return;
+    var script = document.createElement("script");
+    script.src = data.diagrams[id].svg_chunk;
+    chunkScripts[id] = script;
+    document.head.appendChild(script);
+  }
+
   var currentPanZoom = null;
 
   /*
@@ -169,6 +192,10 @@
     content.appendChild(controls);
 
     var svgText = d.svg_content || "";
+    if (!svgText && d.svg_chunk) {
+      loadChunk(id);
+      return;
+    }
     if (!svgText) return;
 
     var parser = new DOMParser();
@@ -22,6 +22,22 @@ def html_report_parser():
         help="output directory for the report",
         default="report",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        metavar="jobs",
+        type=int,
+        default=1,
+        help="number of processes used to render diagrams, 0 uses all processors;"
+        " default 1",
+    )
+    parser.add_argument(
+        "--split-diagrams",
+        dest="split_diagrams",
+        action="store_true",
+        help="write diagrams to separate files, loaded when shown;"
+        " the report opens faster for large models",
+    )
     parser.add_argument("model", nargs="+")
     parser.set_defaults(command=html_report_command)
 
@@ -47,5 +63,12 @@ def html_report_command(args):
             storage.load(file_obj, factory, modeling_language)
 
     log.info("Generating HTML report to %s", args.dir)
-    generate_report(factory, args.dir)
+    generate_report(
+        factory,
+        args.dir,
+        # Loading a model replaces the previous one
+        model=args.model[-1],
+        jobs=args.jobs or None,
+        split_diagrams=args.split_diagrams,
+    )
     log.info("Done.")
@@ -61,10 +61,25 @@ def inject_overlays(svg_path: str, diagram: Diagram, padding: int = 8) -> None:
     ET.register_namespace("", SVG_NS)
 
     tree = ET.parse(svg_path)
-    root = tree.getroot()
+    add_overlays(tree.getroot(), diagram, *diagram_render_offsets(diagram, padding))
+    tree.write(svg_path, xml_declaration=True, encoding="unicode")
+
+
+def overlay_svg(svg: str, diagram: Diagram, offsets: tuple[float, float]) -> str:
+    """Inject clickable overlay elements in an SVG document in memory.
 
-    tx, ty = diagram_render_offsets(diagram, padding)
+    ``offsets`` is the translation offset of the diagram in the document,
+    as returned by :func:`~gaphor.diagram.export.render_svg`.
+    """
+    ET.register_namespace("", SVG_NS)
 
+    root = ET.fromstring(svg)
+    add_overlays(root, diagram, *offsets)
+    return ET.tostring(root, encoding="unicode", xml_declaration=True)
+
+
+def add_overlays(root: ET.Element, diagram: Diagram, tx: float, ty: float) -> None:
+    """Add an overlay to ``root`` for each item with a subject."""
     items = list(diagram.get_all_items())
 
     for item in items:
@@ -98,5 +113,3 @@ def inject_overlays(svg_path: str, diagram: Diagram, padding: int = 8) -> None:
             rect.set("height", str(bounds.height))
             rect.set("fill", "transparent")
             rect.set("style", "cursor: pointer;")
-
-    tree.write(svg_path, xml_declaration=True, encoding="unicode")
@@ -188,3 +188,23 @@ def test_icon_fa_classes_values_are_valid():
         assert parts[1].startswith("fa-"), (
             f"{icon_name}: icon name should start with fa-"
         )
+
+
+def test_split_diagrams_are_loaded_from_chunks(model_with_diagram, tmp_path):
+    diagram, factory = model_with_diagram
+    output_dir = tmp_path / "report"
+    generate_report(factory, output_dir, split_diagrams=True)
+
+    html = (output_dir / "index.html").read_text(encoding="utf-8")
+    chunks = list((output_dir / "diagrams").glob("*.js"))
+
+    assert "<svg" not in html
+    assert len(chunks) == 1
+    assert (
+        chunks[0]
+        .read_text(encoding="utf-8")
+        .startswith(f'gaphorReportChunk("{diagram.id}", ')
+    )
+    assert f"#element/{diagram.ownedPresentation[0].subject.id}" in (
+        chunks[0].read_text(encoding="utf-8")
+    )
@@ -5,10 +5,14 @@ import xml.etree.ElementTree as ET
 import pytest
 
 from gaphor import UML
-from gaphor.diagram.export import save_svg
+from gaphor.diagram.export import render_svg, save_svg
 from gaphor.diagram.general.simpleitem import Box
 from gaphor.diagram.tests.fixtures import connect
-from gaphor.plugins.htmlreport.svg_overlay import inject_overlays, item_svg_bounds
+from gaphor.plugins.htmlreport.svg_overlay import (
+    inject_overlays,
+    item_svg_bounds,
+    overlay_svg,
+)
 from gaphor.UML.classes import ClassItem
 from gaphor.UML.classes.association import AssociationItem
 
@@ -86,3 +90,16 @@ def test_inject_overlays_with_line(diagram, element_factory, create, tmp_path):
 
     polylines = root.findall(".//svg:a/svg:polyline", ns)
     assert len(polylines) >= 1
+
+
+def test_overlay_svg_in_memory(diagram_with_classes):
+    diagram, c1, c2 = diagram_with_classes
+    svg, offsets = render_svg(diagram)
+
+    content = overlay_svg(svg, diagram, offsets)
+
+    root = ET.fromstring(content)
+    ns = {"svg": "http://www.w3.org/2000/svg"}
+    assert f"#element/{c1.subject.id}" in content
+    assert f"#element/{c2.subject.id}" in content
+    assert len(root.findall(".//svg:a/svg:rect", ns)) >= 2
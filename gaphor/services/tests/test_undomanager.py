@@ -6,7 +6,11 @@ from gaphor.core import event_handler
 from gaphor.core.modeling import Base, swap_element_type
 from gaphor.core.modeling.event import AssociationUpdated
 from gaphor.core.modeling.properties import association, attribute, derivedunion
-from gaphor.services.undomanager import NotInTransactionException
+from gaphor.services.undomanager import (
+    SNAPSHOT,
+    NotInTransactionException,
+    UndoManager,
+)
 from gaphor.tests.raises import raises_exception_group
 from gaphor.transaction import Transaction
 
@@ -527,3 +531,166 @@ def test_editing_with_closed_transaction(event_manager, element_factory, undo_ma
     undo_manager.undo_transaction()
 
     assert a.attr == "some text"
+
+
+def test_attribute_changes_are_coalesced(event_manager, element_factory, undo_manager):
+    class A(Base):
+        attr = attribute("attr", bytes, default="default")
+
+    with Transaction(event_manager):
+        a = element_factory.create(A)
+
+    with Transaction(event_manager):
+        for n in range(10):
+            a.attr = f"value {n}"
+
+    assert undo_manager._undo_stack[-1].size() == 1
+
+    undo_manager.undo_transaction()
+
+    assert a.attr == "default"
+
+    undo_manager.redo_transaction()
+
+    assert a.attr == "value 9"
+
+
+def test_coalescing_keeps_order_of_other_changes(
+    event_manager, element_factory, undo_manager
+):
+    class A(Base):
+        attr = attribute("attr", bytes, default="default")
+
+    with Transaction(event_manager):
+        a = element_factory.create(A)
+
+    with Transaction(event_manager):
+        a.attr = "one"
+        swap_element_type(a, Base)
+        A.attr.set(a, "two")
+        A.attr.set(a, "three")
+
+    assert undo_manager._undo_stack[-1].size() == 3
+
+    undo_manager.undo_transaction()
+
+    assert type(a) is A
+    assert a.attr == "default"
+
+
+def test_undo_stack_action_budget(event_manager, element_factory):
+    undo_manager = UndoManager(event_manager, element_factory, action_budget=3)
+
+    for _ in range(3):
+        with Transaction(event_manager):
+            element_factory.create(Base)
+            element_factory.create(Base)
+
+    assert len(undo_manager._undo_stack) == 1
+
+    with Transaction(event_manager):
+        for _ in range(5):
+            element_factory.create(Base)
+
+    assert len(undo_manager._undo_stack) == 1
+    assert undo_manager._undo_stack[0].size() == 5
+
+    undo_manager.shutdown()
+
+
+class Owner(Base):
+    name = attribute("name", str)
+
+
+class Owned(Base):
+    name = attribute("name", str)
+
+
+Owner.owned = association("owned", Owned, composite=True, opposite="owner")
+Owned.owner = association("owner", Owner, upper=1, opposite="owned")
+Owned.other = association("other", Owned, upper=1)
+
+
+@pytest.fixture
+def snapshot_undo_manager(event_manager, element_factory):
+    undo_manager = UndoManager(event_manager, element_factory, snapshot_threshold=10)
+    yield undo_manager
+    undo_manager.shutdown()
+
+
+def test_large_transaction_is_stored_as_snapshot(
+    event_manager, element_factory, snapshot_undo_manager
+):
+    with Transaction(event_manager):
+        owner = element_factory.create(Owner)
+        for n in range(20):
+            owned = element_factory.create(Owned)
+            owned.name = f"owned {n}"
+            owner.owned = owned
+
+    (action,) = snapshot_undo_manager._undo_stack[-1]._actions
+
+    assert action[0] == SNAPSHOT
+
+
+def test_undo_delete_from_snapshot(
+    event_manager, element_factory, snapshot_undo_manager
+):
+    with Transaction(event_manager):
+        owner = element_factory.create(Owner)
+        owner.name = "owner"
+        for n in range(20):
+            owned = element_factory.create(Owned)
+            owned.name = f"owned {n}"
+            if n:
+                owned.other = owner.owned[0]
+            owner.owned = owned
+
+    ids = [e.id for e in owner.owned]
+
+    with Transaction(event_manager):
+        owner.unlink()
+
+    assert element_factory.size() == 0
+
+    snapshot_undo_manager.undo_transaction()
+
+    owner = element_factory.lookup(owner.id)
+    assert owner.name == "owner"
+    assert [e.id for e in owner.owned] == ids
+    assert [e.name for e in owner.owned] == [f"owned {n}" for n in range(20)]
+    assert all(e.owner is owner for e in owner.owned)
+    assert all(e.other is owner.owned[0] for e in owner.owned[1:])
+
+    snapshot_undo_manager.redo_transaction()
+
+    assert element_factory.size() == 0
+
+    snapshot_undo_manager.undo_transaction()
+
+    assert [e.id for e in element_factory.lookup(owner.id).owned] == ids
+
+
+def test_undo_create_from_snapshot(
+    event_manager, element_factory, snapshot_undo_manager
+):
+    with Transaction(event_manager):
+        owner = element_factory.create(Owner)
+
+    with Transaction(event_manager):
+        owner.name = "new name"
+        for _ in range(20):
+            owner.owned = element_factory.create(Owned)
+
+    ids = [e.id for e in owner.owned]
+
+    snapshot_undo_manager.undo_transaction()
+
+    assert element_factory.size() == 1
+    assert owner.name is None
+    assert not owner.owned
+
+    snapshot_undo_manager.redo_transaction()
+
+    assert owner.name == "new name"
+    assert [e.id for e in owner.owned] == ids
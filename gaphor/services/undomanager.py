@@ -2,23 +2,27 @@
 
 Undoing and redoing actions is managed through the UndoManager.
 
-An undo action should be a callable object (called with no arguments).
+Changes to the model are recorded in a compact undo log: tuples of
+``(opcode, element id, property, old value)``. An undo action can also be
+a callable object (called with no arguments).
 
-An undo action should return a callable object that acts as redo function.
-If None is returned the undo action is considered to be the redo action as well.
+Undoing a transaction records the changes made, which makes up the redo
+transaction.
 
-NOTE: it would be nice to use actions in conjunction with functools.partial.
+Large transactions, such as deleting a package with all its content, are
+folded into a snapshot of the affected elements once committed. A
+snapshot is restored in one bulk update.
 """
 
 from __future__ import annotations
 
 import logging
-from collections.abc import Callable
+from collections.abc import Callable, Hashable
 from dataclasses import dataclass
 
 from gaphor.abc import ActionProvider, Service
 from gaphor.core import event_handler
-from gaphor.core.modeling.base import Base, RepositoryProtocol, swap_element_type
+from gaphor.core.modeling.base import Base, Id, RepositoryProtocol, swap_element_type
 from gaphor.core.modeling.event import (
     AssociationAdded,
     AssociationDeleted,
@@ -31,9 +35,11 @@ from gaphor.core.modeling.event import (
     ModelReady,
     RevertibleEvent,
 )
-from gaphor.core.modeling.presentation import Presentation
+from gaphor.core.modeling.presentation import MatrixUpdated, Presentation
 from gaphor.core.modeling.properties import association as association_property
+from gaphor.core.modeling.properties import attribute, enumeration
 from gaphor.diagram.copypaste import deserialize, serialize
+from gaphor.diagram.presentation import HandlePositionEvent
 from gaphor.event import (
     ActionEnabled,
     TransactionBegin,
@@ -45,6 +51,126 @@ from gaphor.transaction import Transaction
 
 logger = logging.getLogger(__name__)
 
+# Opcodes of the undo log
+ACTION = 0
+CREATE = 1
+DELETE = 2
+DELETE_PRESENTATION = 3
+ATTRIBUTE = 4
+ASSOCIATION_SET = 5
+ASSOCIATION_ADD = 6
+ASSOCIATION_DELETE = 7
+ELEMENT_TYPE = 8
+REVERT = 9
+MATRIX = 10
+HANDLE_POSITION = 11
+SNAPSHOT = 12
+
+# Changes of which only the oldest value needs to be kept
+COALESCING_OPCODES = frozenset((ATTRIBUTE, MATRIX, HANDLE_POSITION))
+
+# Changes that can be folded into a snapshot
+SNAPSHOT_OPCODES = frozenset(
+    (
+        CREATE,
+        DELETE,
+        DELETE_PRESENTATION,
+        ATTRIBUTE,
+        ASSOCIATION_SET,
+        ASSOCIATION_ADD,
+        ASSOCIATION_DELETE,
+        ELEMENT_TYPE,
+    )
+)
+
+# (opcode, element id, property, value)
+UndoEntry = tuple
+
+# (type, diagram id, presentation data)
+ElementState = tuple[type[Base], Id | None, dict | None]
+
+Property = attribute | enumeration | association_property
+
+
+@dataclass
+class Snapshot:
+    """The state of elements and their properties, in serialized form.
+
+    Elements that do not exist are stored as ``None``. References to other
+    elements are stored by id.
+    """
+
+    elements: dict[Id, ElementState | None]
+    values: dict[tuple[Id, Property], object]
+
+    def size(self) -> int:
+        return len(self.elements) + len(self.values)
+
+
+def presentation_data(element: Presentation) -> dict:
+    data = {}
+
+    def save_func(name, value):
+        data[name] = serialize(value)
+
+    element.save(save_func)
+    return data
+
+
+def fold_actions(
+    actions: list[UndoEntry], lookup: Callable[[Id], Base | None]
+) -> tuple[list[UndoEntry], Snapshot] | None:
+    """Fold model changes into a snapshot of the state before the changes.
+
+    Changes to presentation items (position, connections) are returned
+    as is, unless the item did not exist before. Returns ``None`` if
+    the actions can not be folded.
+    """
+    elements: dict[Id, ElementState | None] = {}
+    values: dict[tuple[Id, Property], object] = {}
+    lists: dict[tuple[Id, Property], list[Id]] = {}
+
+    def current_list(element_id, association):
+        key = (element_id, association)
+        if (ids := lists.get(key)) is None:
+            element = lookup(element_id)
+            current = element and association.peek(element)
+            ids = lists[key] = [e.id for e in current] if current else []
+        return ids
+
+    for opcode, element_id, prop, value in reversed(actions):
+        if opcode == CREATE:
+            elements[element_id] = None
+        elif opcode == DELETE:
+            elements[element_id] = (prop, None, None)
+        elif opcode == DELETE_PRESENTATION:
+            elements[element_id] = (prop, *value)
+        elif opcode == ELEMENT_TYPE:
+            if state := elements.get(element_id):
+                elements[element_id] = (value, *state[1:])
+            else:
+                elements[element_id] = (value, None, None)
+        elif opcode in (ATTRIBUTE, ASSOCIATION_SET):
+            values[(element_id, prop)] = value
+        elif opcode == ASSOCIATION_ADD:
+            ids = current_list(element_id, prop)
+            if value in ids:
+                ids.remove(value)
+        elif opcode == ASSOCIATION_DELETE:
+            value_id, index = value
+            current_list(element_id, prop).insert(index, value_id)
+        elif opcode == ACTION:
+            return None
+
+    values.update((key, tuple(ids)) for key, ids in lists.items())
+    residual = [
+        entry
+        for entry in actions
+        if entry[0] not in SNAPSHOT_OPCODES
+        and (entry[1] not in elements or elements[entry[1]] is not None)
+    ]
+    return residual, Snapshot(elements, values)
+
 
 class ActionStack:
     """A transaction.
@@ -54,23 +180,68 @@ class ActionStack:
     played back when a transaction is executed. This executing a
     transaction has the effect of performing the actions recorded, which
     will typically undo actions performed by the user.
+
+    If a property of an element changes multiple times, only the oldest
+    value is recorded, as long as nothing else happened to the element
+    in the mean time.
     """
 
     def __init__(self):
-        self._actions: list[Callable[[], None]] = []
-
-    def add(self, action):
-        self._actions.append(action)
+        self._actions: list[UndoEntry] = []
+        self._coalesced: dict[str | None, set[tuple[int, Hashable]]] = {}
+        self._size = 0
+
+    def size(self) -> int:
+        """The number of changes recorded."""
+        return self._size
+
+    def add(self, action: Callable[[], None]) -> None:
+        self._coalesced.clear()
+        self._actions.append((ACTION, None, None, action))
+        self._size += 1
+
+    def record(self, entry: UndoEntry) -> bool:
+        """Record an entry in the undo log.
+
+        Returns ``False`` if the entry was coalesced with an entry
+        recorded earlier.
+        """
+        opcode, element_id, prop, value = entry
+        if opcode in COALESCING_OPCODES:
+            keys = self._coalesced.setdefault(element_id, set())
+            key = (opcode, prop)
+            if key in keys:
+                return False
+            keys.add(key)
+        else:
+            self._coalesced.pop(element_id, None)
+        self._actions.append(entry)
+        self._size += value.size() if opcode == SNAPSHOT else 1
+        return True
+
+    def take_snapshot(self, lookup: Callable[[Id], Base | None]) -> bool:
+        """Replace the recorded model changes by a snapshot.
+
+        The snapshot is restored before the remaining actions are
+        executed.
+        """
+        if not (folded := fold_actions(self._actions, lookup)):
+            return False
+        residual, snapshot = folded
+        self._actions = [*residual, (SNAPSHOT, None, None, snapshot)]
+        self._coalesced.clear()
+        self._size = len(residual) + snapshot.size()
+        return True
 
     def can_execute(self):
         return bool(self._actions)
 
-    def execute(self):
+    def execute(self, perform: Callable[[UndoEntry], None]) -> None:
+        self._coalesced.clear()
         self._actions.reverse()
 
-        for act in self._actions:
-            logger.debug(act.__doc__)
-            act()
+        for entry in self._actions:
+            perform(entry)
 
 
 class EditingStack(ActionStack):
@@ -134,13 +305,45 @@ class UndoManager(Service, ActionProvider):
     being delayed because of exceptions that occur in some other event handler.
     """
 
-    def __init__(self, event_manager, element_factory):
+    def __init__(
+        self,
+        event_manager,
+        element_factory,
+        stack_depth=20,
+        action_budget=100_000,
+        snapshot_threshold=1_000,
+    ):
+        """The undo stack holds at most ``stack_depth`` transactions, with
+        no more than ``action_budget`` recorded changes. Oldest transactions
+        are dropped first. The last transaction is always kept.
+
+        Transactions with more than ``snapshot_threshold`` changes are
+        stored as a snapshot.
+        """
         self.event_manager = event_manager
         self.element_factory: RepositoryProtocol = element_factory
         self._undo_stack: list[ActionStack] = []
         self._redo_stack: list[ActionStack] = []
-        self._stack_depth = 20
-        self._current_transaction = None
+        self._stack_depth = stack_depth
+        self._action_budget = action_budget
+        self._snapshot_threshold = snapshot_threshold
+        self._restoring_snapshot = False
+        self._current_transaction: ActionStack | None = None
+        self._performers: dict[int, Callable[[UndoEntry], None]] = {
+            ACTION: self._perform_action,
+            CREATE: self._perform_create,
+            DELETE: self._perform_delete,
+            DELETE_PRESENTATION: self._perform_delete_presentation,
+            ATTRIBUTE: self._perform_attribute,
+            ASSOCIATION_SET: self._perform_association_set,
+            ASSOCIATION_ADD: self._perform_association_add,
+            ASSOCIATION_DELETE: self._perform_association_delete,
+            ELEMENT_TYPE: self._perform_element_type,
+            REVERT: self._perform_revert,
+            MATRIX: self._perform_matrix,
+            HANDLE_POSITION: self._perform_handle_position,
+            SNAPSHOT: self._perform_snapshot,
+        }
 
         event_manager.subscribe(self.ready)
         event_manager.subscribe(self.reset)
@@ -228,6 +431,21 @@ class UndoManager(Service, ActionProvider):
                 f"Updating state outside of a transaction: {action.__doc__}."
             )
 
+    def record(self, entry: UndoEntry) -> None:
+        """Add an entry to the undo log."""
+        if self._restoring_snapshot and entry[0] != REVERT:
+            return
+        if self._current_transaction:
+            if self._current_transaction.record(entry):
+                self._action_executed()
+        else:
+            with Transaction(self.event_manager, context="rollback"):
+                self._perform(entry)
+
+            raise NotInTransactionException(
+                f"Updating state outside of a transaction: {self._describe(entry)}."
+            )
+
     @event_handler(TransactionCommit)
     def _on_transaction_commit(self, event: TransactionCommit):
         self.event_manager.handle(_UndoManagerTransactionCommitted(event.context))
@@ -243,17 +461,29 @@ class UndoManager(Service, ActionProvider):
         self._current_transaction = None
 
         if event.context != "rollback" and current_transaction.can_execute():
+            if current_transaction.size() > self._snapshot_threshold and not isinstance(
+                current_transaction, EditingStack
+            ):
+                current_transaction.take_snapshot(self.element_factory.lookup)
+
             if event.context == "undo":
                 self._redo_stack.append(current_transaction)
             else:
                 if event.context != "redo":
                     self.clear_redo_stack()
                 self._undo_stack.append(current_transaction)
-                while len(self._undo_stack) > self._stack_depth:
-                    del self._undo_stack[0]
+                self._trim_undo_stack()
 
             self._action_executed()
 
+    def _trim_undo_stack(self):
+        undo_stack = self._undo_stack
+        actions = sum(tx.size() for tx in undo_stack)
+        while len(undo_stack) > 1 and (
+            len(undo_stack) > self._stack_depth or actions > self._action_budget
+        ):
+            actions -= undo_stack.pop(0).size()
+
     @event_handler(TransactionRollback)
     def _on_transaction_rollback(self, event: TransactionRollback):
         self.event_manager.handle(_UndoManagerTransactionRolledBack(event.context))
@@ -274,7 +504,7 @@ class UndoManager(Service, ActionProvider):
         self._current_transaction = None
         with Transaction(self.event_manager, context="rollback"):
             try:
-                erroneous_tx.execute()
+                erroneous_tx.execute(self._perform)
             except Exception:
                 logger.error("Could not rollback transaction", exc_info=True)
                 raise
@@ -302,7 +532,7 @@ class UndoManager(Service, ActionProvider):
 
         transaction = self._undo_stack.pop()
         with Transaction(self.event_manager, context="undo"):
-            transaction.execute()
+            transaction.execute(self._perform)
 
         self._action_executed()
 
@@ -314,7 +544,7 @@ class UndoManager(Service, ActionProvider):
 
         transaction = self._redo_stack.pop()
         with Transaction(self.event_manager, context="redo"):
-            transaction.execute()
+            transaction.execute(self._perform)
 
         self._action_executed()
 
@@ -336,6 +566,18 @@ class UndoManager(Service, ActionProvider):
         else:
             raise ValueError(f"Element with id {id} not found in model")
 
+    def _perform(self, entry: UndoEntry) -> None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(self._describe(entry))
+        self._performers[entry[0]](entry)
+
+    def _describe(self, entry: UndoEntry) -> str:
+        opcode, element_id, prop, value = entry
+        if opcode == ACTION:
+            return str(value.__doc__)
+        name = getattr(prop, "name", prop)
+        return f"Undo {opcode} for element {element_id}, {name}: {value!r}"
+
     #
     # Undo Handlers
     #
@@ -343,29 +585,38 @@ class UndoManager(Service, ActionProvider):
     @event_handler(RevertibleEvent)
     def undo_reversible_event(self, event: RevertibleEvent):
         element_id = event.element.id
+        if isinstance(event, MatrixUpdated):
+            self.record((MATRIX, element_id, None, event.old_value))
+        elif isinstance(event, HandlePositionEvent):
+            self.record(
+                (HANDLE_POSITION, element_id, event.handle_index, event.old_value)
+            )
+        else:
+            self.record((REVERT, element_id, None, event))
 
-        def undo_reversible_event():
-            element = self.lookup(element_id)
-            event.revert(element)
+    def _perform_revert(self, entry: UndoEntry) -> None:
+        _, element_id, _, event = entry
+        event.revert(self.lookup(element_id))
 
-        undo_reversible_event.__doc__ = (
-            f"Reverse event {event.__class__.__name__} for element {event.element}."
-        )
+    def _perform_matrix(self, entry: UndoEntry) -> None:
+        _, element_id, _, old_value = entry
+        self.lookup(element_id).matrix.set(*old_value)  # type: ignore[attr-defined]
 
-        self.add_undo_action(undo_reversible_event)
+    def _perform_handle_position(self, entry: UndoEntry) -> None:
+        _, element_id, handle_index, old_value = entry
+        element = self.lookup(element_id)
+        element.handles()[handle_index].pos = old_value  # type: ignore[attr-defined]
+        element.request_update()  # type: ignore[attr-defined]
+
+    def _perform_action(self, entry: UndoEntry) -> None:
+        entry[3]()
 
     @event_handler(ElementCreated)
     def undo_create_element_event(self, event: ElementCreated):
-        element_id = event.element.id
+        self.record((CREATE, event.element.id, None, None))
 
-        def undo_create_event():
-            element = self.lookup(element_id)
-            element.unlink()
-
-        undo_create_event.__doc__ = f"Undo create element {event.element}."
-        del event
-
-        self.add_undo_action(undo_create_event)
+    def _perform_create(self, entry: UndoEntry) -> None:
+        self.lookup(entry[1]).unlink()
 
     @event_handler(ElementDeleted)
     def undo_delete_element_event(self, event: ElementDeleted):
@@ -373,121 +624,189 @@ class UndoManager(Service, ActionProvider):
         element_id = event.element.id
 
         if isinstance(event.element, Presentation):
-            diagram_id = event.diagram.id
-            data = {}
-
-            def save_func(name, value):
-                data[name] = serialize(value)
-
-            event.element.save(save_func)
-
-            def undo_delete_event():
-                diagram = self.lookup(diagram_id)
-                element = diagram.create_as(element_type, element_id)  # type: ignore[attr-defined]
-
-                for name, ser in data.items():
-                    for value in deserialize(ser, lambda ref: None):
-                        element.load(name, value)
+            self.record(
+                (
+                    DELETE_PRESENTATION,
+                    element_id,
+                    element_type,
+                    (event.diagram.id, presentation_data(event.element)),
+                )
+            )
         else:
+            self.record((DELETE, element_id, element_type, None))
 
-            def undo_delete_event():
-                self.element_factory.create_as(element_type, element_id)
+    def _perform_delete(self, entry: UndoEntry) -> None:
+        _, element_id, element_type, _ = entry
+        self.element_factory.create_as(element_type, element_id)
 
-        undo_delete_event.__doc__ = f"Recreate element {element_type} ({element_id})."
-        del event
+    def _perform_delete_presentation(self, entry: UndoEntry) -> None:
+        _, element_id, element_type, (diagram_id, data) = entry
+        diagram = self.lookup(diagram_id)
+        element = diagram.create_as(element_type, element_id)  # type: ignore[attr-defined]
 
-        self.add_undo_action(undo_delete_event)
+        for name, ser in data.items():
+            for value in deserialize(ser, lambda ref: None):
+                element.load(name, value)
 
     @event_handler(AttributeUpdated)
     def undo_attribute_change_event(self, event: AttributeUpdated):
-        attribute = event.property
-        element_id = event.element.id
-        value = event.old_value
+        self.record((ATTRIBUTE, event.element.id, event.property, event.old_value))
 
-        def undo_attribute_change_event():
-            element = self.lookup(element_id)
-            attribute.set(element, value)
-
-        undo_attribute_change_event.__doc__ = (
-            f"Revert {event.element}.{attribute.name} to {value}."
-        )
-        del event
-
-        self.add_undo_action(undo_attribute_change_event)
+    def _perform_attribute(self, entry: UndoEntry) -> None:
+        _, element_id, attribute, value = entry
+        attribute.set(self.lookup(element_id), value)
 
     @event_handler(AssociationSet)
     def undo_association_set_event(self, event: AssociationSet):
         association = event.property
         if type(association) is not association_property:
             return
-        element_id = event.element.id
-        value_id = event.old_value and event.old_value.id
-
-        def undo_association_set_event():
-            element = self.lookup(element_id)
-            value = value_id and self.lookup(value_id)
-            association.set(element, value, from_opposite=True)
-
-        undo_association_set_event.__doc__ = (
-            f"Revert {event.element}.{association.name} to {event.old_value}."
+        self.record(
+            (
+                ASSOCIATION_SET,
+                event.element.id,
+                association,
+                event.old_value and event.old_value.id,
+            )
         )
-        del event
 
-        self.add_undo_action(undo_association_set_event)
+    def _perform_association_set(self, entry: UndoEntry) -> None:
+        _, element_id, association, value_id = entry
+        element = self.lookup(element_id)
+        value = value_id and self.lookup(value_id)
+        association.set(element, value, from_opposite=True)
 
     @event_handler(AssociationAdded)
     def undo_association_add_event(self, event: AssociationAdded):
         association = event.property
         if type(association) is not association_property:
             return
-        element_id = event.element.id
-        value_id = event.new_value.id
-
-        def undo_association_add_event():
-            element = self.lookup(element_id)
-            value = self.lookup(value_id)
-            association.delete(element, value, from_opposite=True)
-
-        undo_association_add_event.__doc__ = (
-            f"{event.element}.{association.name} delete {event.new_value}."
+        self.record(
+            (ASSOCIATION_ADD, event.element.id, association, event.new_value.id)
         )
-        del event
 
-        self.add_undo_action(undo_association_add_event)
+    def _perform_association_add(self, entry: UndoEntry) -> None:
+        _, element_id, association, value_id = entry
+        element = self.lookup(element_id)
+        value = self.lookup(value_id)
+        association.delete(element, value, from_opposite=True)
 
     @event_handler(AssociationDeleted)
     def undo_association_delete_event(self, event: AssociationDeleted):
         association = event.property
         if type(association) is not association_property:
             return
-        element_id = event.element.id
-        value_id = event.old_value.id
-        index = event.index
-
-        def undo_association_delete_event():
-            element = self.lookup(element_id)
-            value = self.lookup(value_id)
-            association.set(element, value, index=index, from_opposite=True)
-
-        undo_association_delete_event.__doc__ = (
-            f"{event.element}.{association.name} add {event.old_value}."
+        self.record(
+            (
+                ASSOCIATION_DELETE,
+                event.element.id,
+                association,
+                (event.old_value.id, event.index),
+            )
         )
-        del event
 
-        self.add_undo_action(undo_association_delete_event)
+    def _perform_association_delete(self, entry: UndoEntry) -> None:
+        _, element_id, association, (value_id, index) = entry
+        element = self.lookup(element_id)
+        value = self.lookup(value_id)
+        association.set(element, value, index=index, from_opposite=True)
 
     @event_handler(ElementTypeUpdated)
     def undo_element_type_updated_event(self, event: ElementTypeUpdated):
-        element_id = event.element.id
-        old_class = event.old_class
-
-        def undo_element_type_updated_event():
-            element = self.lookup(element_id)
-            swap_element_type(element, old_class)
-
-        undo_element_type_updated_event.__doc__ = (
-            f"{event.element} class is {old_class}."
-        )
-        del event
-
-        self.add_undo_action(undo_element_type_updated_event)
+        self.record((ELEMENT_TYPE, event.element.id, None, event.old_class))
+
+    def _perform_element_type(self, entry: UndoEntry) -> None:
+        _, element_id, _, old_class = entry
+        swap_element_type(self.lookup(element_id), old_class)
+
+    def _perform_snapshot(self, entry: UndoEntry) -> None:
+        snapshot: Snapshot = entry[3]
+        reverse = self._capture(snapshot)
+
+        self._restoring_snapshot = True
+        try:
+            with self.element_factory.bulk():  # type: ignore[attr-defined]
+                self._restore(snapshot)
+        finally:
+            self._restoring_snapshot = False
+
+        self.record((SNAPSHOT, None, None, reverse))
+
+    def _capture(self, snapshot: Snapshot) -> Snapshot:
+        """The current state of the elements and properties in a snapshot."""
+        lookup = self.element_factory.lookup
+        elements: dict[Id, ElementState | None] = {}
+        for element_id in snapshot.elements:
+            if not (element := lookup(element_id)):
+                elements[element_id] = None
+            elif isinstance(element, Presentation):
+                assert element.diagram
+                elements[element_id] = (
+                    type(element),
+                    element.diagram.id,
+                    presentation_data(element),
+                )
+            else:
+                elements[element_id] = (type(element), None, None)
+
+        values: dict[tuple[Id, Property], object] = {}
+        for element_id, prop in snapshot.values:
+            element = lookup(element_id)
+            if not element:
+                value = None
+            elif not isinstance(prop, association_property):
+                value = prop.get(element)
+            elif prop.upper == 1:
+                value = (ref := prop.get(element)) and ref.id
+            else:
+                value = tuple(e.id for e in prop.peek(element) or ())
+            values[(element_id, prop)] = value
+
+        return Snapshot(elements, values)
+
+    def _restore(self, snapshot: Snapshot) -> None:
+        lookup = self.element_factory.lookup
+        states = snapshot.elements
+
+        for element_id, state in sorted(
+            states.items(), key=lambda item: bool(item[1] and item[1][1])
+        ):
+            if not state or lookup(element_id):
+                continue
+            element_type, diagram_id, data = state
+            if diagram_id is None:
+                self.element_factory.create_as(element_type, element_id)
+            else:
+                self._perform_delete_presentation(
+                    (DELETE_PRESENTATION, element_id, element_type, (diagram_id, data))
+                )
+
+        for element_id, state in states.items():
+            if state and type(current := self.lookup(element_id)) is not state[0]:
+                swap_element_type(current, state[0])
+
+        for (element_id, prop), value in snapshot.values.items():
+            if states.get(element_id, True) and (restored := lookup(element_id)):
+                self._restore_value(restored, prop, value)
+
+        for element_id, state in sorted(
+            states.items(),
+            key=lambda item: not isinstance(lookup(item[0]), Presentation),
+        ):
+            if state is None and (created := lookup(element_id)):
+                created.unlink()
+
+    def _restore_value(self, element: Base, prop: Property, value) -> None:
+        lookup = self.element_factory.lookup
+        if not isinstance(prop, association_property):
+            prop.set(element, value)
+        elif prop.upper == 1:
+            prop.set(element, value and lookup(value), from_opposite=True)
+        else:
+            wanted = [v for v in map(lookup, value) if v]
+            for v in list(prop.peek(element) or ()):
+                if v not in wanted:
+                    prop.delete(element, v, from_opposite=True)
+            for index, v in enumerate(wanted):
+                if v not in (prop.peek(element) or ()):
+                    prop.set(element, v, index=index, from_opposite=True)
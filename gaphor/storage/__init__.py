@@ -9,8 +9,9 @@ __all__ = [
     "load_generator",
     "save",
     "save_generator",
+    "IncrementalSaver",
     "UnknownModelElementError",
 ]
 
 from gaphor.storage.load import UnknownModelElementError, load, load_generator
-from gaphor.storage.save import save, save_generator
+from gaphor.storage.save import IncrementalSaver, save, save_generator
@@ -0,0 +1,260 @@
+"""A compact, binary journal of recorded model changes.
+
+The journal is used for session recovery. It starts with ``MAGIC``,
+followed by a sequence of records. Like snapshots, each record starts with
+a record type (1 byte) and the size of its payload (4 bytes, little
+endian).
+
+Records:
+
+``HEADER``
+    JSON encoded preamble: the model file and its checksum.
+``EVENTS``
+    The events recorded in one or more transactions.
+``RESET``
+    Clear the string table. Written when a journal is reopened for appending.
+    A truncated record at the end is cut off first.
+
+Event values are tagged with a type (1 byte). Strings, like element ids
+and property names, are interned: the first time a string is written it's
+added to the string table, after that it's referred to by its index.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO
+
+from gaphor.storage.parser import ParserException
+
+MAGIC = b"GAPHOR\x00J"
+
+HEADER, EVENTS, RESET = range(3)
+
+NONE, TRUE, FALSE, INT, FLOAT, STRING, STRING_REF, TUPLE, LIST = range(9)
+
+_record = struct.Struct("<BI")
+_index = struct.Struct("<I")
+_tag = struct.Struct("<B")
+_int = struct.Struct("<Bq")
+_float = struct.Struct("<Bd")
+_sized = struct.Struct("<BI")
+
+_NONE = _tag.pack(NONE)
+_TRUE = _tag.pack(TRUE)
+_FALSE = _tag.pack(FALSE)
+_TUPLES = [_sized.pack(TUPLE, n) for n in range(8)]
+
+
+class JournalWriter:
+    """Write journal records to a binary stream.
+
+    Every record is written with a single ``write()`` call.
+    """
+
+    def __init__(self, out: BinaryIO):
+        self._out = out
+        # Interned strings, and the encoded reference to them
+        self._strings: dict[str, bytes] = {}
+
+    def record(self, record_type: int, payload: bytes) -> None:
+        self._out.write(_record.pack(record_type, len(payload)) + payload)
+
+    def header(self, preamble: dict) -> None:
+        self._out.write(MAGIC)
+        self.record(HEADER, json.dumps(preamble).encode("utf-8"))
+
+    def reset(self) -> None:
+        self._strings.clear()
+        self.record(RESET, b"")
+
+    def events(self, events: Iterable) -> None:
+        events = list(events)
+        parts = [_sized.pack(LIST, len(events))]
+        strings = self._strings
+        known = len(strings)
+        try:
+            self._encode(events, parts)
+            self.record(EVENTS, b"".join(parts))
+        except BaseException:
+            # Strings of a record that is not written are not in the journal
+            for s in list(strings)[known:]:
+                del strings[s]
+            raise
+
+    def _encode(self, values: list | tuple, parts: list[bytes]) -> None:
+        """Encode the items in ``values``.
+
+        The container itself should be written by the caller.
+        """
+        append = parts.append
+        strings = self._strings
+        for value in values:
+            value_type = type(value)
+            if value_type is str:
+                if (ref := strings.get(value)) is None:
+                    strings[value] = _sized.pack(STRING_REF, len(strings))
+                    encoded = value.encode("utf-8")
+                    append(_sized.pack(STRING, len(encoded)))
+                    append(encoded)
+                else:
+                    append(ref)
+            elif value is None:
+                append(_NONE)
+            elif value_type is tuple:
+                append(
+                    _TUPLES[len(value)]
+                    if len(value) < 8
+                    else _sized.pack(TUPLE, len(value))
+                )
+                self._encode(value, parts)
+            elif value_type is bool:
+                append(_TRUE if value else _FALSE)
+            elif value_type is int:
+                append(_int.pack(INT, value))
+            elif value_type is float:
+                append(_float.pack(FLOAT, value))
+            elif value_type is list:
+                append(_sized.pack(LIST, len(value)))
+                self._encode(value, parts)
+            elif isinstance(value, str):
+                self._encode((str(value),), parts)
+            else:
+                raise TypeError(f"Can not write {value!r} to journal")
+
+
+def read_journal(data: bytes) -> Iterator[tuple[int, object]]:
+    """Iterate the records in a journal.
+
+    Yields the record type and its content: the preamble for a
+    ``HEADER``, a list of events for ``EVENTS`` records. A truncated
+    record at the end of the journal, e.g. from a crash, is ignored.
+    """
+    if not is_journal(data):
+        raise ParserException("Invalid journal: not a Gaphor journal")
+
+    view = memoryview(data)
+    offset = len(MAGIC)
+    end = len(data)
+    strings: list[str] = []
+    while offset + _record.size <= end:
+        record_type, length = _record.unpack_from(view, offset)
+        offset += _record.size
+        if offset + length > end:
+            break
+        if record_type == EVENTS:
+            events, _ = _decode(view, offset, strings)
+            yield EVENTS, events
+        elif record_type == HEADER:
+            yield HEADER, json.loads(bytes(view[offset : offset + length]))
+        elif record_type == RESET:
+            strings.clear()
+        offset += length
+
+
+def complete_length(f: BinaryIO) -> int:
+    """The length of a journal, up to the end of its last complete record.
+
+    A crash while a record is written leaves a truncated record at the end
+    of the journal. It should be cut off before records are appended.
+    Returns 0 if the journal has no complete header.
+    """
+    if not is_journal(f.read(len(MAGIC))):
+        return 0
+    end = f.seek(0, os.SEEK_END)
+    offset = complete = len(MAGIC)
+    while offset + _record.size <= end:
+        f.seek(offset)
+        _, length = _record.unpack(f.read(_record.size))
+        offset += _record.size + length
+        if offset > end:
+            break
+        complete = offset
+    return complete if complete > len(MAGIC) else 0
+
+
+def is_journal(data: bytes) -> bool:
+    return data[: len(MAGIC)] == MAGIC
+
+
+def _decode(view: memoryview, offset: int, strings: list[str]) -> tuple[object, int]:
+    tag = view[offset]
+    if tag == STRING_REF:
+        (index,) = _index.unpack_from(view, offset + 1)
+        return strings[index], offset + _sized.size
+    elif tag == STRING:
+        (length,) = _index.unpack_from(view, offset + 1)
+        start = offset + _sized.size
+        s = str(view[start : start + length], "utf-8")
+        strings.append(s)
+        return s, start + length
+    elif tag == TUPLE or tag == LIST:
+        (count,) = _index.unpack_from(view, offset + 1)
+        offset += _sized.size
+        items = []
+        for _ in range(count):
+            item, offset = _decode(view, offset, strings)
+            items.append(item)
+        return (tuple(items) if tag == TUPLE else items), offset
+    elif tag == NONE:
+        return None, offset + 1
+    elif tag == INT:
+        return _int.unpack_from(view, offset)[1], offset + _int.size
+    elif tag == FLOAT:
+        return _float.unpack_from(view, offset)[1], offset + _float.size
+    elif tag == TRUE:
+        return True, offset + 1
+    elif tag == FALSE:
+        return False, offset + 1
+    raise ParserException(f"Invalid journal: unknown value type {tag}")
+
+
+# Events that set a value, with the length of the key that identifies the value
+_COALESCING_EVENTS = {"a": 3, "mu": 2, "hp": 3}
+
+
+def compact_events(events: Iterable) -> list:
+    """Drop events that are overwritten by later events.
+
+    An attribute update, a matrix update or handle move is dropped if the
+    same value is set again later, and nothing else happened to the
+    element in between.
+    """
+    result: list = []
+    dropped: set[int] = set()
+    latest: dict[tuple, int] = {}
+    keys_by_element: dict[object, list[tuple]] = {}
+    for event in events:
+        if isinstance(event, tuple) and len(event) > 1:
+            element_id = event[1]
+            if key_size := _COALESCING_EVENTS.get(event[0]):
+                key = event[:key_size]
+                if (pos := latest.get(key)) is not None:
+                    dropped.add(pos)
+                else:
+                    keys_by_element.setdefault(element_id, []).append(key)
+                latest[key] = len(result)
+            else:
+                for key in keys_by_element.pop(element_id, ()):
+                    del latest[key]
+        result.append(event)
+    return [e for n, e in enumerate(result) if n not in dropped]
+
+
+def read_header(f: BinaryIO) -> dict:
+    """Read the preamble from the ``HEADER`` record of a journal."""
+    if not is_journal(f.read(len(MAGIC))):
+        raise ParserException("Invalid journal: not a Gaphor journal")
+    record = f.read(_record.size)
+    if len(record) < _record.size:
+        raise ParserException("Invalid journal: no header")
+    record_type, length = _record.unpack(record)
+    if record_type != HEADER:
+        raise ParserException("Invalid journal: no header")
+    preamble = json.loads(f.read(length))
+    if not isinstance(preamble, dict):
+        raise ParserException("Invalid journal: invalid header")
+    return preamble
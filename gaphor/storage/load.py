@@ -4,17 +4,20 @@ One function is exported: `load(file_obj)` loads a model from a
 file.
 """
 
-__all__ = ["load"]
-
 import io
 import logging
 from collections.abc import Callable, Iterable
+from functools import partial
 
 from gaphor.core.modeling import Base, Diagram, ElementFactory, Id, Presentation
+from gaphor.core.modeling.collection import lazycollection
 from gaphor.core.modeling.modelinglanguage import ModelingLanguage
+from gaphor.core.modeling.properties import association, redefine
 from gaphor.core.modeling.stylesheet import StyleSheet
 from gaphor.storage.parser import GaphorLoader, element, parse_generator
 
+__all__ = ["load", "load_generator", "materialize_diagrams", "StreamingLoader"]
+
 log = logging.getLogger(__name__)
 
 
@@ -97,24 +100,8 @@ def _load_elements_and_canvasitems(  # type: ignore[explicit-any]
         if elem.element:
             return
 
-        maybe_upgrade(upgrade_element_owned_comment_to_comment, elem)
-        maybe_upgrade(upgrade_package_owned_classifier_to_owned_type, elem)
-        maybe_upgrade(upgrade_implementation_to_interface_realization, elem)
-        maybe_upgrade(upgrade_feature_parameters_to_owned_parameter, elem)
-        maybe_upgrade(upgrade_parameter_owner_formal_param, elem)
-        maybe_upgrade(upgrade_diagram_element, elem)
-        maybe_upgrade(upgrade_generalization_arrow_direction, elem)
-        maybe_upgrade(upgrade_flow_item_to_control_flow_item, elem, elements)
-        maybe_upgrade(upgrade_delete_property_information_flow, elem)
-        maybe_upgrade(upgrade_decision_node_item_show_type, elem)
-        maybe_upgrade(upgrade_note_on_model_element_only, elem, elements)
-        maybe_upgrade(upgrade_modeling_language, elem)
-        maybe_upgrade(upgrade_diagram_type_to_class, elem)
-        maybe_upgrade(
-            upgrade_simple_properties_to_value_specifications,
-            elem,
-            element_factory,
-            modeling_language,
+        upgrade_element(
+            elem, elements, element_factory, modeling_language, maybe_upgrade
         )
 
         if not (cls := modeling_language.lookup_element(elem.type, elem.ns)):
@@ -144,6 +131,35 @@ def _load_elements_and_canvasitems(  # type: ignore[explicit-any]
         create_element(elem)
 
 
+def upgrade_element(  # type: ignore[explicit-any]
+    elem: element,
+    elements: dict[Id, element],
+    element_factory: ElementFactory,
+    modeling_language: ModelingLanguage,
+    maybe_upgrade: Callable[..., None],
+) -> None:
+    """Apply upgrades to a parsed element, before it's created."""
+    maybe_upgrade(upgrade_element_owned_comment_to_comment, elem)
+    maybe_upgrade(upgrade_package_owned_classifier_to_owned_type, elem)
+    maybe_upgrade(upgrade_implementation_to_interface_realization, elem)
+    maybe_upgrade(upgrade_feature_parameters_to_owned_parameter, elem)
+    maybe_upgrade(upgrade_parameter_owner_formal_param, elem)
+    maybe_upgrade(upgrade_diagram_element, elem)
+    maybe_upgrade(upgrade_generalization_arrow_direction, elem)
+    maybe_upgrade(upgrade_flow_item_to_control_flow_item, elem, elements)
+    maybe_upgrade(upgrade_delete_property_information_flow, elem)
+    maybe_upgrade(upgrade_decision_node_item_show_type, elem)
+    maybe_upgrade(upgrade_note_on_model_element_only, elem, elements)
+    maybe_upgrade(upgrade_modeling_language, elem)
+    maybe_upgrade(upgrade_diagram_type_to_class, elem)
+    maybe_upgrade(
+        upgrade_simple_properties_to_value_specifications,
+        elem,
+        element_factory,
+        modeling_language,
+    )
+
+
 def _load_attributes_and_references(
     elements: dict[Id, element],
     element_factory: ElementFactory,
@@ -185,18 +201,427 @@ def _load_attributes_and_references(
                     log.exception(f"Invalid ID for reference ({refids})")
 
 
+class StreamingLoader(GaphorLoader):
+    """A loader that creates model elements while the file is parsed.
+
+    Values are loaded as soon as an element has been read. References are
+    kept in a pending reference table and are resolved, in document order,
+    once the whole document has been read. This way the resulting model is
+    identical to the one created by :func:`load_elements`, without keeping
+    a parsed copy of the whole model in memory.
+
+    Most upgrades can be applied to elements one by one. Models that need
+    upgrades that require the whole model (Gaphor < 2.20) are read like a
+    regular ``GaphorLoader`` does. In that case ``streaming`` is ``False``.
+
+    With ``lazy_diagrams``, presentation items are kept as parsed elements.
+    They're created when the diagram is first used, see :class:`LazyDiagrams`.
+    """
+
+    def __init__(
+        self,
+        element_factory: ElementFactory,
+        modeling_language: ModelingLanguage,
+        lazy_diagrams: bool = False,
+    ):
+        self.element_factory = element_factory
+        self.modeling_language = modeling_language
+        self.lazy_diagrams = lazy_diagrams
+        super().__init__()
+
+    def startDocument(self):
+        super().startDocument()
+        self.streaming = False
+        # Elements in document order. Presentation items that are read before
+        # their diagram are referred to by their parsed element.
+        self.loaded: list[Base | element] = []
+        self.pending_references: list[tuple[Base | element, str, Id | list[Id]]] = []
+        self._awaiting_diagram: dict[Id, list[element]] = {}
+        self._lazy_items: dict[Id, list[element]] = {}
+        self._positions: dict[Id, int] = {}
+
+    def start_root(self, state, ns, name, attrs):
+        if super().start_root(state, ns, name, attrs):
+            try:
+                self.streaming = not requires_whole_model_upgrade(self.gaphor_version)
+            except ValueError:
+                self.streaming = False
+            return True
+        return None
+
+    def maybe_upgrade(self, upgrade_func, *args) -> None:
+        if version_lower_than(self.gaphor_version, upgrade_func.__since__):
+            upgrade_func(*args)
+
+    def add_element(self, e: element) -> None:
+        if not self.streaming:
+            super().add_element(e)
+        elif self.element_factory.lookup(e.id):
+            log.exception(
+                f"File corrupt: duplicate element. Remove element {e.type} with id {e.id} and try again"
+            )
+
+    def element_read(self, e: element) -> None:
+        if not self.streaming:
+            return
+
+        maybe_upgrade = self.maybe_upgrade
+        elements = {e.id: e}
+        upgrade_element(
+            e, elements, self.element_factory, self.modeling_language, maybe_upgrade
+        )
+        maybe_upgrade(upgrade_package_package_to_nesting_package, elements)
+        maybe_upgrade(upgrade_parameter_owned_node_to_activity_parameter_node, elements)
+        maybe_upgrade(upgrade_enumeration_default_values, elements)
+
+        if not (cls := self.modeling_language.lookup_element(e.type, e.ns)):
+            raise UnknownModelElementError(
+                f"Type {e.ns}:{e.type} cannot be loaded: no such element"
+            )
+
+        owner: Base | element
+        if issubclass(cls, Presentation):
+            if "diagram" not in e.references:
+                log.warning("Removing element %s of type %s without diagram", e.id, cls)
+                return
+            diagram_id = e.references["diagram"]
+            assert isinstance(diagram_id, str)
+            if self.lazy_diagrams:
+                self._lazy_items.setdefault(diagram_id, []).append(e)
+                self._positions[e.id] = len(self._positions)
+                return
+            if diagram := self.element_factory.lookup(diagram_id):
+                assert isinstance(diagram, Diagram)
+                owner = self._create(cls, e, diagram)
+            else:
+                self._awaiting_diagram.setdefault(diagram_id, []).append(e)
+                owner = e
+        else:
+            owner = self._create(cls, e)
+
+        self.loaded.append(owner)
+        self.pending_references.extend(
+            (owner, name, refids) for name, refids in e.references.items()
+        )
+
+    def _create(
+        self, cls: type[Base], e: element, diagram: Diagram | None = None
+    ) -> Base:
+        elem = self.element_factory.create_as(cls, e.id, diagram)
+        if self.lazy_diagrams:
+            self._positions[e.id] = len(self._positions)
+        for name, value in e.values.items():
+            try:
+                elem.load(name, value)
+            except AttributeError:
+                log.exception(f"Invalid attribute name {e.type}.{name}")
+
+        if isinstance(elem, Diagram):
+            for item in self._awaiting_diagram.pop(elem.id, ()):
+                item_cls = self.modeling_language.lookup_element(item.type, item.ns)
+                assert item_cls
+                item.element = self._create(item_cls, item, elem)
+        return elem
+
+    def finish(self) -> Iterable[float]:
+        """Resolve all pending references and post-load the elements.
+
+        Yields progress, as a percentage.
+        """
+        for diagram_id, items in self._awaiting_diagram.items():
+            for item in items:
+                log.warning(
+                    "Removing element %s of type %s without diagram %s",
+                    item.id,
+                    item.type,
+                    diagram_id,
+                )
+        self._awaiting_diagram.clear()
+
+        lazy = LazyDiagrams(
+            self.element_factory,
+            self.modeling_language,
+            self._lazy_items,
+            self._positions,
+        )
+        self._lazy_items = {}
+        self._positions = {}
+
+        lookup = self.element_factory.lookup
+        size = len(self.pending_references) + len(self.loaded)
+        progress = 0
+
+        for owner, name, refids in self.pending_references:
+            progress += 1
+            if progress % 30 == 0:
+                yield (progress * 100) / size
+
+            if not (elem := _loaded_element(owner)):
+                continue
+            if isinstance(refids, list):
+                for refid in refids:
+                    if lazy.defers(elem, name, refid):
+                        continue
+                    if ref := lookup(refid):
+                        elem.load(name, ref)
+                    else:
+                        log.exception(
+                            f"Invalid ID for reference ({refid}) for element {elem.__class__.__name__}.{name}"
+                        )
+            elif lazy.defers(elem, name, refids):
+                continue
+            elif ref := lookup(refids):
+                elem.load(name, ref)
+            else:
+                log.exception(f"Invalid ID for reference ({refids})")
+        self.pending_references = []
+
+        lazy.defer_collections()
+        if lazy.is_pending():
+            self.element_factory.set_element_loader(lazy.load_element)
+
+        upgrade_ensure_style_sheet_is_present(self.element_factory)
+        self.maybe_upgrade(
+            upgrade_dependency_owning_package,
+            self.element_factory,
+            self.modeling_language,
+        )
+
+        for owner in self.loaded:
+            progress += 1
+            if progress % 30 == 0:
+                yield (progress * 100) / size
+
+            if (elem := _loaded_element(owner)) and not lazy.is_lazy(elem):
+                elem.postload()
+        self.loaded = []
+
+        for diagram in self.element_factory.select(Diagram):
+            if not lazy.is_lazy(diagram):
+                diagram.update()
+
+        lazy.materialize_required()
+
+
+class LazyDiagrams:
+    """Presentation items of diagrams that have not been created yet.
+
+    The ``ownedPresentation`` collection of a lazy diagram, and the
+    collections of model elements that refer to its items (most notably
+    ``presentation``), are populated on first access. Then the
+    presentation items are created, loaded and post-loaded, and the
+    diagram is updated.
+
+    A diagram is materialized right away if one of its items can not be
+    deferred, e.g. because a model element refers to it via a single
+    valued property. Looking up an item by id in the element factory
+    materializes its diagram as well.
+
+    Once all diagrams are materialized, elements are put back in the order
+    they had in the model file, so saving the model does not shuffle it.
+    """
+
+    def __init__(
+        self,
+        element_factory: ElementFactory,
+        modeling_language: ModelingLanguage,
+        items: dict[Id, list[element]],
+        positions: dict[Id, int],
+    ):
+        self.element_factory = element_factory
+        self.modeling_language = modeling_language
+        self._positions = positions
+        self._items: dict[Id, list[element]] = {}
+        self._item_diagram: dict[Id, Id] = {}
+        self._deferred: dict[tuple[Base, association], set[Id]] = {}
+        self._required: set[Id] = set()
+        self._pending_references: list[tuple[Base, str, Id]] = []
+        self._materializing = 0
+
+        for diagram_id, records in items.items():
+            if isinstance(element_factory.lookup(diagram_id), Diagram):
+                self._items[diagram_id] = records
+                self._item_diagram.update((r.id, diagram_id) for r in records)
+            else:
+                for r in records:
+                    log.warning(
+                        "Removing element %s of type %s without diagram %s",
+                        r.id,
+                        r.type,
+                        diagram_id,
+                    )
+
+    def is_pending(self) -> bool:
+        return bool(self._items)
+
+    def is_lazy(self, owner: Base) -> bool:
+        return owner.id in self._items
+
+    def defers(self, owner: Base, name: str, refid: Id) -> bool:
+        """Check if a reference to a lazy presentation item can be skipped.
+
+        The item will restore the reference once it's created. If the
+        reference can not be restored that way, the diagram is marked for
+        materialization and the reference is loaded afterwards.
+        """
+        if not (diagram_id := self._item_diagram.get(refid)):
+            return False
+        if not _collection_property(getattr(type(owner), name, None)):
+            self._required.add(diagram_id)
+            self._pending_references.append((owner, name, refid))
+        return True
+
+    def defer_collections(self) -> None:
+        """Make collections that will contain presentation items lazy."""
+        lookup = self.element_factory.lookup
+        lookup_element = self.modeling_language.lookup_element
+        for diagram_id, records in self._items.items():
+            diagram = lookup(diagram_id)
+            assert isinstance(diagram, Diagram)
+            owned_presentation = _collection_property(type(diagram).ownedPresentation)
+            assert owned_presentation
+            self._defer(diagram, owned_presentation, diagram_id)
+
+            for record in records:
+                item_cls = lookup_element(record.type, record.ns)
+                for name, refids in record.references.items():
+                    opposite = getattr(getattr(item_cls, name, None), "opposite", None)
+                    for refid in refids if isinstance(refids, list) else [refids]:
+                        if refid in self._item_diagram or not (ref := lookup(refid)):
+                            continue
+                        if prop := _collection_property(
+                            opposite and getattr(type(ref), opposite, None)
+                        ):
+                            self._defer(ref, prop, diagram_id)
+                        elif opposite:
+                            self._required.add(diagram_id)
+
+        for (owner, prop), diagram_ids in self._deferred.items():
+            prop.defer(owner, partial(self._materialize_many, diagram_ids))
+
+    def _defer(self, owner: Base, prop: association, diagram_id: Id) -> None:
+        self._deferred.setdefault((owner, prop), set()).add(diagram_id)
+
+    def load_element(self, id: Id) -> Base | None:
+        """Materialize the diagram of a presentation item, and return the item.
+
+        This is the element loader of the element factory.
+        """
+        if (diagram_id := self._item_diagram.get(id)) and diagram_id in self._items:
+            self.materialize(diagram_id)
+            return self.element_factory.lookup(id)
+        return None
+
+    def materialize_required(self) -> None:
+        """Materialize diagrams that can not be loaded lazily."""
+        for diagram_id in self._required:
+            self.materialize(diagram_id)
+        self._required.clear()
+
+        for owner, name, refid in self._pending_references:
+            if ref := self.element_factory.lookup(refid):
+                owner.load(name, ref)
+        self._pending_references.clear()
+
+    def _materialize_many(self, diagram_ids: set[Id]) -> bool:
+        # Items created for one diagram should not pull in other diagrams
+        if self._materializing:
+            return False
+        for diagram_id in diagram_ids:
+            self.materialize(diagram_id)
+        return True
+
+    def materialize(self, diagram_id: Id) -> None:
+        """Create the presentation items of a diagram."""
+        records = self._items.pop(diagram_id, None)
+        diagram = self.element_factory.lookup(diagram_id)
+        if not records or not isinstance(diagram, Diagram):
+            return
+
+        lookup = self.element_factory.lookup
+        lookup_element = self.modeling_language.lookup_element
+        self._materializing += 1
+        try:
+            with self.element_factory.block_events():
+                items = []
+                for record in records:
+                    item_cls = lookup_element(record.type, record.ns)
+                    assert item_cls
+                    item = self.element_factory.create_as(item_cls, record.id, diagram)
+                    for name, value in record.values.items():
+                        try:
+                            item.load(name, value)
+                        except AttributeError:
+                            log.exception(
+                                f"Invalid attribute name {record.type}.{name}"
+                            )
+                    items.append((item, record))
+
+                for item, record in items:
+                    for name, refids in record.references.items():
+                        for refid in refids if isinstance(refids, list) else [refids]:
+                            other = self._item_diagram.get(refid)
+                            if other and other != diagram_id:
+                                self.materialize(other)
+                            if ref := lookup(refid):
+                                item.load(name, ref)
+                            else:
+                                log.exception(
+                                    f"Invalid ID for reference ({refid}) for element {record.type}.{name}"
+                                )
+
+                for item, _record in items:
+                    item.postload()
+                diagram.postload()
+                diagram.update()
+
+            if not self._items:
+                # All items are created: restore the original element order
+                self.element_factory.set_element_loader(None)
+                positions = self._positions
+                end = len(positions)
+                self.element_factory.reorder(lambda e: positions.get(e.id, end))
+        finally:
+            self._materializing -= 1
+
+
+def _collection_property(prop) -> association | None:
+    if isinstance(prop, redefine):
+        prop = prop.original
+    return prop if isinstance(prop, association) and prop.upper != 1 else None
+
+
+def materialize_diagrams(element_factory: ElementFactory) -> None:
+    """Create all presentation items of lazily loaded diagrams."""
+    for diagram in element_factory.select(Diagram):
+        if isinstance(owned := diagram.ownedPresentation, lazycollection):
+            owned.materialize()
+
+
+def _loaded_element(owner: Base | element) -> Base | None:
+    return owner.element if isinstance(owner, element) else owner
+
+
 def load(
     file_obj: io.TextIOBase,
     element_factory: ElementFactory,
     modeling_language: ModelingLanguage,
     status_queue: Callable[[int], None] | None = None,
+    streaming: bool = False,
+    lazy_diagrams: bool = False,
 ) -> None:
     """Load a file and create a model if possible.
 
     Optionally, a status queue function can be given, to which the
     progress is written (as status_queue(progress)).
     """
-    for status in load_generator(file_obj, element_factory, modeling_language):
+    for status in load_generator(
+        file_obj,
+        element_factory,
+        modeling_language,
+        streaming=streaming,
+        lazy_diagrams=lazy_diagrams,
+    ):
         if status_queue:
             status_queue(status)
 
@@ -205,14 +630,30 @@ def load_generator(
     file_obj: io.TextIOBase,
     element_factory: ElementFactory,
     modeling_language: ModelingLanguage,
+    streaming: bool = False,
+    lazy_diagrams: bool = False,
 ) -> Iterable[int]:
     """Load a file and create a model if possible.
 
     This function is a generator. It will yield values from 0 to 100 (%)
     to indicate its progression.
+
+    With ``streaming``, model elements are created while the file is parsed,
+    instead of first building an intermediate representation of the whole
+    model. Models created with Gaphor < 2.20 are always loaded in two steps.
+
+    With ``lazy_diagrams`` (implies ``streaming``), presentation items are
+    only created once their diagram is used. Use :func:`materialize_diagrams`
+    to create all of them.
     """
     assert isinstance(file_obj, io.TextIOBase)
 
+    if streaming or lazy_diagrams:
+        yield from _load_streaming_generator(
+            file_obj, element_factory, modeling_language, lazy_diagrams
+        )
+        return
+
     # Use the incremental parser and yield the percentage of the file.
     loader = GaphorLoader()
     for percentage in parse_generator(file_obj, loader):
@@ -244,6 +685,40 @@ def load_generator(
     yield 100
 
 
+def _load_streaming_generator(
+    file_obj: io.TextIOBase,
+    element_factory: ElementFactory,
+    modeling_language: ModelingLanguage,
+    lazy_diagrams: bool = False,
+) -> Iterable[int]:
+    element_factory.flush()
+    loader = StreamingLoader(element_factory, modeling_language, lazy_diagrams)
+    try:
+        with element_factory.block_events():
+            for percentage in parse_generator(file_obj, loader):
+                yield int(percentage / 2)
+
+            if not loader.streaming:
+                # The model needs upgrading: fall back to the two step process
+                gaphor_version = loader.gaphor_version
+                if version_lower_than(gaphor_version, (0, 17, 0)):
+                    raise ValueError(
+                        f"Gaphor model version should be at least 0.17.0 (found {gaphor_version})"
+                    )
+                for percentage in load_elements_generator(
+                    loader.elements, element_factory, modeling_language, gaphor_version
+                ):
+                    yield int(percentage / 2 + 50)
+            else:
+                for percentage in loader.finish():
+                    yield int(percentage / 2 + 50)
+    except Exception:
+        element_factory.flush()
+        raise
+
+    yield 100
+
+
 def version_lower_than(gaphor_version: str, version: tuple[int, ...]) -> bool:
     """Only major and minor versions are checked.
 
@@ -259,14 +734,47 @@ class UnknownModelElementError(Exception):
     pass
 
 
+_upgrade_versions: set[tuple[int, int, int]] = set()
+
+
 def since(major, minor, patch=0):
     def _since(func):
         func.__since__ = (major, minor, patch)
+        _upgrade_versions.add(func.__since__)
         return func
 
     return _since
 
 
+def requires_upgrade(gaphor_version: str) -> bool:
+    """Check if any upgrade is applied when a model is loaded.
+
+    >>> requires_upgrade("3.1.0")
+    True
+    >>> requires_upgrade("3.2.0")
+    False
+    """
+    return version_lower_than(gaphor_version, max(_upgrade_versions))
+
+
+def requires_whole_model_upgrade(gaphor_version: str) -> bool:
+    """Check if a model needs upgrades that can not be applied per element.
+
+    >>> requires_whole_model_upgrade("2.19.0")
+    True
+    >>> requires_whole_model_upgrade("3.1.0")
+    False
+    """
+    # Those models are also newer than the canvas based format (Gaphor < 2.5).
+    return any(
+        version_lower_than(gaphor_version, upgrade.__since__)
+        for upgrade in (
+            upgrade_flow_item_to_control_flow_item,
+            upgrade_note_on_model_element_only,
+        )
+    )
+
+
 @since(2, 1, 0)
 def upgrade_element_owned_comment_to_comment(elem: element):
     for name, refids in dict(elem.references).items():
@@ -0,0 +1,315 @@
+"""Compare models from their parsed records.
+
+``gaphor.core.changeset.compare`` works on models loaded into an element
+factory. Here the ancestor and incoming models are compared straight from
+the elements read by the parser, matched by id. Elements with the same
+values and references in both models are skipped without further ado.
+Only for changed elements values are converted to their model type, so
+the resulting changes are the same as those of
+:func:`~gaphor.core.changeset.compare.compare`.
+
+Models saved by older versions of Gaphor need upgrades while they're
+loaded, and can not be compared this way. :func:`compare_models` loads
+those models, and compares them the regular way.
+"""
+
+from __future__ import annotations
+
+from ast import literal_eval
+from collections.abc import Callable, Iterable
+
+from gaphor.core.changeset.compare import (
+    UnmatchableModel,
+    compare,
+    set_value_change_property_value,
+)
+from gaphor.core.modeling import (
+    Base,
+    ElementChange,
+    ElementFactory,
+    Id,
+    Presentation,
+    RefChange,
+    StyleSheet,
+    UnlimitedNatural,
+    ValueChange,
+)
+from gaphor.core.modeling.modelinglanguage import ModelingLanguage
+from gaphor.core.modeling.properties import attribute, enumeration, modelproperty
+from gaphor.storage.load import (
+    UnknownModelElementError,
+    load_elements,
+    requires_upgrade,
+)
+from gaphor.storage.parser import GaphorLoader, element
+
+References = str | list[str]
+
+
+def can_compare_records(gaphor_version: str) -> bool:
+    """Models of this version can be compared by :func:`compare_records`."""
+    return not requires_upgrade(gaphor_version)
+
+
+def compare_models(
+    current: ElementFactory,
+    ancestor: GaphorLoader,
+    incoming: GaphorLoader,
+    modeling_language: ModelingLanguage,
+) -> Iterable[ElementChange | ValueChange | RefChange]:
+    """Compare two parsed models.
+
+    The parsed records are compared, unless a model needs to be upgraded.
+    In that case both models are loaded and compared.
+    """
+    if can_compare_records(ancestor.gaphor_version) and can_compare_records(
+        incoming.gaphor_version
+    ):
+        return compare_records(
+            current, ancestor.elements, incoming.elements, modeling_language
+        )
+
+    ancestor_element_factory = ElementFactory()
+    load_elements(
+        ancestor.elements,
+        ancestor_element_factory,
+        modeling_language,
+        ancestor.gaphor_version,
+    )
+    incoming_element_factory = ElementFactory()
+    load_elements(
+        incoming.elements,
+        incoming_element_factory,
+        modeling_language,
+        incoming.gaphor_version,
+    )
+    return compare(current, ancestor_element_factory, incoming_element_factory)
+
+
+def compare_records(
+    current: ElementFactory,
+    ancestor: dict[Id, element],
+    incoming: dict[Id, element],
+    modeling_language: ModelingLanguage,
+) -> Iterable[ElementChange | ValueChange | RefChange]:
+    """Compare two parsed models.
+
+    Changes are recorded in the current model as `PendingChange` objects
+    (`ElementChange`, `ValueChange`, `RefChange`).
+
+    Returns an iterable of the added change objects.
+    """
+    element_types: dict[tuple[str, str], type[Base]] = {}
+
+    def element_type(elem: element) -> type[Base]:
+        key = (elem.type, elem.ns)
+        if (cls := element_types.get(key)) is None:
+            cls = modeling_language.lookup_element(elem.type, elem.ns)
+            if not cls:
+                raise UnknownModelElementError(
+                    f"Type {elem.ns}:{elem.type} cannot be loaded: no such element"
+                )
+            element_types[key] = cls
+        return cls
+
+    def create(type, **kwargs):
+        e = current.create(type)
+        for name, value in kwargs.items():
+            setattr(e, name, None if value is None else str(value))
+        return e
+
+    ancestor_style_sheet = None
+    incoming_style_sheet = None
+
+    for key in ancestor.keys() - incoming.keys():
+        a = ancestor[key]
+        cls = element_type(a)
+        if issubclass(cls, StyleSheet):
+            ancestor_style_sheet = a
+        else:
+            yield create(
+                ElementChange,
+                op="remove",
+                element_name=cls.__name__,
+                modeling_language=cls.__modeling_language__,
+                element_id=key,
+            )
+
+    for key in incoming.keys() - ancestor.keys():
+        i = incoming[key]
+        cls = element_type(i)
+        if issubclass(cls, StyleSheet):
+            incoming_style_sheet = i
+        else:
+            yield create(
+                ElementChange,
+                op="add",
+                element_name=cls.__name__,
+                modeling_language=cls.__modeling_language__,
+                element_id=key,
+                diagram_id=i.references.get("diagram")
+                if issubclass(cls, Presentation)
+                else None,
+            )
+            yield from updated_record_properties(
+                None, ancestor, i, incoming, cls, create
+            )
+
+    for key in ancestor.keys() & incoming.keys():
+        a = ancestor[key]
+        i = incoming[key]
+        if (a.type, a.ns) != (i.type, i.ns) and element_type(a) is not element_type(i):
+            raise UnmatchableModel(element_type(a), element_type(i))
+        if a.values == i.values and a.references == i.references:
+            continue
+        cls = element_type(i)
+        yield from updated_record_properties(a, ancestor, i, incoming, cls, create)
+
+    if (
+        ancestor_style_sheet
+        and incoming_style_sheet
+        and ancestor_style_sheet.id != incoming_style_sheet.id
+    ):
+        yield from updated_record_properties(
+            ancestor_style_sheet,
+            ancestor,
+            incoming_style_sheet,
+            incoming,
+            element_type(incoming_style_sheet),
+            create,
+        )
+
+
+def updated_record_properties(
+    ancestor: element | None,
+    ancestor_elements: dict[Id, element],
+    incoming: element,
+    incoming_elements: dict[Id, element],
+    cls: type[Base],
+    create: Callable,
+) -> Iterable[ValueChange | RefChange]:
+    ancestor_vals = load_values(cls, ancestor) if ancestor else {}
+    incoming_vals = load_values(cls, incoming)
+    ancestor_refs = load_references(ancestor, ancestor_elements) if ancestor else {}
+    incoming_refs = load_references(incoming, incoming_elements)
+    id = ancestor.id if ancestor else incoming.id
+
+    for name in {*ancestor_vals, *incoming_vals, *ancestor_refs, *incoming_refs}:
+        value_refs = incoming_refs.get(name)
+        other_refs = ancestor_refs.get(name)
+        if isinstance(value_refs, str):
+            if value_refs != other_refs:
+                yield create(
+                    RefChange,
+                    op="update",
+                    element_id=id,
+                    property_name=name,
+                    property_ref=value_refs,
+                )
+        elif value_refs is not None:
+            other_ids = set(other_refs) if isinstance(other_refs, list) else set()
+            yield from (
+                create(
+                    RefChange,
+                    op="add",
+                    element_id=id,
+                    property_name=name,
+                    property_ref=v,
+                )
+                for v in value_refs
+                if v not in other_ids
+            )
+        elif isinstance(other_refs, str):
+            yield create(
+                RefChange,
+                op="update",
+                element_id=id,
+                property_name=name,
+                property_ref=None,
+            )
+        elif other_refs is None and (
+            (value := incoming_vals.get(name)) != ancestor_vals.get(name)
+        ):
+            value_change = create(
+                ValueChange,
+                op="update",
+                element_id=id,
+                property_name=name,
+            )
+            set_value_change_property_value(value_change, value)  # type: ignore[arg-type]
+            yield value_change
+
+        if isinstance(other_refs, list):
+            value_ids = set(value_refs) if isinstance(value_refs, list) else set()
+            yield from (
+                create(
+                    RefChange,
+                    op="remove",
+                    element_id=id,
+                    property_name=name,
+                    property_ref=o,
+                )
+                for o in other_refs
+                if o not in value_ids
+            )
+
+
+def load_values(cls: type[Base], elem: element) -> dict[str, object]:
+    """Values of an element, like they are after the element is loaded.
+
+    Attribute values equal to the default value are left out. Values
+    saved by an element itself, such as the matrix of a presentation item,
+    are evaluated as literal.
+    """
+    values: dict[str, object] = {}
+    for name, value in elem.values.items():
+        prop = getattr(cls, name, None)
+        if isinstance(prop, attribute):
+            loaded: object = load_attribute_value(prop, value)
+        elif isinstance(prop, enumeration):
+            loaded = value
+        elif isinstance(prop, modelproperty):
+            continue
+        else:
+            try:
+                loaded = literal_eval(value)
+            except (SyntaxError, ValueError):
+                loaded = value
+            values[name] = loaded
+            continue
+        if loaded is not None and loaded != prop.default:
+            values[name] = loaded
+    return values
+
+
+def load_attribute_value(prop: attribute, value: str) -> str | int:
+    """Convert a value, like ``attribute.set()`` does."""
+    if prop.type is UnlimitedNatural:
+        return value if value == "*" else int(value)
+    if prop.type is int:
+        return (
+            0
+            if value == "False"
+            else 1
+            if value == "True"
+            else "*"
+            if value == "*"
+            else int(value)
+        )
+    return value
+
+
+def load_references(
+    elem: element, elements: dict[Id, element]
+) -> dict[str, References]:
+    """References of an element, leaving out unknown elements."""
+    references: dict[str, References] = {}
+    for name, refids in elem.references.items():
+        if isinstance(refids, list):
+            if known := list(
+                dict.fromkeys(refid for refid in refids if refid in elements)
+            ):
+                references[name] = known
+        elif refids in elements:
+            references[name] = refids
+    return references
@@ -203,16 +203,25 @@ class GaphorLoader(handler.ContentHandler):
         if state == MODEL:
             if "id" not in attrs:
                 raise ParserException(f"File corrupt: Element {name} has no id")
-            id = attrs["id"]
-            e = element(id, name, ns=ns)
-            if id in self.elements.keys():
-                log.exception(
-                    f"File corrupt: duplicate element. Remove element {name} with id {id} and try again"
-                )
-            self.elements[id] = e
+            e = element(attrs["id"], name, ns=ns)
+            self.add_element(e)
             self.push(e, name == "Diagram" and DIAGRAM or ELEMENT)
             return True
 
+    def add_element(self, e: element) -> None:
+        """Register an element as soon as its start tag is read."""
+        if e.id in self.elements.keys():
+            log.exception(
+                f"File corrupt: duplicate element. Remove element {e.type} with id {e.id} and try again"
+            )
+        self.elements[e.id] = e
+
+    def element_read(self, e: element) -> None:
+        """Called when all values and references of an element have been read.
+
+        This is a hook for loaders that process elements while parsing.
+        """
+
     def start_canvas(self, state, ns, name, attrs):
         # NB. Only used for pre-2.5 models.
         # Special treatment for the <canvas> tag in a Diagram:
@@ -321,6 +330,9 @@ class GaphorLoader(handler.ContentHandler):
             for new_item in new_canvasitems:
                 self.elements[new_item.id] = new_item
             return
+        elif self.state() in (ELEMENT, DIAGRAM):
+            self.element_read(self.pop())
+            return
         self.pop()
 
     def characters(self, content):
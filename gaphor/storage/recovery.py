@@ -1,9 +1,13 @@
 import ast
 import hashlib
+import itertools
 import logging
-from collections.abc import Iterator
-from io import IOBase
+import os
+import queue
+import threading
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
+from typing import BinaryIO
 
 from gaphor import settings
 from gaphor.abc import Service
@@ -32,15 +36,32 @@ from gaphor.diagram.presentation import HandlePositionEvent
 from gaphor.diagram.segment import LineMergeSegmentEvent, LineSplitSegmentEvent
 from gaphor.event import (
     ModelSaved,
+    ModelSaveFailed,
+    ModelSaving,
     Notification,
     SessionCreated,
     SessionShutdown,
 )
 from gaphor.i18n import gettext
+from gaphor.storage.journal import (
+    EVENTS,
+    HEADER,
+    MAGIC,
+    JournalWriter,
+    compact_events,
+    complete_length,
+    is_journal,
+    read_header,
+    read_journal,
+)
+from gaphor.storage.parser import ParserException
 from gaphor.transaction import Transaction, TransactionCommit, TransactionRollback
 
 log = logging.getLogger(__name__)
 
+# Compact the journal after this many transactions have been written
+COMPACT_AFTER = 1000
+
 
 def sessions_dir() -> Path:
     d = settings.get_cache_dir() / "sessions"
@@ -54,12 +75,11 @@ def all_sessions() -> Iterator[tuple[str, Path | None, Path | None]]:
     Returns a list of tuples: session id, filename path, template path.
     """
     for session_file in sessions_dir().glob("*.recovery"):
-        with session_file.open(encoding="utf-8") as f:
-            preamble_line = f.readline()
-        if preamble_line:
+        if session_file.stat().st_size:
             try:
-                preamble = ast.literal_eval(preamble_line)
-                path = Path(preamble.get("path"))
+                with session_file.open(mode="rb") as f:
+                    preamble = read_preamble(f)
+                path = Path(preamble.get("path", ""))
                 is_template = preamble.get("template", False)
                 if path.exists() and path.is_file():
                     yield (
@@ -70,25 +90,73 @@ def all_sessions() -> Iterator[tuple[str, Path | None, Path | None]]:
                 else:
                     log.info("Session file does not reference an existing model file.")
                     _move_aside(session_file)
-            except (SyntaxError, TypeError, AttributeError):
-                log.info("File has an invalid header: '%s'.", preamble_line)
+            except (
+                SyntaxError,
+                TypeError,
+                AttributeError,
+                ValueError,
+                ParserException,
+            ):
+                log.info("File %s has an invalid header.", session_file)
                 _move_aside(session_file)
 
 
+def read_preamble(f: BinaryIO) -> dict:
+    """Read the preamble of a journal, or of a journal in the old text
+    format."""
+    magic = f.read(len(MAGIC))
+    f.seek(0)
+    if is_journal(magic):
+        return read_header(f)
+    preamble = ast.literal_eval(f.readline().decode("utf-8"))
+    if not isinstance(preamble, dict):
+        raise ValueError("Journal preamble should be a dict")
+    return preamble
+
+
+def background_writer_enabled() -> bool:
+    """Write the recovery journal from a background thread.
+
+    Enabled with ``GAPHOR_FEATURE_FLAG=asyncrecovery``.
+    """
+    return "asyncrecovery" in os.getenv("GAPHOR_FEATURE_FLAG", "").split(",")
+
+
 class Recovery(Service):
-    def __init__(self, event_manager, element_factory, modeling_language):
+    """Record changes to a model, so they can be recovered after a crash.
+
+    With ``background_writer``, the journal is written and synced to disk
+    from a background thread, instead of on every transaction commit.
+    """
+
+    def __init__(
+        self,
+        event_manager,
+        element_factory,
+        modeling_language,
+        background_writer: bool | None = None,
+    ):
         self.event_manager = event_manager
         self.element_factory = element_factory
         self.modeling_language = modeling_language
+        self.background_writer = (
+            background_writer_enabled()
+            if background_writer is None
+            else background_writer
+        )
         self.session_id: str = "_"
         self.recorder = Recorder()
         self.event_log: EventLog | None = None
+        # Events committed while the model is being saved
+        self._unsaved: list | None = None
 
         event_manager.subscribe(self.on_transaction_commit)
         event_manager.subscribe(self.on_transaction_rollback)
         event_manager.subscribe(self.on_model_loaded)
         event_manager.subscribe(self.on_model_ready)
+        event_manager.subscribe(self.on_model_saving)
         event_manager.subscribe(self.on_model_saved)
+        event_manager.subscribe(self.on_model_save_failed)
         event_manager.subscribe(self.on_session_shutdown)
 
         self.recorder.subscribe(event_manager)
@@ -101,19 +169,20 @@ class Recovery(Service):
         self.event_manager.unsubscribe(self.on_transaction_rollback)
         self.event_manager.unsubscribe(self.on_model_loaded)
         self.event_manager.unsubscribe(self.on_model_ready)
+        self.event_manager.unsubscribe(self.on_model_saving)
         self.event_manager.unsubscribe(self.on_model_saved)
+        self.event_manager.unsubscribe(self.on_model_save_failed)
         self.event_manager.unsubscribe(self.on_session_shutdown)
 
         self.recorder.unsubscribe(self.event_manager)
 
     @event_handler(TransactionCommit)
     def on_transaction_commit(self, event: TransactionCommit):
-        if (
-            self.event_log
-            and self.recorder.events
-            and event.context not in ("rollback", "recover")
-        ):
-            self.event_log.write(self.recorder.events)
+        if self.recorder.events and event.context not in ("rollback", "recover"):
+            if self.event_log:
+                self.event_log.write(self.recorder.events)
+            if self._unsaved is not None:
+                self._unsaved.extend(self.recorder.events)
         self.recorder.truncate()
 
     @event_handler(TransactionRollback)
@@ -124,7 +193,12 @@ class Recovery(Service):
     def on_model_loaded(self, event: SessionCreated):
         self.session_id = event.session.session_id
         if event.filename or event.template:
-            self.event_log = EventLog(self.session_id, event.filename, event.template)
+            self.event_log = EventLog(
+                self.session_id,
+                event.filename,
+                event.template,
+                background=self.background_writer,
+            )
         self.recorder.truncate()
 
     @event_handler(ModelReady)
@@ -132,11 +206,10 @@ class Recovery(Service):
         if not self.event_log:
             return
 
-        events = []
+        replayer = EventReplayer(self.element_factory, self.modeling_language)
         try:
             with Transaction(self.event_manager, context="recover"):
-                for events in self.event_log.read():
-                    replay_events(events, self.element_factory, self.modeling_language)
+                replayer.replay(itertools.chain.from_iterable(self.event_log.read()))
         except Exception:
             log.error(
                 "Could not recover model changes from %s. Changes have been rolled back.",
@@ -146,7 +219,7 @@ class Recovery(Service):
             log.warning("Replaying events failed.")
             self.event_log.move_aside()
 
-        if events:
+        if replayer.count:
             self.event_manager.handle(
                 Notification(
                     gettext(
@@ -155,19 +228,36 @@ class Recovery(Service):
                 )
             )
 
+    @event_handler(ModelSaving)
+    def on_model_saving(self, _event: ModelSaving):
+        self._unsaved = []
+
     @event_handler(ModelSaved)
     def on_model_saved(self, event: ModelSaved):
+        unsaved = self._unsaved
+        self._unsaved = None
+
         if self.event_log:
             self.event_log.clear()
 
         if event.filename:
-            self.event_log = EventLog(self.session_id, event.filename)
+            self.event_log = EventLog(
+                self.session_id, event.filename, background=self.background_writer
+            )
             self.event_log.clear()
+            if unsaved:
+                # Changes made while saving are not in the saved file
+                self.event_log.write(unsaved)
         else:
             self.event_log = None
 
         self.recorder.truncate()
 
+    @event_handler(ModelSaveFailed)
+    def on_model_save_failed(self, _event: ModelSaveFailed):
+        # All changes are still in the journal
+        self._unsaved = None
+
     @event_handler(SessionShutdown)
     def on_session_shutdown(self, _event: SessionShutdown):
         if self.event_log:
@@ -176,15 +266,37 @@ class Recovery(Service):
 
 
 class EventLog:
+    """The journal of changes made to a model since it was last saved.
+
+    Events are written per transaction to a binary journal, see
+    :mod:`gaphor.storage.journal`. Every ``COMPACT_AFTER`` transactions,
+    the journal is rewritten as a checkpoint, leaving out changes that have
+    been overwritten since.
+
+    With ``background``, events are queued and written from a background
+    thread. Pending events are written in order, and synced to disk, before
+    the journal is read, cleared or closed.
+    """
+
     def __init__(
-        self, session_id: str, filename: Path | None, template: Path | None = None
+        self,
+        session_id: str,
+        filename: Path | None,
+        template: Path | None = None,
+        background: bool = False,
     ):
         self._filename = filename
         self._template = template
         self._log_name = (sessions_dir() / session_id).with_suffix(".recovery")
+        self._background = background
 
         # The file that we use to save the events to:
-        self._file: IOBase | None = None
+        self._file: BinaryIO | None = None
+        self._writer: JournalWriter | None = None
+        self._records = 0
+
+        self._queue: queue.SimpleQueue[list | None] | None = None
+        self._thread: threading.Thread | None = None
 
     @property
     def log_file(self):
@@ -194,59 +306,143 @@ class EventLog:
         self.close()
         self._log_name.unlink(missing_ok=True)
 
-    def write(self, event):
+    def write(self, events):
         if not (self._filename or self._template):
             return
 
-        f = self._file
-        if not f or f.closed:
-            f = self._file = self._log_name.open(mode="a", encoding="utf-8")
+        if self._background:
+            if not self._queue:
+                self._start_writer()
+            assert self._queue
+            # Copy: the recorder reuses its event list
+            self._queue.put(list(events))
+        else:
+            self._write(events)
+            if self._file:
+                self._file.flush()
+
+    def _write(self, events):
+        writer = self._writer
+        if not writer:
+            writer = self._open()
+
+        writer.events(events)
+
+        self._records += 1
+        if self._records >= COMPACT_AFTER:
+            self._compact()
+
+    def _start_writer(self):
+        events_queue = self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run_writer,
+            args=(events_queue,),
+            name=f"Recovery writer {self._log_name.stem}",
+            daemon=True,
+        )
+        self._thread.start()
 
-        if f.tell() == 0:
-            if self._template:
-                filename = self._template.absolute()
-                is_template = True
-            else:
-                assert self._filename
-                filename = self._filename.absolute()
-                is_template = False
-
-            f.write(
-                repr(
-                    {
-                        "path": str(filename.absolute()),
-                        "sha256": sha256sum(filename),
-                        "template": is_template,
-                    }
+    def _run_writer(self, events_queue: queue.SimpleQueue[list | None]):
+        """Write queued events, until ``None`` is received.
+
+        All events queued are written at once, followed by a single sync.
+        """
+        while True:
+            batches = [events_queue.get()]
+            while not events_queue.empty():
+                batches.append(events_queue.get())
+
+            try:
+                for events in batches:
+                    if events is not None:
+                        self._write(events)
+                self._sync()
+            except Exception:
+                log.error(
+                    "Could not write to recovery file %s.",
+                    self._log_name,
+                    exc_info=True,
                 )
-            )
-            f.write("\n")
 
-        f.write(repr(event))
-        f.write("\n")
-        f.flush()
+            if batches[-1] is None:
+                return
+
+    def _stop_writer(self):
+        if self._queue and self._thread:
+            self._queue.put(None)
+            self._thread.join()
+        self._queue = None
+        self._thread = None
+
+    def _sync(self):
+        if f := self._file:
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _open(self) -> JournalWriter:
+        if self._is_text_log():
+            # Convert a journal from an older version of Gaphor
+            try:
+                self._compact()
+            except (ChecksumFailed, SyntaxError, ValueError):
+                self._close_file()
+                _move_aside(self._log_name)
+
+        length = self._complete_length()
+        f = self._file = self._log_name.open(mode="ab")
+        if f.tell() > length:
+            # A record was not completely written, e.g. because of a crash
+            f.truncate(length)
+            f.seek(length)
+        writer = self._writer = JournalWriter(f)
+        if length == 0:
+            writer.header(self._preamble())
+        else:
+            writer.reset()
+        return writer
+
+    def _complete_length(self) -> int:
+        try:
+            with self._log_name.open(mode="rb") as f:
+                return complete_length(f)
+        except FileNotFoundError:
+            return 0
+
+    def _is_text_log(self) -> bool:
+        try:
+            with self._log_name.open(mode="rb") as f:
+                magic = f.read(len(MAGIC))
+        except FileNotFoundError:
+            return False
+        return bool(magic) and not is_journal(magic)
+
+    def _preamble(self) -> dict:
+        if self._template:
+            filename = self._template.absolute()
+            is_template = True
+        else:
+            assert self._filename
+            filename = self._filename.absolute()
+            is_template = False
+
+        return {
+            "path": str(filename.absolute()),
+            "sha256": sha256sum(filename),
+            "template": is_template,
+        }
 
-    def read(self):
+    def read(self) -> Iterator[list]:
         if not (self._filename or self._template):
             return
 
         self.close()
         try:
-            with self._log_name.open(mode="r", encoding="utf-8") as f:
-                preamble_line = f.readline()
-                preamble = ast.literal_eval(preamble_line)
-                if not isinstance(preamble, dict):
-                    raise ChecksumFailed()
-
-                filename = (
-                    self._template if preamble.get("template") else self._filename
-                )
-                if not filename or sha256sum(filename) != preamble.get("sha256"):
-                    raise ChecksumFailed()
+            preamble, records = _parse_log(self._log_name.read_bytes())
+            filename = self._template if preamble.get("template") else self._filename
+            if not filename or sha256sum(filename) != preamble.get("sha256"):
+                raise ChecksumFailed()
 
-                for line in f:
-                    events = ast.literal_eval(line.rstrip("\r\n"))
-                    yield events
+            yield from records
 
         except FileNotFoundError:
             # Log does not exist, no problem
@@ -256,16 +452,73 @@ class EventLog:
             log.info("Recovery file hash does not match.")
             self.move_aside()
 
+    def compact(self):
+        """Rewrite the journal as a single checkpoint.
+
+        Changes overwritten by later changes are left out.
+        """
+        self.close()
+        self._compact()
+
+    def _compact(self):
+        self._close_file()
+        try:
+            preamble, records = _parse_log(self._log_name.read_bytes())
+        except FileNotFoundError:
+            return
+
+        events = compact_events(itertools.chain.from_iterable(records))
+        checkpoint = self._log_name.with_suffix(".recovery.tmp")
+        with checkpoint.open(mode="wb") as f:
+            writer = JournalWriter(f)
+            writer.header(preamble)
+            writer.events(events)
+            if self._background:
+                f.flush()
+                os.fsync(f.fileno())
+        checkpoint.replace(self._log_name)
+
     def close(self):
+        """Close the journal, after all queued events have been written."""
+        self._stop_writer()
+        self._close_file()
+
+    def _close_file(self):
         if self._file:
             self._file.close()
             self._file = None
+        self._writer = None
+        self._records = 0
 
     def move_aside(self):
         self.close()
         _move_aside(self._log_name)
 
 
+def _parse_log(data: bytes) -> tuple[dict, Iterable[list]]:
+    """The preamble and the recorded events of a journal."""
+    if is_journal(data):
+        records = read_journal(data)
+        record_type, preamble = next(records, (None, None))
+        if record_type != HEADER or not isinstance(preamble, dict):
+            raise ChecksumFailed()
+        return preamble, (
+            events  # type: ignore[misc]
+            for record_type, events in records
+            if record_type == EVENTS
+        )
+
+    # The text format of older versions of Gaphor
+    lines = data.decode("utf-8").splitlines()
+    try:
+        preamble = ast.literal_eval(lines[0]) if lines else None
+    except (SyntaxError, ValueError):
+        preamble = None
+    if not isinstance(preamble, dict):
+        raise ChecksumFailed()
+    return preamble, (ast.literal_eval(line) for line in lines[1:])
+
+
 class ChecksumFailed(Exception):
     pass
 
@@ -454,71 +707,121 @@ class Recorder:
 
 def replay_events(events, element_factory, modeling_language):
     """Replay events previously recorded by EventLog."""
-    for event in events:
-        match event:
-            case ("c", ns, type, element_id, None):
-                element_factory.create_as(
-                    modeling_language.lookup_element(type, ns), element_id
-                )
-            case ("c", ns, type, element_id, diagram_id):
-                diagram = element_factory.lookup(diagram_id)
-                diagram.create_as(
-                    modeling_language.lookup_element(type, ns), element_id
-                )
-            case ("u", element_id, _diagram_id):
-                element_factory.lookup(element_id).unlink()
-            case ("a", element_id, prop, value):
-                element = element_factory.lookup(element_id)
-                setattr(element, prop, value)
-            case ("s", element_id, prop, other_element_id):
-                element = element_factory.lookup(element_id)
-                other_element = element_factory.lookup(other_element_id)
-                setattr(element, prop, other_element)
-            case ("d", element_id, prop, other_element_id):
-                element = element_factory.lookup(element_id)
-                other_element = element_factory.lookup(other_element_id)
-                del getattr(element, prop)[other_element]
-            case ("mu", element_id, matrix):
-                element = element_factory.lookup(element_id)
-                element.matrix.set(*matrix)
-            case ("hp", element_id, handle_index, pos):
-                element = element_factory.lookup(element_id)
-                element.handles()[handle_index].pos = pos
-            case ("ic", element_id, handle_index, connected_id, port_index):
-                element = element_factory.lookup(element_id)
-                connected = element_factory.lookup(connected_id)
-                ItemDisconnected(
-                    element,
-                    element.handles()[handle_index],
-                    connected,
-                    connected.ports()[port_index],
-                ).revert(element)
-            case ("id", element_id, handle_index, connected_id, port_index):
-                element = element_factory.lookup(element_id)
-                connected = element_factory.lookup(connected_id)
-                ItemConnected(
-                    element,
-                    element.handles()[handle_index],
-                    connected,
-                    connected.ports()[port_index],
-                ).revert(element)
-            case ("ir", element_id, handle_index, connected_id, port_index):
-                element = element_factory.lookup(element_id)
-                connected = element_factory.lookup(connected_id)
-                ItemTemporaryDisconnected(
-                    element,
-                    element.handles()[handle_index],
-                    connected,
-                    connected.ports()[port_index],
-                ).revert(element)
-            case ("ls", element_id, segment, count):
-                element = element_factory.lookup(element_id)
-                LineMergeSegmentEvent(element, segment, count).revert(element)
-            case ("lm", element_id, segment, count):
-                element = element_factory.lookup(element_id)
-                LineSplitSegmentEvent(element, segment, count).revert(element)
-            case ("ts", element_id, type):
-                element = element_factory.lookup(element_id)
-                swap_element_type(element, modeling_language.lookup_element(type))
-            case _:
-                assert NotImplementedError(f"Event {event} not implemented")
+    EventReplayer(element_factory, modeling_language).replay(events)
+
+
+class EventReplayer:
+    """Replay events previously recorded by EventLog.
+
+    Events are dispatched on their code. Element types are looked up once.
+    """
+
+    def __init__(self, element_factory, modeling_language):
+        self.element_factory = element_factory
+        self.modeling_language = modeling_language
+        self.count = 0
+        self._types: dict[tuple[str, str | None], type] = {}
+        self._replay: dict[str, Callable] = {
+            "c": self._create,
+            "u": self._unlink,
+            "a": self._attribute,
+            "s": self._association_set,
+            "d": self._association_delete,
+            "mu": self._matrix_updated,
+            "hp": self._handle_position,
+            "ic": self._item_connected,
+            "id": self._item_disconnected,
+            "ir": self._item_reconnected,
+            "ls": self._line_split_segment,
+            "lm": self._line_merge_segment,
+            "ts": self._type_swapped,
+        }
+
+    def replay(self, events: Iterable[tuple]) -> None:
+        replay = self._replay
+        for event in events:
+            if func := replay.get(event[0]):
+                func(*event[1:])
+            else:
+                log.warning("Event %s not implemented", event)
+            self.count += 1
+
+    def _lookup_type(self, name: str, ns: str | None = None) -> type:
+        key = (name, ns)
+        if (element_type := self._types.get(key)) is None:
+            element_type = self._types[key] = self.modeling_language.lookup_element(
+                name, ns
+            )
+        return element_type
+
+    def _create(self, ns, type, element_id, diagram_id):
+        if diagram_id is None:
+            self.element_factory.create_as(self._lookup_type(type, ns), element_id)
+        else:
+            diagram = self.element_factory.lookup(diagram_id)
+            diagram.create_as(self._lookup_type(type, ns), element_id)
+
+    def _unlink(self, element_id, _diagram_id):
+        self.element_factory.lookup(element_id).unlink()
+
+    def _attribute(self, element_id, prop, value):
+        element = self.element_factory.lookup(element_id)
+        setattr(element, prop, value)
+
+    def _association_set(self, element_id, prop, other_element_id):
+        lookup = self.element_factory.lookup
+        setattr(lookup(element_id), prop, lookup(other_element_id))
+
+    def _association_delete(self, element_id, prop, other_element_id):
+        lookup = self.element_factory.lookup
+        del getattr(lookup(element_id), prop)[lookup(other_element_id)]
+
+    def _matrix_updated(self, element_id, matrix):
+        element = self.element_factory.lookup(element_id)
+        element.matrix.set(*matrix)
+
+    def _handle_position(self, element_id, handle_index, pos):
+        element = self.element_factory.lookup(element_id)
+        element.handles()[handle_index].pos = pos
+
+    def _item_connected(self, element_id, handle_index, connected_id, port_index):
+        element = self.element_factory.lookup(element_id)
+        connected = self.element_factory.lookup(connected_id)
+        ItemDisconnected(
+            element,
+            element.handles()[handle_index],
+            connected,
+            connected.ports()[port_index],
+        ).revert(element)
+
+    def _item_disconnected(self, element_id, handle_index, connected_id, port_index):
+        element = self.element_factory.lookup(element_id)
+        connected = self.element_factory.lookup(connected_id)
+        ItemConnected(
+            element,
+            element.handles()[handle_index],
+            connected,
+            connected.ports()[port_index],
+        ).revert(element)
+
+    def _item_reconnected(self, element_id, handle_index, connected_id, port_index):
+        element = self.element_factory.lookup(element_id)
+        connected = self.element_factory.lookup(connected_id)
+        ItemTemporaryDisconnected(
+            element,
+            element.handles()[handle_index],
+            connected,
+            connected.ports()[port_index],
+        ).revert(element)
+
+    def _line_split_segment(self, element_id, segment, count):
+        element = self.element_factory.lookup(element_id)
+        LineMergeSegmentEvent(element, segment, count).revert(element)
+
+    def _line_merge_segment(self, element_id, segment, count):
+        element = self.element_factory.lookup(element_id)
+        LineSplitSegmentEvent(element, segment, count).revert(element)
+
+    def _type_swapped(self, element_id, type):
+        element = self.element_factory.lookup(element_id)
+        swap_element_type(element, self._lookup_type(type))
@@ -1,14 +1,38 @@
 """Save Gaphor models to Gaphors own XML format."""
 
-__all__ = ["save"]
+__all__ = [
+    "save",
+    "save_generator",
+    "save_in_thread",
+    "freeze_model",
+    "IncrementalSaver",
+]
 
+import asyncio
 import logging
-from collections.abc import Callable, Iterable
+import secrets
+import shutil
+from collections.abc import Awaitable, Callable, Generator, Iterable
+from contextlib import contextmanager
+from dataclasses import dataclass
 from functools import partial
+from pathlib import Path
 
 from gaphor import application
-from gaphor.core.modeling import Base, ElementFactory
+from gaphor.core.eventmanager import EventManager, event_handler
+from gaphor.core.modeling import Base, ElementFactory, Id
 from gaphor.core.modeling.collection import collection
+from gaphor.core.modeling.event import (
+    ElementCreated,
+    ElementDeleted,
+    ElementUpdated,
+    ModelChanged,
+    ModelFlushed,
+    ModelReady,
+    RevertibleEvent,
+)
+from gaphor.event import TransactionBegin, TransactionCommit, TransactionRollback
+from gaphor.storage.load import materialize_diagrams
 from gaphor.storage.xmlwriter import WriterProtocol, XMLWriter
 
 FILE_FORMAT_VERSION = "4"
@@ -34,9 +58,32 @@ def save_generator(
     """Save the current model using @writer, which is a
     gaphor.storage.xmlwriter.XMLWriter instance."""
 
+    materialize_diagrams(element_factory)
+
+    modeling_languages = {e.__modeling_language__ for e in element_factory}
+    with model_document(out, modeling_languages) as writer:
+        size = element_factory.size()
+        save_func = partial(
+            save_element, element_factory=element_factory, writer=writer
+        )
+        for n, e in enumerate(element_factory, start=1):
+            write_element(writer, e, save_func)
+
+            if n % 25 == 0:
+                yield (n * 100) / size
+
+
+@contextmanager
+def model_document(
+    out: WriterProtocol, modeling_languages: Iterable[str]
+) -> Generator[XMLWriter]:
+    """Write the document structure of a model file.
+
+    Elements should be written inside the context.
+    """
     with XMLWriter(out).document() as writer:
         writer.prefix_mapping("", MODEL_NS)
-        for ml in sorted({e.__modeling_language__ for e in element_factory}):
+        for ml in sorted(modeling_languages):
             writer.prefix_mapping(ml, f"{MODELING_LANGUAGE_NS}/{ml}")
 
         with writer.element_ns(
@@ -47,19 +94,17 @@ def save_generator(
             },
         ):
             with writer.element_ns((MODEL_NS, "model"), {}):
-                size = element_factory.size()
-                save_func = partial(
-                    save_element, element_factory=element_factory, writer=writer
-                )
-                for n, e in enumerate(element_factory, start=1):
-                    clazz = e.__class__.__name__
-                    assert e.id
-                    ns = f"{MODELING_LANGUAGE_NS}/{e.__modeling_language__}"
-                    with writer.element_ns((ns, clazz), {(MODEL_NS, "id"): str(e.id)}):
-                        e.save(save_func)
+                yield writer
+
 
-                    if n % 25 == 0:
-                        yield (n * 100) / size
+def write_element(
+    writer: XMLWriter, element: Base, save_func: Callable[[str, object], None]
+) -> None:
+    clazz = element.__class__.__name__
+    assert element.id
+    ns = f"{MODELING_LANGUAGE_NS}/{element.__modeling_language__}"
+    with writer.element_ns((ns, clazz), {(MODEL_NS, "id"): str(element.id)}):
+        element.save(save_func)
 
 
 def save_element(
@@ -74,6 +119,24 @@ def save_element(
     gaphor.core.modeling.collection (which contains a list of references
     to other UML elements) or a Diagram (which contains diagram items).
     """
+    if prop := freeze_property(name, value, element_factory):
+        write_property(writer, prop)
+
+
+VALUE, REFERENCE, REFERENCE_LIST = range(3)
+
+FrozenProperty = tuple[int, str, str | tuple[Id, ...]]
+
+
+def freeze_property(
+    name: str,
+    value: str | int | bool | Base | collection[Base],
+    element_factory: ElementFactory,
+) -> FrozenProperty | None:
+    """Convert a property value to what's written to the model file.
+
+    Unknown references are skipped.
+    """
 
     def resolvable(value):
         if value.id and value in element_factory:
@@ -83,36 +146,290 @@ def save_element(
         )
         return False
 
-    def save_reference(name: str, value: Base):
-        """Save a value as a reference to another element in the model.
+    if isinstance(value, Base):
+        return (REFERENCE, name, value.id) if resolvable(value) else None
+    elif isinstance(value, collection):
+        if value:
+            return (REFERENCE_LIST, name, tuple(v.id for v in value if resolvable(v)))
+        return None
+    elif value is not None:
+        return (VALUE, name, str(value))
+    return None
+
+
+def write_property(writer: XMLWriter, prop: FrozenProperty) -> None:
+    """Write a value, reference or list of references."""
+    kind, name, value = prop
+    with writer.element(name, {}):
+        if kind == VALUE:
+            with writer.element("val", {}):
+                assert isinstance(value, str)
+                writer.characters(value)
+        elif kind == REFERENCE:
+            assert isinstance(value, str)
+            with writer.element("ref", {"refid": value}):
+                pass
+        else:
+            with writer.element("reflist", {}):
+                for refid in value:
+                    with writer.element("ref", {"refid": refid}):
+                        pass
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenElement:
+    """The state of an element, as it's saved."""
+
+    modeling_language: str
+    type: str
+    id: Id
+    properties: tuple[FrozenProperty, ...]
+
+
+@dataclass(frozen=True)
+class FrozenModel:
+    """An immutable copy of a model, that can be saved from any thread.
+
+    Elements are either frozen, or already serialized to XML.
+    """
+
+    modeling_languages: frozenset[str]
+    elements: tuple[FrozenElement | str, ...]
+
+
+def freeze_element(element: Base, element_factory: ElementFactory) -> FrozenElement:
+    properties: list[FrozenProperty] = []
+
+    def save_func(name, value):
+        if prop := freeze_property(name, value, element_factory):
+            properties.append(prop)
+
+    element.save(save_func)
+    assert element.id
+    return FrozenElement(
+        element.__modeling_language__,
+        element.__class__.__name__,
+        element.id,
+        tuple(properties),
+    )
+
+
+def freeze_model(element_factory: ElementFactory) -> FrozenModel:
+    """Take an immutable copy of the model in ``element_factory``."""
+    materialize_diagrams(element_factory)
+    return FrozenModel(
+        frozenset(e.__modeling_language__ for e in element_factory),
+        tuple(freeze_element(e, element_factory) for e in element_factory),
+    )
+
+
+def save_frozen_generator(
+    out: WriterProtocol,
+    frozen_model: FrozenModel,
+    fragments: dict[Id, str] | None = None,
+) -> Iterable[float]:
+    """Save a frozen model. Yields progress, as a percentage.
+
+    The XML of frozen elements is added to ``fragments``, if provided.
+    """
+    recorder = _RecordingWriter(out)
+    with model_document(recorder, frozen_model.modeling_languages) as writer:
+        size = len(frozen_model.elements)
+        for n, e in enumerate(frozen_model.elements, start=1):
+            if isinstance(e, str):
+                writer.fragment(e)
+            else:
+                recorder.start()
+                ns = f"{MODELING_LANGUAGE_NS}/{e.modeling_language}"
+                with writer.element_ns((ns, e.type), {(MODEL_NS, "id"): e.id}):
+                    for prop in e.properties:
+                        write_property(writer, prop)
+                # Drop the separator of the previous element
+                fragment = recorder.stop().lstrip(">\n")
+                if fragments is not None:
+                    fragments[e.id] = fragment
+
+            if n % 25 == 0:
+                yield (n * 100) / size
+
+
+async def save_in_thread(
+    filename: Path,
+    frozen_model: FrozenModel,
+    progress: Callable[[float], Awaitable[None]] | None = None,
+) -> dict[Id, str]:
+    """Save a frozen model to a file from a worker thread.
+
+    The model is written to a temporary file, that replaces ``filename``
+    once it's complete. The XML of the saved elements is returned.
+    """
+    target = filename.resolve()
+    fragments: dict[Id, str] = {}
+    percentage = 0.0
+
+    def write() -> None:
+        nonlocal percentage
+        tmp = target.with_name(f".{target.name}.{secrets.token_hex(4)}.tmp")
+        try:
+            with tmp.open("x", encoding="utf-8") as out:
+                for p in save_frozen_generator(out, frozen_model, fragments):
+                    percentage = p
+            if target.exists():
+                shutil.copymode(target, tmp)
+            tmp.replace(target)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    task = asyncio.ensure_future(asyncio.to_thread(write))
+    while not task.done():
+        if progress:
+            await progress(percentage)
+        await asyncio.wait({task}, timeout=0.1)
+
+    await task
+    return fragments
+
+
+class IncrementalSaver:
+    """Save models, only serializing elements that changed since the last save.
+
+    The XML of every element is kept after it has been written. Model events
+    invalidate the XML of the element they apply to. The saved file is
+    identical to the one written by :func:`save_generator`.
+
+    Changes made while events are blocked, as happens while a model is
+    loaded, are not tracked. Elements created that way are serialized
+    anyway, other changes require a call to :meth:`clear`.
+    """
+
+    def __init__(self, event_manager: EventManager, element_factory: ElementFactory):
+        self.event_manager = event_manager
+        self.element_factory = element_factory
+        self._fragments: dict[Id, str] = {}
+        self._frozen: set[Id] = set()
+        # Set if the model changed in a transaction since it was frozen
+        self._changed = False
+        self._changed_in_transaction = False
+
+        event_manager.subscribe(self._on_element_changed)
+        event_manager.subscribe(self._on_model_changed)
+        event_manager.subscribe(self._on_transaction)
+
+    def shutdown(self) -> None:
+        self.event_manager.unsubscribe(self._on_element_changed)
+        self.event_manager.unsubscribe(self._on_model_changed)
+        self.event_manager.unsubscribe(self._on_transaction)
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget all serialized elements."""
+        self._fragments.clear()
+        self._frozen.clear()
+
+    def is_dirty(self, element: Base) -> bool:
+        return element.id not in self._fragments
 
-        This applies to both UML and canvas items.
+    def freeze(self) -> FrozenModel:
+        """Take an immutable copy of the model.
+
+        Elements that did not change since the last save are not frozen,
+        their XML is used instead.
         """
-        if resolvable(value):
-            with writer.element(name, {}):
-                with writer.element("ref", {"refid": value.id}):
-                    pass
+        element_factory = self.element_factory
+        materialize_diagrams(element_factory)
 
-    def save_collection(name: str, value: collection[Base]):
-        """Save a list of references."""
-        if value:
-            with writer.element(name, {}):
-                with writer.element("reflist", {}):
-                    for v in value:
-                        if resolvable(v):
-                            with writer.element("ref", {"refid": v.id}):
-                                pass
-
-    def save_value(name: str, value: str | int | bool):
-        """Save a value (attribute)."""
-        if value is not None:
-            with writer.element(name, {}):
-                with writer.element("val", {}):
-                    writer.characters(str(value))
+        fragments = self._fragments
+        elements: list[FrozenElement | str] = []
+        self._frozen.clear()
+        self._changed = self._changed_in_transaction = False
+        for e in element_factory:
+            assert e.id
+            if (fragment := fragments.get(e.id)) is not None:
+                elements.append(fragment)
+            else:
+                elements.append(freeze_element(e, element_factory))
+                self._frozen.add(e.id)
 
-    if isinstance(value, Base):
-        save_reference(name, value)
-    elif isinstance(value, collection):
-        save_collection(name, value)
-    else:
-        save_value(name, value)
+        return FrozenModel(
+            frozenset(e.__modeling_language__ for e in element_factory),
+            tuple(elements),
+        )
+
+    def _update_fragments(self, fragments: dict[Id, str]) -> None:
+        # Elements may have changed since they were frozen
+        frozen = self._frozen
+        self._fragments.update((id, f) for id, f in fragments.items() if id in frozen)
+        frozen.clear()
+
+    def save(self, out: WriterProtocol) -> None:
+        for _ in self.save_generator(out):
+            pass
+
+    def save_generator(self, out: WriterProtocol) -> Iterable[float]:
+        """Save the model. Yields progress, as a percentage."""
+        fragments: dict[Id, str] = {}
+        yield from save_frozen_generator(out, self.freeze(), fragments)
+        self._update_fragments(fragments)
+
+    async def save_in_thread(
+        self,
+        filename: Path,
+        progress: Callable[[float], Awaitable[None]] | None = None,
+    ) -> bool:
+        """Save the model to a file, without blocking the event loop.
+
+        The model is frozen first, XML is written from a worker thread.
+        Returns ``True`` if the model changed while it was written: those
+        changes are not in the saved file. Only changes made in transactions
+        count, updates of diagrams and styles do not.
+        """
+        fragments = await save_in_thread(filename, self.freeze(), progress)
+        self._update_fragments(fragments)
+        return self._changed
+
+    @event_handler(ElementUpdated, RevertibleEvent)
+    def _on_element_changed(self, event: ElementUpdated | RevertibleEvent) -> None:
+        self._changed_in_transaction = True
+        if id := event.element.id:
+            self._fragments.pop(id, None)
+            self._frozen.discard(id)
+
+    @event_handler(ElementCreated, ElementDeleted, ModelFlushed, ModelReady)
+    def _on_model_changed(self, event: ModelChanged) -> None:
+        if isinstance(event, ElementCreated | ElementDeleted):
+            self._changed_in_transaction = True
+            self._fragments.pop(event.element.id, None)
+            self._frozen.discard(event.element.id)
+        else:
+            self._changed = True
+            self.clear()
+
+    @event_handler(TransactionBegin, TransactionCommit, TransactionRollback)
+    def _on_transaction(
+        self, event: TransactionBegin | TransactionCommit | TransactionRollback
+    ) -> None:
+        if isinstance(event, TransactionCommit) and self._changed_in_transaction:
+            self._changed = True
+        self._changed_in_transaction = False
+
+
+class _RecordingWriter:
+    """Pass text on to a writer, optionally recording it as well."""
+
+    def __init__(self, out: WriterProtocol):
+        self._out = out
+        self._recorded: list[str] | None = None
+
+    def start(self) -> None:
+        self._recorded = []
+
+    def stop(self) -> str:
+        assert self._recorded is not None
+        text = "".join(self._recorded)
+        self._recorded = None
+        return text
+
+    def write(self, text: str) -> None:
+        self._out.write(text)
+        if self._recorded is not None:
+            self._recorded.append(text)
@@ -0,0 +1,275 @@
+"""Save and load models as compact binary snapshots.
+
+A snapshot holds the same information as a Gaphor XML model file, but it's
+a lot cheaper to write and read. A snapshot is a sequence of records. Each
+record starts with a record type (1 byte) and the size of its payload
+(4 bytes, little endian).
+
+Class names, property names and element id's are interned: a ``STRING``
+record adds a string to the string table, other records refer to strings
+by their index in the string table.
+
+Records:
+
+``HEADER``
+    Snapshot format version (uint16), followed by the Gaphor version.
+``STRING``
+    An UTF-8 encoded string.
+``ELEMENT``
+    Modeling language, class name and id of a new element (3 × uint32).
+``VALUE``
+    Property name (uint32), followed by the UTF-8 encoded value.
+``REFERENCE``
+    Property name and id of the referenced element (2 × uint32).
+``REFERENCE_LIST``
+    Property name, followed by the ids of the referenced elements (uint32's).
+
+Values and references belong to the last ``ELEMENT`` record.
+"""
+
+from __future__ import annotations
+
+__all__ = [
+    "load_snapshot",
+    "load_snapshot_generator",
+    "save_snapshot",
+    "save_snapshot_generator",
+]
+
+import logging
+import struct
+from collections.abc import Callable, Iterable
+from typing import BinaryIO
+
+from gaphor import application
+from gaphor.core.modeling import Base, ElementFactory
+from gaphor.core.modeling.collection import collection
+from gaphor.core.modeling.modelinglanguage import ModelingLanguage
+from gaphor.storage.load import (
+    StreamingLoader,
+    materialize_diagrams,
+    requires_whole_model_upgrade,
+)
+from gaphor.storage.parser import ParserException, element
+
+MAGIC = b"GAPHOR\x00S"
+FORMAT_VERSION = 1
+
+HEADER, STRING, ELEMENT, VALUE, REFERENCE, REFERENCE_LIST = range(6)
+
+_record = struct.Struct("<BI")
+_version = struct.Struct("<H")
+_index = struct.Struct("<I")
+_element = struct.Struct("<III")
+_reference = struct.Struct("<II")
+
+log = logging.getLogger(__name__)
+
+
+class SnapshotWriter:
+    """Write snapshot records to a binary stream."""
+
+    def __init__(self, out: BinaryIO):
+        self._out = out
+        self._strings: dict[str, int] = {}
+
+    def record(self, record_type: int, payload: bytes) -> None:
+        self._out.write(_record.pack(record_type, len(payload)))
+        self._out.write(payload)
+
+    def intern(self, s: str) -> int:
+        """Return the index of a string in the string table.
+
+        New strings are added to the string table.
+        """
+        try:
+            return self._strings[s]
+        except KeyError:
+            index = self._strings[s] = len(self._strings)
+            self.record(STRING, s.encode("utf-8"))
+            return index
+
+    def header(self, gaphor_version: str) -> None:
+        self._out.write(MAGIC)
+        self.record(HEADER, _version.pack(FORMAT_VERSION) + gaphor_version.encode())
+
+    def element(self, ns: str, type: str, id: str) -> None:
+        intern = self.intern
+        self.record(ELEMENT, _element.pack(intern(ns), intern(type), intern(id)))
+
+    def value(self, name: str, value: str) -> None:
+        self.record(VALUE, _index.pack(self.intern(name)) + value.encode("utf-8"))
+
+    def reference(self, name: str, refid: str) -> None:
+        intern = self.intern
+        self.record(REFERENCE, _reference.pack(intern(name), intern(refid)))
+
+    def reference_list(self, name: str, refids: list[str]) -> None:
+        intern = self.intern
+        indices = [intern(name)] + [intern(refid) for refid in refids]
+        self.record(REFERENCE_LIST, struct.pack(f"<{len(indices)}I", *indices))
+
+
+def save_snapshot(
+    out: BinaryIO,
+    element_factory: ElementFactory,
+    status_queue: Callable[[float], None] | None = None,
+) -> None:
+    for status in save_snapshot_generator(out, element_factory):
+        if status_queue:
+            status_queue(status)
+
+
+def save_snapshot_generator(
+    out: BinaryIO, element_factory: ElementFactory
+) -> Iterable[float]:
+    """Save the model in ``element_factory`` as a snapshot.
+
+    This function is a generator. It will yield values from 0 to 100 (%)
+    to indicate its progression.
+    """
+    materialize_diagrams(element_factory)
+    writer = SnapshotWriter(out)
+    writer.header(application.distribution().version)
+
+    def resolvable(value: Base) -> bool:
+        if value.id and value in element_factory:
+            return True
+        log.warning(
+            f"Model has unknown reference {value.id}. Reference will be skipped."
+        )
+        return False
+
+    def save_func(name: str, value: str | int | bool | Base | collection[Base]):
+        if isinstance(value, Base):
+            if resolvable(value):
+                writer.reference(name, value.id)
+        elif isinstance(value, collection):
+            if refids := [v.id for v in value if resolvable(v)]:
+                writer.reference_list(name, refids)
+        elif value is not None:
+            writer.value(name, str(value))
+
+    size = element_factory.size()
+    for n, e in enumerate(element_factory, start=1):
+        assert e.id
+        writer.element(e.__modeling_language__, e.__class__.__name__, e.id)
+        e.save(save_func)
+
+        if n % 25 == 0:
+            yield (n * 100) / size
+
+
+def read_records(data: bytes) -> Iterable[tuple[int, memoryview, int]]:
+    """Iterate the records in a snapshot.
+
+    Yields record type, payload and the offset of the next record.
+    """
+    if data[: len(MAGIC)] != MAGIC:
+        raise ParserException("Invalid snapshot: not a Gaphor snapshot")
+
+    view = memoryview(data)
+    offset = len(MAGIC)
+    header_size = _record.size
+    end = len(data)
+    while offset < end:
+        if offset + header_size > end:
+            raise ParserException("Invalid snapshot: truncated record")
+        record_type, length = _record.unpack_from(view, offset)
+        offset += header_size + length
+        if offset > end:
+            raise ParserException("Invalid snapshot: truncated record")
+        yield record_type, view[offset - length : offset], offset
+
+
+def load_snapshot(
+    file_obj: BinaryIO,
+    element_factory: ElementFactory,
+    modeling_language: ModelingLanguage,
+    status_queue: Callable[[int], None] | None = None,
+) -> None:
+    """Load a snapshot and create a model if possible.
+
+    Optionally, a status queue function can be given, to which the
+    progress is written (as status_queue(progress)).
+    """
+    for status in load_snapshot_generator(file_obj, element_factory, modeling_language):
+        if status_queue:
+            status_queue(status)
+
+
+def load_snapshot_generator(
+    file_obj: BinaryIO,
+    element_factory: ElementFactory,
+    modeling_language: ModelingLanguage,
+) -> Iterable[int]:
+    """Load a snapshot and create a model if possible.
+
+    This function is a generator. It will yield values from 0 to 100 (%)
+    to indicate its progression.
+    """
+    data = file_obj.read()
+    size = len(data) or 1
+
+    element_factory.flush()
+    loader = StreamingLoader(element_factory, modeling_language)
+    strings: list[str] = []
+    current: element | None = None
+    try:
+        with element_factory.block_events():
+            for n, (record_type, payload, offset) in enumerate(read_records(data)):
+                if record_type == STRING:
+                    strings.append(str(payload, "utf-8"))
+                elif record_type == ELEMENT:
+                    if not loader.streaming:
+                        raise ParserException("Invalid snapshot: no header found")
+                    if current:
+                        loader.element_read(current)
+                    ns, type, id = _element.unpack(payload)
+                    current = element(strings[id], strings[type], ns=strings[ns])
+                elif record_type == VALUE:
+                    assert current
+                    name = strings[_index.unpack_from(payload)[0]]
+                    current.values[name] = str(payload[_index.size :], "utf-8")
+                elif record_type == REFERENCE:
+                    assert current
+                    name, refid = _reference.unpack(payload)
+                    current.references[strings[name]] = strings[refid]
+                elif record_type == REFERENCE_LIST:
+                    assert current
+                    name, *refids = struct.unpack(f"<{len(payload) // 4}I", payload)
+                    current.references[strings[name]] = [strings[r] for r in refids]
+                elif record_type == HEADER:
+                    _start(loader, payload)
+                else:
+                    raise ParserException(
+                        f"Invalid snapshot: unknown record type {record_type}"
+                    )
+
+                if n % 500 == 0:
+                    yield int(offset * 50 / size)
+
+            if current:
+                loader.element_read(current)
+
+            for percentage in loader.finish():
+                yield int(percentage / 2 + 50)
+    except Exception:
+        element_factory.flush()
+        raise
+
+    yield 100
+
+
+def _start(loader: StreamingLoader, payload: memoryview) -> None:
+    (format_version,) = _version.unpack_from(payload)
+    if format_version != FORMAT_VERSION:
+        raise ParserException(
+            f"Invalid snapshot: unsupported snapshot version {format_version}"
+        )
+    loader.gaphor_version = str(payload[_version.size :], "utf-8")
+    if requires_whole_model_upgrade(loader.gaphor_version):
+        raise ParserException(
+            f"Invalid snapshot: Gaphor version {loader.gaphor_version} is too old"
+        )
+    loader.streaming = True
@@ -0,0 +1,160 @@
+from io import StringIO
+
+import pytest
+
+from gaphor.core import Transaction
+from gaphor.core.modeling import Diagram, StyleSheet
+from gaphor.storage import IncrementalSaver, load, save
+from gaphor.storage.save import freeze_model, save_frozen_generator, save_in_thread
+
+
+@pytest.fixture
+def incremental_saver(event_manager, element_factory):
+    saver = IncrementalSaver(event_manager, element_factory)
+    yield saver
+    saver.shutdown()
+
+
+def full_save(element_factory):
+    out = StringIO()
+    save(out, element_factory)
+    return out.getvalue()
+
+
+def incremental_save(saver):
+    out = StringIO()
+    saver.save(out)
+    return out.getvalue()
+
+
+@pytest.fixture
+def model(event_manager, element_factory):
+    with Transaction(event_manager):
+        element_factory.create(StyleSheet)
+        diagram = element_factory.create(Diagram)
+        diagram.name = "main"
+        element_factory.create(Diagram).name = "other"
+    return diagram
+
+
+def test_first_save_is_a_full_save(model, element_factory, incremental_saver):
+    assert incremental_save(incremental_saver) == full_save(element_factory)
+
+
+def test_only_changed_elements_are_serialized(
+    model, event_manager, element_factory, incremental_saver
+):
+    incremental_save(incremental_saver)
+
+    with Transaction(event_manager):
+        model.name = "changed"
+
+    assert incremental_saver.is_dirty(model)
+    assert [e for e in element_factory if incremental_saver.is_dirty(e)] == [model]
+    assert incremental_save(incremental_saver) == full_save(element_factory)
+    assert "changed" in full_save(element_factory)
+
+
+def test_save_with_new_and_deleted_elements(
+    model, event_manager, element_factory, incremental_saver
+):
+    incremental_save(incremental_saver)
+
+    with Transaction(event_manager):
+        model.unlink()
+        element_factory.create(Diagram).name = "new"
+
+    assert incremental_save(incremental_saver) == full_save(element_factory)
+
+
+def test_flush_clears_serialized_elements(model, element_factory, incremental_saver):
+    incremental_save(incremental_saver)
+
+    element_factory.flush()
+
+    assert incremental_save(incremental_saver) == full_save(element_factory)
+
+
+def test_save_loaded_model(
+    element_factory, modeling_language, event_manager, incremental_saver, test_models
+):
+    with (test_models / "all-elements.gaphor").open(encoding="utf-8") as f:
+        load(f, element_factory, modeling_language)
+    incremental_save(incremental_saver)
+
+    with Transaction(event_manager):
+        for diagram in element_factory.select(Diagram):
+            diagram.name = f"{diagram.name} (changed)"
+
+    assert incremental_save(incremental_saver) == full_save(element_factory)
+
+
+def test_frozen_model_is_saved_like_the_model(model, element_factory):
+    frozen = freeze_model(element_factory)
+    out = StringIO()
+    for _ in save_frozen_generator(out, frozen):
+        pass
+
+    assert out.getvalue() == full_save(element_factory)
+
+
+@pytest.mark.asyncio
+async def test_save_in_thread(model, element_factory, tmp_path):
+    filename = tmp_path / "model.gaphor"
+    filename.write_text("old content", encoding="utf-8")
+    expected = full_save(element_factory)
+    progress = []
+
+    async def report(percentage):
+        progress.append(percentage)
+
+    frozen = freeze_model(element_factory)
+    model.name = "changed after freeze"
+    await save_in_thread(filename, frozen, report)
+
+    assert filename.read_text(encoding="utf-8") == expected
+    assert list(tmp_path.iterdir()) == [filename]
+
+
+@pytest.mark.asyncio
+async def test_incremental_save_in_thread(
+    model, event_manager, element_factory, incremental_saver, tmp_path
+):
+    filename = tmp_path / "model.gaphor"
+
+    await incremental_saver.save_in_thread(filename)
+    with Transaction(event_manager):
+        model.name = "changed"
+    await incremental_saver.save_in_thread(filename)
+
+    assert filename.read_text(encoding="utf-8") == full_save(element_factory)
+    assert not incremental_saver.is_dirty(model)
+
+
+@pytest.mark.asyncio
+async def test_incremental_save_in_thread_reports_changes_while_saving(
+    model, event_manager, element_factory, incremental_saver, tmp_path
+):
+    filename = tmp_path / "model.gaphor"
+
+    async def edit(_percentage):
+        with Transaction(event_manager):
+            model.name = "changed while saving"
+
+    assert not await incremental_saver.save_in_thread(filename)
+    assert await incremental_saver.save_in_thread(filename, edit)
+    assert incremental_saver.is_dirty(model)
+
+
+@pytest.mark.asyncio
+async def test_incremental_save_in_thread_ignores_changes_outside_transactions(
+    model, incremental_saver, tmp_path
+):
+    filename = tmp_path / "model.gaphor"
+
+    async def update(_percentage):
+        # Like diagram and style updates, that are not user edits
+        model.name = "updated while saving"
+
+    assert not await incremental_saver.save_in_thread(filename, update)
+    assert incremental_saver.is_dirty(model)
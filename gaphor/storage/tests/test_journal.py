@@ -0,0 +1,135 @@
+from io import BytesIO
+
+import pytest
+
+from gaphor.storage.journal import (
+    EVENTS,
+    HEADER,
+    JournalWriter,
+    compact_events,
+    complete_length,
+    read_header,
+    read_journal,
+)
+from gaphor.storage.parser import ParserException
+
+
+def journal(*batches, preamble=None):
+    out = BytesIO()
+    writer = JournalWriter(out)
+    writer.header(preamble or {"path": "model.gaphor"})
+    for batch in batches:
+        writer.events(batch)
+    return out.getvalue()
+
+
+def test_read_header():
+    data = journal(preamble={"path": "model.gaphor", "template": False})
+
+    assert read_header(BytesIO(data)) == {"path": "model.gaphor", "template": False}
+
+
+def test_round_trip():
+    events = [
+        ("c", "UML", "Class", "id1", None),
+        ("a", "id1", "name", "Ünicode"),
+        ("a", "id1", "isAbstract", 1),
+        ("mu", "id2", (1.0, 0.0, 0.0, 1.0, 20.5, -3.0)),
+        ("a", "id1", "isLeaf", True),
+        ("a", "id1", "isActive", False),
+    ]
+
+    records = list(read_journal(journal(events, [("u", "id1", None)])))
+
+    assert records == [
+        (HEADER, {"path": "model.gaphor"}),
+        (EVENTS, events),
+        (EVENTS, [("u", "id1", None)]),
+    ]
+
+
+def test_strings_are_interned():
+    data = journal([("a", "some-long-element-id", "name", "name")] * 10)
+
+    assert data.count(b"some-long-element-id") == 1
+    assert data.count(b"name") == 1
+
+
+def test_reset_string_table():
+    out = BytesIO()
+    writer = JournalWriter(out)
+    writer.header({})
+    writer.events([("u", "id1", None)])
+    writer = JournalWriter(out)
+    writer.reset()
+    writer.events([("u", "id2", None), ("u", "id1", None)])
+
+    records = list(read_journal(out.getvalue()))
+
+    assert records[-1] == (EVENTS, [("u", "id2", None), ("u", "id1", None)])
+
+
+def test_truncated_record_is_ignored():
+    data = journal([("u", "id1", None)], [("u", "id2", None)])
+
+    records = list(read_journal(data[:-3]))
+
+    assert records == [
+        (HEADER, {"path": "model.gaphor"}),
+        (EVENTS, [("u", "id1", None)]),
+    ]
+
+
+def test_complete_length_leaves_out_truncated_record():
+    data = journal([("u", "id1", None)])
+    truncated = journal([("u", "id1", None)], [("u", "id2", None)])[:-3]
+
+    assert complete_length(BytesIO(data)) == len(data)
+    assert complete_length(BytesIO(truncated)) == len(data)
+    assert complete_length(BytesIO(data[:10])) == 0
+
+
+def test_not_a_journal():
+    with pytest.raises(ParserException):
+        list(read_journal(b"{'path': 'model.gaphor'}\n"))
+
+
+def test_unsupported_value():
+    with pytest.raises(TypeError):
+        JournalWriter(BytesIO()).events([("a", "id1", "name", object())])
+
+
+def test_unsupported_value_does_not_intern_strings():
+    out = BytesIO()
+    writer = JournalWriter(out)
+    writer.header({})
+    with pytest.raises(TypeError):
+        writer.events([("a", "id1", "name", object())])
+    writer.events([("a", "id1", "name", "value")])
+
+    records = list(read_journal(out.getvalue()))
+
+    assert records[-1] == (EVENTS, [("a", "id1", "name", "value")])
+
+
+def test_compact_overwritten_values():
+    events = [
+        ("a", "id1", "name", "one"),
+        ("mu", "id2", (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)),
+        ("a", "id1", "name", "two"),
+        ("a", "id1", "body", "body"),
+        ("mu", "id2", (1.0, 0.0, 0.0, 1.0, 10.0, 0.0)),
+    ]
+
+    assert compact_events(events) == events[2:]
+
+
+def test_compact_keeps_values_set_before_other_changes():
+    events = [
+        ("a", "id1", "name", "one"),
+        ("u", "id1", None),
+        ("c", "UML", "Class", "id1", None),
+        ("a", "id1", "name", "two"),
+    ]
+
+    assert compact_events(events) == events
@@ -5,6 +5,7 @@ from xml.sax import SAXParseException
 import pytest
 
 import gaphor.storage as storage
+from gaphor.core.modeling import Presentation
 from gaphor.storage.parser import MergeConflictDetected, ParserException
 
 
@@ -121,3 +122,166 @@ def test_detect_merge_conflict(element_factory, modeling_language):
         storage.load(file, element_factory, modeling_language)
 
     assert not element_factory.lselect()
+
+
+def test_streaming_load_model(element_factory, modeling_language):
+    file = buffer(
+        """\
+        <?xml version="1.0" encoding="utf-8"?>
+        <gaphor xmlns="http://gaphor.sourceforge.net/model" version="3.0" gaphor-version="3.3.0">
+          <StyleSheet id="58d6989a-66f8-11ec-b4c8-0456e5e540ed" />
+          <Diagram id="58d6c536-66f8-11ec-b4c8-0456e5e540ed">
+            <name>
+              <val>main</val>
+            </name>
+          </Diagram>
+        </gaphor>
+        """
+    )
+
+    storage.load(file, element_factory, modeling_language, streaming=True)
+
+    diagram = element_factory.lookup("58d6c536-66f8-11ec-b4c8-0456e5e540ed")
+    assert diagram.name == "main"
+
+
+def test_streaming_load_presentation_before_diagram(element_factory, modeling_language):
+    file = buffer(
+        """\
+        <?xml version="1.0" encoding="utf-8"?>
+        <gaphor xmlns="http://gaphor.sourceforge.net/model" version="3.0" gaphor-version="3.3.0">
+          <StyleSheet id="58d6989a-66f8-11ec-b4c8-0456e5e540ed" />
+          <ClassItem id="c4e1d3b0-66f8-11ec-b4c8-0456e5e540ed">
+            <diagram>
+              <ref refid="58d6c536-66f8-11ec-b4c8-0456e5e540ed"/>
+            </diagram>
+          </ClassItem>
+          <Diagram id="58d6c536-66f8-11ec-b4c8-0456e5e540ed">
+            <ownedPresentation>
+              <reflist>
+                <ref refid="c4e1d3b0-66f8-11ec-b4c8-0456e5e540ed"/>
+              </reflist>
+            </ownedPresentation>
+          </Diagram>
+        </gaphor>
+        """
+    )
+
+    storage.load(file, element_factory, modeling_language, streaming=True)
+
+    diagram = element_factory.lookup("58d6c536-66f8-11ec-b4c8-0456e5e540ed")
+    item = element_factory.lookup("c4e1d3b0-66f8-11ec-b4c8-0456e5e540ed")
+    assert item.diagram is diagram
+    assert item in diagram.ownedPresentation
+
+
+LAZY_MODEL = """\
+<?xml version="1.0" encoding="utf-8"?>
+<gaphor xmlns="http://gaphor.sourceforge.net/model" version="3.0" gaphor-version="3.3.0">
+  <StyleSheet id="58d6989a-66f8-11ec-b4c8-0456e5e540ed" />
+  <Class id="7a3c7b8e-66f8-11ec-b4c8-0456e5e540ed">
+    <presentation>
+      <reflist>
+        <ref refid="c4e1d3b0-66f8-11ec-b4c8-0456e5e540ed"/>
+      </reflist>
+    </presentation>
+  </Class>
+  <Diagram id="58d6c536-66f8-11ec-b4c8-0456e5e540ed">
+    <ownedPresentation>
+      <reflist>
+        <ref refid="c4e1d3b0-66f8-11ec-b4c8-0456e5e540ed"/>
+      </reflist>
+    </ownedPresentation>
+  </Diagram>
+  <ClassItem id="c4e1d3b0-66f8-11ec-b4c8-0456e5e540ed">
+    <diagram>
+      <ref refid="58d6c536-66f8-11ec-b4c8-0456e5e540ed"/>
+    </diagram>
+    <subject>
+      <ref refid="7a3c7b8e-66f8-11ec-b4c8-0456e5e540ed"/>
+    </subject>
+  </ClassItem>
+</gaphor>
+"""
+
+
+def test_lazy_load_creates_items_when_diagram_is_used(
+    element_factory, modeling_language
+):
+    storage.load(
+        buffer(LAZY_MODEL), element_factory, modeling_language, lazy_diagrams=True
+    )
+
+    assert not element_factory.lselect(Presentation)
+
+    diagram = element_factory.lookup("58d6c536-66f8-11ec-b4c8-0456e5e540ed")
+    (item,) = diagram.select(Presentation)
+
+    assert item.id == "c4e1d3b0-66f8-11ec-b4c8-0456e5e540ed"
+    assert item.subject is element_factory.lookup(
+        "7a3c7b8e-66f8-11ec-b4c8-0456e5e540ed"
+    )
+    assert element_factory.lselect(Presentation) == [item]
+
+
+def test_lazy_load_creates_items_when_presentation_is_used(
+    element_factory, modeling_language
+):
+    storage.load(
+        buffer(LAZY_MODEL), element_factory, modeling_language, lazy_diagrams=True
+    )
+
+    cls = element_factory.lookup("7a3c7b8e-66f8-11ec-b4c8-0456e5e540ed")
+    (item,) = cls.presentation
+
+    assert item.diagram is element_factory.lookup(
+        "58d6c536-66f8-11ec-b4c8-0456e5e540ed"
+    )
+
+
+def test_lazy_load_creates_items_when_looked_up(element_factory, modeling_language):
+    storage.load(
+        buffer(LAZY_MODEL), element_factory, modeling_language, lazy_diagrams=True
+    )
+
+    item = element_factory["c4e1d3b0-66f8-11ec-b4c8-0456e5e540ed"]
+
+    assert item.diagram is element_factory.lookup(
+        "58d6c536-66f8-11ec-b4c8-0456e5e540ed"
+    )
+    assert item in element_factory
+    assert not element_factory.lookup("no-such-id")
+
+
+def test_lazy_load_flush_does_not_create_items(
+    element_factory, modeling_language, monkeypatch
+):
+    storage.load(
+        buffer(LAZY_MODEL), element_factory, modeling_language, lazy_diagrams=True
+    )
+    created = []
+    monkeypatch.setattr(
+        element_factory, "create_as", lambda *args: created.append(args)
+    )
+
+    element_factory.flush()
+
+    assert not created
+    assert element_factory.is_empty()
+
+
+def test_streaming_load_model_with_unknown_element(element_factory, modeling_language):
+    file = buffer(
+        """\
+        <?xml version="1.0" encoding="utf-8"?>
+        <gaphor xmlns="http://gaphor.sourceforge.net/model" version="3.0" gaphor-version="3.3.0">
+          <StyleSheet id="58d6989a-66f8-11ec-b4c8-0456e5e540ed" />
+          <FooBar id="58d6989a-66f8-11ec-b4c8-0456e5e540ed" />
+        </gaphor>
+        """
+    )
+
+    with pytest.raises(storage.UnknownModelElementError):
+        storage.load(file, element_factory, modeling_language, streaming=True)
+
+    assert not element_factory.lselect()
@@ -0,0 +1,215 @@
+from io import StringIO
+
+import pytest
+
+from gaphor import UML
+from gaphor.core.changeset.apply import applicable, apply_change
+from gaphor.core.changeset.compare import UnmatchableModel, compare
+from gaphor.core.modeling import ElementFactory, StyleSheet
+from gaphor.diagram.general.simpleitem import Box
+from gaphor.storage import load, save
+from gaphor.storage.merge import can_compare_records, compare_models
+from gaphor.storage.parser import GaphorLoader, parse_generator
+from gaphor.UML.classes import ClassItem
+
+
+@pytest.fixture
+def ancestor():
+    return ElementFactory()
+
+
+@pytest.fixture
+def incoming():
+    return ElementFactory()
+
+
+def saved(element_factory):
+    out = StringIO()
+    save(out, element_factory)
+    return out.getvalue()
+
+
+def parsed(xml):
+    loader = GaphorLoader()
+    for _ in parse_generator(StringIO(xml), loader):
+        pass
+    return loader
+
+
+def loaded(xml, modeling_language):
+    element_factory = ElementFactory()
+    load(StringIO(xml), element_factory, modeling_language)
+    return element_factory
+
+
+def summary(changes):
+    return sorted(
+        (
+            type(change).__name__,
+            change.op,
+            change.element_id,
+            getattr(change, "element_name", None),
+            getattr(change, "diagram_id", None),
+            getattr(change, "property_name", None),
+            getattr(change, "property_ref", None),
+            getattr(change, "property_value", None),
+            getattr(change, "property_type", None),
+        )
+        for change in changes
+    )
+
+
+def compare_both(ancestor, incoming, modeling_language):
+    """Compare parsed models, and the same models loaded."""
+    ancestor_xml = saved(ancestor)
+    incoming_xml = saved(incoming)
+
+    records = summary(
+        compare_models(
+            ElementFactory(),
+            parsed(ancestor_xml),
+            parsed(incoming_xml),
+            modeling_language,
+        )
+    )
+    elements = summary(
+        compare(
+            ElementFactory(),
+            loaded(ancestor_xml, modeling_language),
+            loaded(incoming_xml, modeling_language),
+        )
+    )
+    return records, elements
+
+
+def base_model(element_factory):
+    element_factory.create_as(StyleSheet, "style-sheet")
+    package = element_factory.create_as(UML.Package, "package")
+    package.name = "Package"
+    klass = element_factory.create_as(UML.Class, "class")
+    klass.name = "Class"
+    klass.package = package
+    attr = element_factory.create_as(UML.Property, "attr")
+    attr.name = "attr"
+    klass.ownedAttribute = attr
+    diagram = element_factory.create_as(UML.Diagram, "diagram")
+    diagram.element = package
+    return package, klass, attr, diagram
+
+
+def test_unchanged_model(ancestor, incoming, modeling_language):
+    base_model(ancestor)
+    base_model(incoming)
+
+    records, elements = compare_both(ancestor, incoming, modeling_language)
+
+    assert records == elements == []
+
+
+def test_changed_values(ancestor, incoming, modeling_language):
+    _, klass, attr, _ = base_model(ancestor)
+    klass.isAbstract = True
+    attr.aggregation = "shared"
+    _, klass, attr, _ = base_model(incoming)
+    klass.name = "Renamed"
+    attr.isStatic = True
+
+    records, elements = compare_both(ancestor, incoming, modeling_language)
+
+    assert records == elements
+    assert {r[5] for r in records} == {"name", "isAbstract", "aggregation", "isStatic"}
+
+
+def test_changed_references(ancestor, incoming, modeling_language):
+    base_model(ancestor)
+    package, klass, _, diagram = base_model(incoming)
+    diagram.element = None
+    other = incoming.create_as(UML.Package, "other")
+    klass.package = other
+    other.nestingPackage = package
+    klass.ownedAttribute = incoming.create_as(UML.Property, "attr2")
+
+    records, elements = compare_both(ancestor, incoming, modeling_language)
+
+    assert records == elements
+    assert ("ElementChange", "add", "other") in {r[:3] for r in records}
+
+
+def test_added_and_removed_elements(ancestor, incoming, modeling_language):
+    _, _, attr, _ = base_model(ancestor)
+    ancestor.create_as(UML.Comment, "comment").body = "Comment"
+    _, _, _, diagram = base_model(incoming)
+    incoming.lookup("attr").unlink()
+    box = diagram.create_as(Box, "box")
+    box.matrix.translate(10, 20)
+
+    records, elements = compare_both(ancestor, incoming, modeling_language)
+
+    assert records == elements
+    assert ("ElementChange", "remove", "comment") in {r[:3] for r in records}
+    assert ("ElementChange", "add", "box", "Box", "diagram") in {r[:5] for r in records}
+
+
+def test_changed_style_sheet(ancestor, incoming, modeling_language):
+    ancestor.create(StyleSheet).styleSheet = "* { color: red }"
+    incoming.create(StyleSheet).styleSheet = "* { color: blue }"
+
+    records, elements = compare_both(ancestor, incoming, modeling_language)
+
+    assert records == elements
+    assert records[0][5:8] == ("styleSheet", None, "* { color: blue }")
+
+
+def test_unmatchable_model(ancestor, incoming, modeling_language):
+    ancestor.create_as(UML.Class, "id")
+    incoming.create_as(UML.Package, "id")
+
+    with pytest.raises(UnmatchableModel):
+        list(
+            compare_models(
+                ElementFactory(),
+                parsed(saved(ancestor)),
+                parsed(saved(incoming)),
+                modeling_language,
+            )
+        )
+
+
+def test_compare_old_model(test_models, modeling_language):
+    xml = (test_models / "simple-items.gaphor").read_text(encoding="utf-8")
+    model = parsed(xml)
+
+    changes = list(
+        compare_models(ElementFactory(), model, parsed(xml), modeling_language)
+    )
+
+    assert not can_compare_records(model.gaphor_version)
+    assert not changes
+
+
+def test_can_compare_current_model(ancestor, modeling_language):
+    base_model(ancestor)
+
+    assert can_compare_records(parsed(saved(ancestor)).gaphor_version)
+
+
+def test_merge_changes_in_unopened_diagram(ancestor, incoming, modeling_language):
+    _, _, _, diagram = base_model(ancestor)
+    diagram.create_as(Box, "box")
+    diagram.create_as(ClassItem, "class-item")
+    _, klass, _, diagram = base_model(incoming)
+    diagram.create_as(ClassItem, "class-item").subject = klass
+    current = ElementFactory()
+    load(StringIO(saved(ancestor)), current, modeling_language, lazy_diagrams=True)
+
+    changes = list(
+        compare_models(
+            current, parsed(saved(ancestor)), parsed(saved(incoming)), modeling_language
+        )
+    )
+    for change in changes:
+        if applicable(change, current):
+            apply_change(change, current, modeling_language)
+
+    assert not current.lookup("box")
+    assert current.lookup("class-item").subject is current.lookup("class")
@@ -1,5 +1,7 @@
 import pytest
 
+from gaphor.storage import recovery
+from gaphor.storage.journal import is_journal
 from gaphor.storage.recovery import EventLog, sha256sum
 
 
@@ -72,3 +74,130 @@ def test_move_aside_event_log(event_log):
 
     assert not event_log.log_file.exists()
     assert event_log.log_file.with_suffix(".recovery.bak").exists()
+
+
+def test_compact_event_log(event_log):
+    event_log.write([("a", "id1", "name", "one")])
+    event_log.write([("a", "id1", "name", "two"), ("c", "UML", "Class", "id2", None)])
+
+    event_log.compact()
+
+    assert list(event_log.read()) == [
+        [("a", "id1", "name", "two"), ("c", "UML", "Class", "id2", None)]
+    ]
+
+
+def test_append_to_event_log_after_reading(event_log):
+    event_log.write([("a", "id1", "name", "one")])
+    list(event_log.read())
+    event_log.write([("a", "id1", "name", "two")])
+
+    lines = list(event_log.read())
+
+    assert lines == [[("a", "id1", "name", "one")], [("a", "id1", "name", "two")]]
+
+
+def test_append_to_event_log_after_truncated_record(event_log, test_file):
+    event_log.write([("a", "id1", "name", "one")])
+    event_log.write([("a", "id1", "name", "two")])
+    event_log.close()
+    log_file = event_log.log_file
+    log_file.write_bytes(log_file.read_bytes()[:-3])
+
+    event_log = EventLog("_", test_file)
+    event_log.write([("a", "id1", "name", "three")])
+    lines = list(event_log.read())
+
+    assert lines == [[("a", "id1", "name", "one")], [("a", "id1", "name", "three")]]
+
+
+def test_compact_event_log_while_writing(event_log, monkeypatch):
+    monkeypatch.setattr(recovery, "COMPACT_AFTER", 3)
+
+    for n in range(4):
+        event_log.write([("a", "id1", "name", str(n))])
+
+    assert list(event_log.read()) == [
+        [("a", "id1", "name", "2")],
+        [("a", "id1", "name", "3")],
+    ]
+
+
+def test_read_text_event_log(event_log, test_file):
+    preamble = {
+        "path": str(test_file.absolute()),
+        "sha256": sha256sum(test_file),
+        "template": False,
+    }
+    event_log.log_file.write_text(
+        f"{preamble!r}\n{[('a', 'id1', 'name', 'one')]!r}\n", encoding="utf-8"
+    )
+
+    lines = list(event_log.read())
+
+    assert lines == [[("a", "id1", "name", "one")]]
+
+
+def test_convert_text_event_log(event_log, test_file):
+    preamble = {
+        "path": str(test_file.absolute()),
+        "sha256": sha256sum(test_file),
+        "template": False,
+    }
+    event_log.log_file.write_text(
+        f"{preamble!r}\n{[('a', 'id1', 'name', 'one')]!r}\n", encoding="utf-8"
+    )
+
+    event_log.write([("a", "id1", "name", "two")])
+
+    assert is_journal(event_log.log_file.read_bytes())
+    assert list(event_log.read()) == [
+        [("a", "id1", "name", "one")],
+        [("a", "id1", "name", "two")],
+    ]
+
+
+@pytest.fixture
+def background_event_log(test_file):
+    event_log = EventLog("_", test_file, background=True)
+    yield event_log
+    event_log.close()
+
+
+def test_background_event_log_keeps_order(background_event_log):
+    for n in range(100):
+        background_event_log.write([("a", "id1", "name", str(n))])
+
+    lines = list(background_event_log.read())
+
+    assert lines == [[("a", "id1", "name", str(n))] for n in range(100)]
+
+
+def test_background_event_log_copies_events(background_event_log):
+    events = [("a", "id1", "name", "one")]
+    background_event_log.write(events)
+    events.clear()
+
+    lines = list(background_event_log.read())
+
+    assert lines == [[("a", "id1", "name", "one")]]
+
+
+def test_background_event_log_syncs_on_close(background_event_log, monkeypatch):
+    synced = []
+    monkeypatch.setattr(recovery.os, "fsync", synced.append)
+
+    background_event_log.write([("a", "id1", "name", "one")])
+    background_event_log.close()
+
+    assert synced
+    assert background_event_log.log_file.exists()
+
+
+def test_clear_background_event_log(background_event_log):
+    background_event_log.write([("a", "id1", "name", "one")])
+
+    background_event_log.clear()
+
+    assert not background_event_log.log_file.exists()
+    assert not list(background_event_log.read())
@@ -0,0 +1,71 @@
+from io import BytesIO, StringIO
+
+import pytest
+
+import gaphor.storage as storage
+from gaphor import UML
+from gaphor.core.modeling import Diagram
+from gaphor.storage.parser import ParserException
+from gaphor.storage.snapshot import load_snapshot, save_snapshot
+from gaphor.UML.classes import ClassItem
+
+
+def xml(element_factory):
+    out = StringIO()
+    storage.save(out, element_factory)
+    return out.getvalue()
+
+
+def snapshot(element_factory):
+    out = BytesIO()
+    save_snapshot(out, element_factory)
+    out.seek(0)
+    return out
+
+
+def test_snapshot_round_trip(element_factory, modeling_language):
+    package = element_factory.create(UML.Package)
+    package.name = "Package"
+    klass = element_factory.create(UML.Class)
+    klass.name = "Ünicode"
+    klass.package = package
+    diagram = element_factory.create(Diagram)
+    diagram.element = package
+    diagram.create(ClassItem, subject=klass)
+    expected = xml(element_factory)
+
+    load_snapshot(snapshot(element_factory), element_factory, modeling_language)
+
+    assert xml(element_factory) == expected
+
+
+def test_snapshot_of_a_model(element_factory, modeling_language, test_models):
+    with open(test_models / "all-elements.gaphor", encoding="utf-8") as f:
+        storage.load(f, element_factory, modeling_language)
+    expected = xml(element_factory)
+
+    load_snapshot(snapshot(element_factory), element_factory, modeling_language)
+
+    assert xml(element_factory) == expected
+
+
+def test_snapshot_is_smaller_than_xml(element_factory, modeling_language, test_models):
+    with open(test_models / "all-elements.gaphor", encoding="utf-8") as f:
+        storage.load(f, element_factory, modeling_language)
+
+    assert len(snapshot(element_factory).getvalue()) < len(xml(element_factory))
+
+
+def test_load_invalid_snapshot(element_factory, modeling_language):
+    with pytest.raises(ParserException):
+        load_snapshot(BytesIO(b"<?xml"), element_factory, modeling_language)
+
+
+def test_load_truncated_snapshot(element_factory, modeling_language):
+    element_factory.create(UML.Class)
+    data = snapshot(element_factory).getvalue()
+
+    with pytest.raises(ParserException):
+        load_snapshot(BytesIO(data[:-3]), element_factory, modeling_language)
+
+    assert not element_factory.lselect()
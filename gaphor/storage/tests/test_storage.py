@@ -10,6 +10,7 @@ from gaphor import UML
 from gaphor.core.modeling import Diagram, StyleSheet
 from gaphor.diagram.tests.fixtures import connect
 from gaphor.storage.load import version_lower_than
+from gaphor.storage.parser import parse
 from gaphor.UML.classes import AssociationItem, ClassItem, InterfaceItem
 from gaphor.UML.general import CommentItem
 
@@ -248,6 +249,62 @@ def test_load_and_save_of_a_model(element_factory, modeling_language, test_model
     assert copy == orig, "Saved model does not match copy"
 
 
+@pytest.mark.parametrize("model", ["all-elements.gaphor", "test-model.gaphor"])
+def test_streaming_load_creates_the_same_model(
+    element_factory, modeling_language, test_models, model
+):
+    path = test_models / model
+
+    with open(path, encoding="utf-8") as ifile:
+        storage.load(ifile, element_factory, modeling_language)
+    expected = PseudoFile()
+    storage.save(expected, element_factory=element_factory)
+
+    with open(path, encoding="utf-8") as ifile:
+        storage.load(ifile, element_factory, modeling_language, streaming=True)
+    streamed = PseudoFile()
+    storage.save(streamed, element_factory=element_factory)
+
+    assert streamed.data == expected.data
+
+
+def model_contents(data):
+    """Model content, regardless of the order of references."""
+    return {
+        id: (
+            elem.type,
+            elem.values,
+            {
+                name: sorted(refids) if isinstance(refids, list) else refids
+                for name, refids in elem.references.items()
+            },
+        )
+        for id, elem in parse(StringIO(data)).items()
+    }
+
+
+@pytest.mark.parametrize("model", ["all-elements.gaphor", "test-model.gaphor"])
+def test_lazy_load_creates_the_same_model(
+    element_factory, modeling_language, test_models, model
+):
+    path = test_models / model
+
+    with open(path, encoding="utf-8") as ifile:
+        storage.load(ifile, element_factory, modeling_language)
+    expected = PseudoFile()
+    storage.save(expected, element_factory=element_factory)
+
+    with open(path, encoding="utf-8") as ifile:
+        storage.load(ifile, element_factory, modeling_language, lazy_diagrams=True)
+    lazy = PseudoFile()
+    storage.save(lazy, element_factory=element_factory)
+
+    assert model_contents(lazy.data) == model_contents(expected.data)
+    assert [line for line in lazy.data.splitlines() if "id=" in line] == [
+        line for line in expected.data.splitlines() if "id=" in line
+    ]
+
+
 def test_can_not_load_models_older_that_0_17_0(
     element_factory, modeling_language, test_models
 ):
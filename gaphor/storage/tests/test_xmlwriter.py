@@ -36,6 +36,19 @@ def test_elements_2():
     assert w.s == xml, w.s
 
 
+def test_fragment():
+    w = Writer()
+    xml_w = XMLWriter(w)
+    with xml_w.document():
+        with xml_w.element("foo", {}):
+            xml_w.fragment('<bar a="1">\n<baz/>\n</bar>')
+            with xml_w.element("qux", {}):
+                pass
+
+    xml = f"""<?xml version="1.0" encoding="{sys.getdefaultencoding()}"?>\n<foo>\n<bar a="1">\n<baz/>\n</bar>\n<qux/>\n</foo>"""
+    assert w.s == xml, w.s
+
+
 def test_elements_test():
     w = Writer()
     xml_w = XMLWriter(w)
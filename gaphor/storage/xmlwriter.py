@@ -147,6 +147,17 @@ class XMLWriter:
 
             self._current_context = current_context
 
+    def fragment(self, xml: str) -> None:
+        """Write an element that has been serialized before.
+
+        ``xml`` should contain exactly one element, as written by
+        :meth:`element` or :meth:`element_ns`.
+        """
+        assert xml.startswith("<")
+        self._write(xml[1:], start_tag=True)
+        self._in_start_tag = False
+        self._next_newline = True
+
     def characters(self, content: str) -> None:
         if self._in_cdata:
             self._write(content.replace("]]>", "] ]>"))
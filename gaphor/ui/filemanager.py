@@ -14,17 +14,19 @@ import gaphor.storage as storage
 from gaphor.abc import ActionProvider, Service
 from gaphor.babel import translate_model
 from gaphor.core import action, event_handler, gettext
-from gaphor.core.changeset.compare import compare
-from gaphor.core.modeling import ElementFactory, ModelReady
+from gaphor.core.modeling import ModelReady
 from gaphor.event import (
     ModelSaved,
+    ModelSaveFailed,
+    ModelSaving,
     Notification,
     SessionCreated,
     SessionShutdown,
     SessionShutdownRequested,
 )
+from gaphor.storage.merge import compare_models
 from gaphor.storage.mergeconflict import split_ours_and_theirs
-from gaphor.storage.parser import MergeConflictDetected
+from gaphor.storage.parser import GaphorLoader, MergeConflictDetected, parse_generator
 from gaphor.ui.errordialog import error_dialog
 from gaphor.ui.filedialog import GAPHOR_FILTER, save_file_dialog
 from gaphor.ui.statuswindow import StatusWindow
@@ -68,6 +70,7 @@ class FileManager(Service, ActionProvider):
         self.main_window = main_window
         self._filename: Path | None = None
         self._monitor: Gio.Monitor | None = None
+        self._saver = storage.IncrementalSaver(event_manager, element_factory)
 
         event_manager.subscribe(self._on_session_shutdown_request)
         event_manager.subscribe(self._on_session_created)
@@ -76,6 +79,7 @@ class FileManager(Service, ActionProvider):
         """Called when shutting down the file manager service."""
         self.event_manager.unsubscribe(self._on_session_shutdown_request)
         self.event_manager.unsubscribe(self._on_session_created)
+        self._saver.shutdown()
 
     @property
     def filename(self) -> Path | None:
@@ -150,31 +154,27 @@ class FileManager(Service, ActionProvider):
             log.debug("Loading current model from %s", current_filename)
             await self._load_async(current_filename, progress)
 
-            log.debug("Loading ancestor model from %s", ancestor_filename)
-            ancestor_element_factory = ElementFactory()
-            await self._load_async(
-                ancestor_filename,
-                partial(progress, completed=33),
-                element_factory=ancestor_element_factory,
+            log.debug("Reading ancestor model from %s", ancestor_filename)
+            ancestor = await self._parse_async(
+                ancestor_filename, partial(progress, completed=33)
             )
 
-            log.debug("Loading incoming model from %s", incoming_filename)
-            incoming_element_factory = ElementFactory()
-            await self._load_async(
-                incoming_filename,
-                partial(progress, completed=66),
-                element_factory=incoming_element_factory,
+            log.debug("Reading incoming model from %s", incoming_filename)
+            incoming = await self._parse_async(
+                incoming_filename, partial(progress, completed=66)
             )
 
-            log.debug("Comparing models")
-            with self.element_factory.block_events():
-                list(
-                    compare(
-                        self.element_factory,
-                        ancestor_element_factory,
-                        incoming_element_factory,
+            if ancestor and incoming:
+                log.debug("Comparing models")
+                with self.element_factory.block_events():
+                    list(
+                        compare_models(
+                            self.element_factory,
+                            ancestor,
+                            incoming,
+                            self.modeling_language,
+                        )
                     )
-                )
         finally:
             status_window.done()
 
@@ -191,6 +191,8 @@ class FileManager(Service, ActionProvider):
                     file_obj,
                     factory,
                     self.modeling_language,
+                    streaming=True,
+                    lazy_diagrams=True,
                 ):
                     if progress:
                         await progress(percentage)
@@ -210,6 +212,29 @@ class FileManager(Service, ActionProvider):
             )
             self.event_manager.handle(SessionShutdown(quitting=False))
 
+    async def _parse_async(
+        self,
+        filename: Path,
+        progress: Callable[[float], Awaitable[None]],
+    ) -> GaphorLoader | None:
+        loader = GaphorLoader()
+        try:
+            with filename.open(encoding="utf-8", errors="replace") as file_obj:
+                for percentage in parse_generator(file_obj, loader):
+                    await progress(percentage)
+        except Exception:
+            await error_dialog(
+                message=gettext("Unable to open model “{filename}”.").format(
+                    filename=filename
+                ),
+                secondary_message=gettext(
+                    "This file does not contain a valid Gaphor model."
+                ),
+                window=self.parent_window,
+            )
+            return None
+        return loader
+
     async def resolve_merge_conflict(self, filename: Path):
         temp_dir = tempfile.TemporaryDirectory()
         ancestor_filename = Path(temp_dir.name) / f"ancestor-{filename.name}"
@@ -261,6 +286,10 @@ class FileManager(Service, ActionProvider):
         no orphan references. It will also verify that the filename has
         the correct extension. A status window is displayed while the
         save operation is executed.
+
+        The model is frozen first. The file is written from a worker
+        thread, so the user interface stays responsive. Changes made in
+        the meantime are not saved: the model remains modified.
         """
 
         if not filename or (filename.exists() and not filename.is_file()):
@@ -277,12 +306,13 @@ class FileManager(Service, ActionProvider):
         )
 
         try:
-            with filename.open("w", encoding="utf-8") as out:
-                for percentage in storage.save_generator(out, self.element_factory):
-                    if status_window:
-                        await status_window.progress(percentage)
-            self.event_manager.handle(ModelSaved(filename))
+            self.event_manager.handle(ModelSaving(filename))
+            modified = await self._saver.save_in_thread(
+                filename, status_window.progress if status_window else None
+            )
+            self.event_manager.handle(ModelSaved(filename, modified=modified))
         except Exception as e:
+            self.event_manager.handle(ModelSaveFailed(filename))
             await error_dialog(
                 message=gettext("Unable to save model “{filename}”.").format(
                     filename=filename
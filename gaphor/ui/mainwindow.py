@@ -273,7 +273,7 @@ class MainWindow(Service, ActionProvider):
             else f"{gettext('New model')} - Gaphor"
         )
 
-        self.model_changed = False
+        self.model_changed = isinstance(event, ModelSaved) and event.modified
 
         window.present()
 
@@ -21,7 +21,7 @@ from gaphor.ui.event import (
     ElementOpened,
     ModelSelectionChanged,
 )
-from gaphor.ui.treesearch import search, sorted_tree_walker
+from gaphor.ui.treesearch import SearchIndex, search, sorted_tree_walker
 
 START_EDIT_DELAY = 100  # ms
 
@@ -35,6 +35,7 @@ class ModelBrowser(UIComponent, ActionProvider):
         self.element_factory = element_factory
         self.modeling_language = modeling_language
         self.model: TreeModel | None = None
+        self.search_index: SearchIndex | None = None
         self.search_bar = None
         self._selection_changed_id = 0
         self.sorter = None
@@ -105,7 +106,10 @@ class ModelBrowser(UIComponent, ActionProvider):
             )
         )
 
-        self.search_bar = create_search_bar(SearchEngine(self.model, self.tree_view))
+        self.search_index = SearchIndex(self.event_manager, self.element_factory)
+        self.search_bar = create_search_bar(
+            SearchEngine(self.model, self.tree_view, self.search_index)
+        )
 
         self.search_bar.set_key_capture_widget(self.tree_view)
 
@@ -121,7 +125,10 @@ class ModelBrowser(UIComponent, ActionProvider):
         self.event_manager.unsubscribe(self.on_modeling_language_changed)
         if self.model:
             self.model.shutdown()
+        if self.search_index:
+            self.search_index.shutdown()
         self.model = None
+        self.search_index = None
         self.search_bar = None
         self._selection_changed_id = 0
         self.sorter = None
@@ -230,8 +237,9 @@ class ModelBrowser(UIComponent, ActionProvider):
             if own:
                 change_owner(own, element)
 
-            self.select_element(element)
-            self.tree_view_rename_selected()
+        # The tree is updated once the transaction has ended
+        self.select_element(element)
+        self.tree_view_rename_selected()
 
     @action(name="selection.delete", shortcut="Delete")
     def tree_view_delete(self):
@@ -273,12 +281,25 @@ class ModelBrowser(UIComponent, ActionProvider):
 
 
 class SearchEngine:
-    def __init__(self, model, tree_view):
+    """Search the model browser.
+
+    With a search index, matches are found in the index and "next" moves
+    through the ranked matches. Otherwise the tree is searched, starting
+    from the selected item.
+    """
+
+    def __init__(self, model, tree_view, search_index: SearchIndex | None = None):
         self.model = model
         self.tree_view = tree_view
         self.selection = self.tree_view.get_model()
+        self.search_index = search_index
+        self._current: Base | None = None
 
     def text_changed(self, search_text):
+        if self.search_index:
+            self._select_match(self.search_index.search(search_text), 0)
+            return
+
         selected_item = get_first_selected_item(self.selection)
         if next_item := search(
             search_text,
@@ -291,6 +312,17 @@ class SearchEngine:
             select_element(self.model, self.tree_view, next_item.element)
 
     def search_next(self, search_text):
+        if self.search_index:
+            matches = self.search_index.search(search_text)
+            current = self._current
+            if current not in matches:
+                selected_item = get_first_selected_item(self.selection)
+                current = selected_item and selected_item.get_item().element
+            self._select_match(
+                matches, matches.index(current) + 1 if current in matches else 0
+            )
+            return
+
         selected_item = get_first_selected_item(self.selection)
         if next_item := search(
             search_text,
@@ -302,6 +334,11 @@ class SearchEngine:
         ):
             select_element(self.model, self.tree_view, next_item.element)
 
+    def _select_match(self, matches: list[Base], index: int) -> None:
+        if matches:
+            self._current = matches[index % len(matches)]
+            select_element(self.model, self.tree_view, self._current)
+
 
 def get_selected_elements(selection: Gtk.SelectionModel) -> list[Base]:
     bitset = selection.get_selection()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import pytest
-from gi.repository import Gio, GObject
+from gi.repository import Gio, GLib, GObject
 
 from gaphor import UML
 from gaphor.abc import ModelingLanguage
@@ -240,6 +240,22 @@ def test_create_diagram(model_browser, element_factory):
     assert diagram.diagramType == "cls"
 
 
+def test_create_element_then_rename(model_browser, element_factory, monkeypatch):
+    package = element_factory.create(UML.Package)
+    model_browser.select_element(package)
+    monkeypatch.setattr(GLib, "timeout_add", lambda _delay, func: func())
+
+    model_browser.tree_view_create_element("class")
+
+    klass = next(element_factory.select(UML.Class))
+    tree_item = get_first_selected_item(model_browser.selection).get_item()
+
+    assert klass.package is package
+    assert model_browser.get_selected_element() is klass
+    assert tree_item.element is klass
+    assert tree_item.editing
+
+
 def test_delete_element(model_browser, element_factory):
     klass = element_factory.create(UML.Class)
     model_browser.select_element(klass)
@@ -313,6 +329,25 @@ def test_search_text_changed(model_browser, element_factory):
     assert model_browser.get_selected_element() is class_b
 
 
+def test_search_next_with_search_index(model_browser, element_factory):
+    class_a = element_factory.create(UML.Class)
+    class_a.name = "ab"
+    class_b = element_factory.create(UML.Class)
+    class_b.name = "b"
+
+    search_engine = SearchEngine(
+        model_browser.model, model_browser.tree_view, model_browser.search_index
+    )
+    search_engine.text_changed("b")
+    assert model_browser.get_selected_element() is class_b
+
+    search_engine.search_next("b")
+    assert model_browser.get_selected_element() is class_a
+
+    search_engine.search_next("b")
+    assert model_browser.get_selected_element() is class_b
+
+
 def test_generalization_text(model_browser, element_factory):
     general = element_factory.create(UML.Class)
     general.name = "General"
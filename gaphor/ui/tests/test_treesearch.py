@@ -1,7 +1,7 @@
 import pytest
 
 from gaphor import UML
-from gaphor.ui.treesearch import search, sorted_tree_walker
+from gaphor.ui.treesearch import SearchIndex, search, sorted_tree_walker
 from gaphor.UML.treemodel import TreeModel
 
 
@@ -80,3 +80,50 @@ def test_search_from_current_with_start_tree_item(tree_model, create):
     )
 
     assert found.element is abb
+
+
+@pytest.fixture
+def search_index(event_manager, element_factory):
+    search_index = SearchIndex(event_manager, element_factory)
+    yield search_index
+    search_index.shutdown()
+
+
+def test_search_index_ranks_matches(search_index, create):
+    xabc = create("xabc")
+    my_abc = create("my abc")
+    abcd = create("abcd")
+    abc = create("abc")
+    create("bbb")
+
+    assert search_index.search("abc") == [abc, abcd, my_abc, xabc]
+
+
+def test_search_index_with_short_search_text(search_index, create):
+    aaa = create("aaa")
+    create("bbb")
+
+    assert search_index.search("a") == [aaa]
+    assert search_index.search("") == []
+
+
+def test_search_index_follows_changes(search_index, create):
+    aaa = create("aaa")
+    bbb = create("bbb")
+    assert search_index.search("bbb") == [bbb]
+
+    aaa.name = "bbbb"
+    bbb.unlink()
+    ccc = create("ccc")
+
+    assert search_index.search("bbb") == [aaa]
+    assert search_index.search("ccc") == [ccc]
+
+
+def test_search_index_by_qualified_name(search_index, create):
+    aaa = create("aaa")
+    nested = create("bbb", parent=aaa)
+    create("bbb")
+
+    assert search_index.search("aaa::bbb") == [nested]
+    assert search_index.search("a::b") == [nested]
@@ -1,10 +1,24 @@
 from __future__ import annotations
 
 import functools
+from collections import defaultdict
 from collections.abc import Iterable
 from typing import TYPE_CHECKING
 from unicodedata import normalize
 
+from gaphor import UML
+from gaphor.core import event_handler
+from gaphor.core.format import format
+from gaphor.core.modeling import (
+    Base,
+    ElementCreated,
+    ElementDeleted,
+    ElementUpdated,
+    ModelFlushed,
+    ModelReady,
+)
+from gaphor.diagram.group import owner
+
 if TYPE_CHECKING:
     from gaphor.ui.modelbrowser import TreeItem
 
@@ -69,3 +83,147 @@ def sorted_tree_items(model, branch):
         branch,
         key=functools.cmp_to_key(model.tree_item_sort),
     )
+
+
+def _normalize(text: str) -> str:
+    return normalize("NFC", text).casefold()
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """An index of the text of elements shown in the model browser.
+
+    Elements are looked up by the trigrams in their text. The index is
+    built on the first search and kept up to date by element events.
+    Changed elements are indexed again once the next search is performed.
+    """
+
+    def __init__(self, event_manager, element_factory):
+        self.event_manager = event_manager
+        self.element_factory = element_factory
+        self._texts: dict[Base, str] | None = None
+        self._trigrams: dict[str, set[Base]] = defaultdict(set)
+        self._dirty: set[Base] = set()
+
+        event_manager.subscribe(self._on_element_created)
+        event_manager.subscribe(self._on_element_deleted)
+        event_manager.subscribe(self._on_element_updated)
+        event_manager.subscribe(self._on_model_ready)
+
+    def shutdown(self) -> None:
+        self.event_manager.unsubscribe(self._on_element_created)
+        self.event_manager.unsubscribe(self._on_element_deleted)
+        self.event_manager.unsubscribe(self._on_element_updated)
+        self.event_manager.unsubscribe(self._on_model_ready)
+
+    def search(self, search_text: str) -> list[Base]:
+        """Find elements that contain ``search_text``, best matches first.
+
+        Exact matches rank highest, followed by matches at the start of the
+        text, at the start of a word, and anywhere in the text. If the text
+        contains ``::``, elements are matched by qualified name.
+        """
+        texts = self._update()
+        query = _normalize(search_text)
+        name_query = query.rsplit("::", 1)[-1]
+        if not name_query:
+            return []
+
+        if len(name_query) >= 3:
+            candidates = set.intersection(
+                *(self._trigrams.get(t, set()) for t in _trigrams(name_query))
+            )
+        else:
+            candidates = set(texts)
+
+        matches = [
+            e
+            for e in candidates
+            if name_query in texts[e]
+            and (name_query == query or query in qualified_name(e))
+        ]
+        return sorted(matches, key=lambda e: _rank(texts[e], name_query, e))
+
+    def _update(self) -> dict[Base, str]:
+        if self._texts is None:
+            self._texts = {}
+            self._trigrams.clear()
+            self._dirty = set(self.element_factory.select(owner))
+        texts = self._texts
+        for element in self._dirty:
+            self._remove(element)
+            if element in self.element_factory and owner(element):
+                text = texts[element] = _normalize(format(element) or "")
+                for trigram in _trigrams(text):
+                    self._trigrams[trigram].add(element)
+        self._dirty.clear()
+        return texts
+
+    def _remove(self, element: Base) -> None:
+        assert self._texts is not None
+        if (text := self._texts.pop(element, None)) is not None:
+            for trigram in _trigrams(text):
+                self._trigrams[trigram].discard(element)
+
+    @event_handler(ElementCreated)
+    def _on_element_created(self, event: ElementCreated):
+        if self._texts is not None:
+            self._dirty.add(event.element)
+
+    @event_handler(ElementDeleted)
+    def _on_element_deleted(self, event: ElementDeleted):
+        if self._texts is not None:
+            self._dirty.discard(event.element)
+            self._remove(event.element)
+
+    @event_handler(ElementUpdated)
+    def _on_element_updated(self, event: ElementUpdated):
+        if self._texts is None:
+            return
+        element = event.element
+        self._dirty.add(element)
+        # Typed elements show the name of their type
+        if isinstance(element, UML.Type) and event.property is UML.NamedElement.name:
+            self._dirty.update(
+                e
+                for e in self.element_factory.select(UML.TypedElement)
+                if e.type is element
+            )
+
+    @event_handler(ModelReady, ModelFlushed)
+    def _on_model_ready(self, _event):
+        self._texts = None
+
+
+def qualified_name(element: Base) -> str:
+    """The normalized names of an element and its owners, separated by ``::``."""
+    names = []
+    e: object = element
+    while isinstance(e, Base):
+        names.append(getattr(e, "name", None) or "")
+        e = owner(e)
+    return _normalize("::".join(reversed(names)))
+
+
+def _rank(text: str, search_text: str, element: Base) -> tuple[int, str, str]:
+    if text == search_text:
+        rank = 0
+    elif text.startswith(search_text):
+        rank = 1
+    elif any(
+        not text[i - 1].isalnum() for i in _occurrences(text, search_text) if i > 0
+    ):
+        rank = 2
+    else:
+        rank = 3
+    return rank, text, qualified_name(element)
+
+
+def _occurrences(text: str, search_text: str) -> Iterable[int]:
+    i = text.find(search_text)
+    while i >= 0:
+        yield i
+        i = text.find(search_text, i + 1)
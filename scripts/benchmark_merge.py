@@ -0,0 +1,109 @@
+# ruff: noqa: T201
+#
+# Compare merging models by loading them into element factories with
+# merging from parsed records.
+#
+# Both models are saved in the current file format first, as if they were
+# saved by this version of Gaphor.
+#
+# Usage: python -m scripts.benchmark_merge [ancestor.gaphor incoming.gaphor]
+
+import io
+import sys
+import time
+from pathlib import Path
+
+from gaphor import storage
+from gaphor.application import Session
+from gaphor.core.changeset.compare import compare
+from gaphor.core.modeling import ElementFactory
+from gaphor.storage.merge import compare_models
+from gaphor.storage.parser import GaphorLoader, parse_generator
+
+DEFAULT_MODELS = [
+    "test-models/RAAML-original.gaphor",
+    "test-models/RAAML-incoming.gaphor",
+]
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def upgraded(path: Path, modeling_language) -> str:
+    element_factory = ElementFactory()
+    with path.open(encoding="utf-8") as f:
+        storage.load(f, element_factory, modeling_language)
+    out = io.StringIO()
+    storage.save(out, element_factory)
+    return out.getvalue()
+
+
+def parsed(xml: str) -> GaphorLoader:
+    loader = GaphorLoader()
+    for _ in parse_generator(io.StringIO(xml), loader):
+        pass
+    return loader
+
+
+def loaded(xml: str, modeling_language) -> ElementFactory:
+    element_factory = ElementFactory()
+    storage.load(io.StringIO(xml), element_factory, modeling_language)
+    return element_factory
+
+
+def main(models=None):
+    ancestor_path, incoming_path = map(Path, models or DEFAULT_MODELS)
+    session = Session(
+        services=[
+            "event_manager",
+            "component_registry",
+            "element_factory",
+            "element_dispatcher",
+            "modeling_language",
+        ]
+    )
+    modeling_language = session.get_service("modeling_language")
+
+    ancestor_xml = upgraded(ancestor_path, modeling_language)
+    incoming_xml = upgraded(incoming_path, modeling_language)
+
+    def merge_elements():
+        return list(
+            compare(
+                ElementFactory(),
+                loaded(ancestor_xml, modeling_language),
+                loaded(incoming_xml, modeling_language),
+            )
+        )
+
+    def merge_records():
+        return list(
+            compare_models(
+                ElementFactory(),
+                parsed(ancestor_xml),
+                parsed(incoming_xml),
+                modeling_language,
+            )
+        )
+
+    elements_time, element_changes = timed(merge_elements)
+    records_time, record_changes = timed(merge_records)
+
+    assert len(element_changes) == len(record_changes), "Changes differ"
+
+    print(f"{ancestor_path} -> {incoming_path}")
+    print(f"  Changes:                 {len(record_changes):>10}")
+    print(f"  Merge loaded models:     {elements_time:>10.3f} s")
+    print(f"  Merge parsed records:    {records_time:>10.3f} s")
+
+    session.shutdown()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,158 @@
+# ruff: noqa: T201
+#
+# Compare write throughput and recovery time of the old text based recovery
+# log and the binary recovery journal.
+#
+# An editing session is simulated for every model element in the model:
+# the element is created, and then renamed a few times, one transaction per
+# change.
+#
+# Usage: python -m scripts.benchmark_recovery [model.gaphor ...]
+
+import ast
+import io
+import itertools
+import sys
+import time
+from pathlib import Path
+
+from gaphor import storage
+from gaphor.application import Session
+from gaphor.core.modeling import Presentation
+from gaphor.storage.journal import (
+    EVENTS,
+    JournalWriter,
+    compact_events,
+    read_journal,
+)
+from gaphor.storage.recovery import replay_events
+
+DEFAULT_MODELS = ["models/UML.gaphor", "models/RAAML_full.gaphor"]
+
+RENAMES = 5
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def create_session():
+    return Session(
+        services=[
+            "event_manager",
+            "component_registry",
+            "element_factory",
+            "element_dispatcher",
+            "modeling_language",
+        ]
+    )
+
+
+def editing_session(element_factory):
+    """Transactions as recorded while creating and renaming elements."""
+    transactions = []
+    for element in element_factory.select(lambda e: not isinstance(e, Presentation)):
+        element_type = type(element)
+        transactions.append(
+            [
+                (
+                    "c",
+                    element_type.__modeling_language__,
+                    element_type.__name__,
+                    element.id,
+                    None,
+                )
+            ]
+        )
+        if isinstance(getattr(element, "name", None), str):
+            transactions.extend(
+                [("a", element.id, "name", element.name[:n])]
+                for n in range(len(element.name) - RENAMES, len(element.name) + 1)
+                if n >= 0
+            )
+    return transactions
+
+
+def benchmark(path: Path):
+    session = create_session()
+    element_factory = session.get_service("element_factory")
+    modeling_language = session.get_service("modeling_language")
+    with path.open(encoding="utf-8") as f:
+        storage.load(f, element_factory, modeling_language)
+    transactions = editing_session(element_factory)
+    session.shutdown()
+
+    def write_text():
+        out = io.StringIO()
+        for events in transactions:
+            out.write(repr(events))
+            out.write("\n")
+            out.flush()
+        return out.getvalue()
+
+    def write_journal():
+        out = io.BytesIO()
+        writer = JournalWriter(out)
+        writer.header({})
+        for events in transactions:
+            writer.events(events)
+            out.flush()
+        return out.getvalue()
+
+    def read_text():
+        return [ast.literal_eval(line) for line in text_data.splitlines()]
+
+    def read_records():
+        return [events for record_type, events in read_journal(journal_data)]
+
+    def compact():
+        out = io.BytesIO()
+        writer = JournalWriter(out)
+        writer.header({})
+        writer.events(compact_events(itertools.chain.from_iterable(transactions)))
+        return out.getvalue()
+
+    def replay():
+        replay_session = create_session()
+        replay_events(
+            itertools.chain.from_iterable(
+                events
+                for record_type, events in read_journal(journal_data)
+                if record_type == EVENTS
+            ),
+            replay_session.get_service("element_factory"),
+            replay_session.get_service("modeling_language"),
+        )
+        replay_session.shutdown()
+
+    write_text_time, text_data = timed(write_text)
+    write_journal_time, journal_data = timed(write_journal)
+    read_text_time, _ = timed(read_text)
+    read_journal_time, _ = timed(read_records)
+    compact_time, checkpoint_data = timed(compact)
+    replay_time, _ = timed(replay)
+
+    print(f"{path} ({len(transactions)} transactions)")
+    print(f"  Text log size:           {len(text_data.encode('utf-8')):>10} bytes")
+    print(f"  Journal size:            {len(journal_data):>10} bytes")
+    print(f"  Checkpoint size:         {len(checkpoint_data):>10} bytes")
+    print(f"  Write text log:          {write_text_time:>10.3f} s")
+    print(f"  Write journal:           {write_journal_time:>10.3f} s")
+    print(f"  Read text log:           {read_text_time:>10.3f} s")
+    print(f"  Read journal:            {read_journal_time:>10.3f} s")
+    print(f"  Compact journal:         {compact_time:>10.3f} s")
+    print(f"  Replay journal:          {replay_time:>10.3f} s")
+
+
+def main(models=None):
+    for model in models or DEFAULT_MODELS:
+        benchmark(Path(model))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
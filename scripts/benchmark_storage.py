@@ -0,0 +1,91 @@
+# ruff: noqa: T201
+#
+# Compare open and save times of the XML model format and binary snapshots.
+#
+# Usage: python -m scripts.benchmark_storage [model.gaphor ...]
+
+import io
+import sys
+import time
+from pathlib import Path
+
+from gaphor import storage
+from gaphor.application import Session
+from gaphor.storage.snapshot import load_snapshot, save_snapshot
+
+DEFAULT_MODELS = ["models/UML.gaphor", "models/RAAML_full.gaphor"]
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark(path: Path, element_factory, modeling_language):
+    xml_text = path.read_text(encoding="utf-8")
+
+    def load_xml(streaming=False):
+        storage.load(
+            io.StringIO(xml_text),
+            element_factory,
+            modeling_language,
+            streaming=streaming,
+        )
+
+    def save_xml():
+        out = io.StringIO()
+        storage.save(out, element_factory)
+        return out.getvalue()
+
+    def save_binary():
+        out = io.BytesIO()
+        save_snapshot(out, element_factory)
+        return out.getvalue()
+
+    load_xml_time, _ = timed(load_xml)
+    load_streaming_time, _ = timed(lambda: load_xml(streaming=True))
+    save_xml_time, xml_data = timed(save_xml)
+    save_snapshot_time, snapshot_data = timed(save_binary)
+    load_snapshot_time, _ = timed(
+        lambda: load_snapshot(
+            io.BytesIO(snapshot_data), element_factory, modeling_language
+        )
+    )
+
+    assert save_xml() == xml_data, "Snapshot does not round-trip"
+
+    print(f"{path} ({element_factory.size()} elements)")
+    print(f"  XML size:                {len(xml_data.encode('utf-8')):>10} bytes")
+    print(f"  Snapshot size:           {len(snapshot_data):>10} bytes")
+    print(f"  Open XML:                {load_xml_time:>10.3f} s")
+    print(f"  Open XML (streaming):    {load_streaming_time:>10.3f} s")
+    print(f"  Open snapshot:           {load_snapshot_time:>10.3f} s")
+    print(f"  Save XML:                {save_xml_time:>10.3f} s")
+    print(f"  Save snapshot:           {save_snapshot_time:>10.3f} s")
+
+
+def main(models=None):
+    session = Session(
+        services=[
+            "event_manager",
+            "component_registry",
+            "element_factory",
+            "element_dispatcher",
+            "modeling_language",
+        ]
+    )
+    element_factory = session.get_service("element_factory")
+    modeling_language = session.get_service("modeling_language")
+
+    for model in models or DEFAULT_MODELS:
+        benchmark(Path(model), element_factory, modeling_language)
+
+    session.shutdown()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,120 @@
+# ruff: noqa: T201
+#
+# Compare matching style sheet rules one by one with the indexed rules
+# of a compiled style sheet, and time computing styles after a model
+# update. The system style sheet is used, with a large generated user
+# style sheet.
+#
+# Usage: python -m scripts.benchmark_styling [model.gaphor ...]
+
+import sys
+import time
+from pathlib import Path
+
+from gaphor import storage
+from gaphor.application import Session
+from gaphor.core.modeling import Diagram
+from gaphor.core.modeling.diagram import StyledDiagram, StyledItem
+from gaphor.core.modeling.stylesheet import SYSTEM_STYLE_SHEET
+from gaphor.core.styling import CompiledStyleSheet
+
+DEFAULT_MODELS = ["examples/stpa.gaphor"]
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def user_style_sheet(element_factory, rules_per_name=20):
+    """A style sheet with rules for every kind of item in the model."""
+    names = sorted(
+        {
+            StyledItem(item).name()
+            for diagram in element_factory.select(Diagram)
+            for item in diagram.ownedPresentation
+        }
+    )
+    rules = []
+    for name in names:
+        for n in range(rules_per_name):
+            rules.append(f'{name}[name^="{n}"] {{ color: #{n:06x} }}')
+            rules.append(f"diagram {name}.class-{n} {{ line-width: {n % 5 + 1} }}")
+            rules.append(f"{name}:hover > * {{ font-size: {n + 8} }}")
+        rules.append(f".{name}-class {{ text-color: red }}")
+        rules.append(f"[{name}-attribute] {{ background-color: blue }}")
+    return "\n".join(rules)
+
+
+def style_nodes(element_factory):
+    for diagram in element_factory.select(Diagram):
+        yield StyledDiagram(diagram)
+        for item in diagram.ownedPresentation:
+            yield StyledItem(item)
+
+
+def benchmark(path: Path, element_factory, modeling_language):
+    element_factory.flush()
+    with path.open(encoding="utf-8") as f:
+        storage.load(f, element_factory, modeling_language)
+
+    user_css = user_style_sheet(element_factory)
+    nodes = list(style_nodes(element_factory))
+
+    for title, css in [
+        ("System style sheet", [SYSTEM_STYLE_SHEET]),
+        ("With user style sheet", [SYSTEM_STYLE_SHEET, user_css]),
+    ]:
+        compiled = CompiledStyleSheet(*css)
+        rules = compiled.rules
+
+        def match_all(rules=rules):
+            return [[d for sel, d in rules if sel(node)] for node in nodes]
+
+        def match_indexed(compiled=compiled):
+            return [list(compiled.match(node)) for node in nodes]
+
+        def compute_styles(compiled=compiled):
+            # As done by every diagram update
+            compiled.clear_caches()
+            return [compiled.compute_style(node) for node in nodes]
+
+        linear_time, linear = timed(match_all)
+        indexed_time, indexed = timed(match_indexed)
+        assert linear == indexed
+        candidates = sum(len(compiled.candidate_rules(node)) for node in nodes)
+        compute_time, _ = timed(compute_styles)
+
+        print(f"{path}: {title} ({len(rules)} rules, {len(nodes)} nodes)")
+        print(f"  Match all rules:    {linear_time:>8.3f}s")
+        print(f"  Match indexed:      {indexed_time:>8.3f}s")
+        print(f"  Candidates/node:    {candidates / len(nodes):>8.1f}")
+        print(f"  Compute styles:     {compute_time:>8.3f}s")
+        print(f"  Shared styles:      {len(compiled._shared_styles):>8}")  # noqa: SLF001
+
+
+def main(models=None):
+    session = Session(
+        services=[
+            "event_manager",
+            "component_registry",
+            "element_factory",
+            "element_dispatcher",
+            "modeling_language",
+        ]
+    )
+    element_factory = session.get_service("element_factory")
+    modeling_language = session.get_service("modeling_language")
+
+    for model in models or DEFAULT_MODELS:
+        benchmark(Path(model), element_factory, modeling_language)
+
+    session.shutdown()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -2,7 +2,11 @@ import importlib
 
 import pytest
 
+from gaphor import UML
+from gaphor.core.modeling import Diagram
 from gaphor.main import main
+from gaphor.plugins.diagramexport.exportcache import DiagramFingerprints
+from gaphor.UML.classes import ClassItem
 
 
 def test_help_output(capsys):
@@ -16,6 +20,9 @@ def test_help_output(capsys):
     assert "--dir directory" in captured.out
     assert "--format format" in captured.out
     assert "--regex regex" in captured.out
+    assert "--jobs jobs" in captured.out
+    assert "--incremental" in captured.out
+    assert "--timings" in captured.out
 
 
 @pytest.fixture
@@ -48,3 +55,99 @@ def test_export_svg(tmp_path, model):
 
     assert model_path.exists()
     assert (model_path / "main.svg").exists()
+
+
+def test_export_with_jobs(tmp_path, model, capsys):
+    main(
+        [
+            "gaphor",
+            "export",
+            "-j",
+            "2",
+            "-t",
+            "-f",
+            "svg",
+            "-o",
+            str(tmp_path),
+            str(model),
+        ]
+    )
+
+    model_path = tmp_path / "New model"
+    captured = capsys.readouterr()
+
+    assert (model_path / "main.svg").exists()
+    assert "main.svg" in captured.out
+    assert "Exported" in captured.out
+
+
+def test_export_models_with_jobs(tmp_path, model, capsys):
+    other_model = importlib.resources.files("test-models") / "action-issue.gaphor"
+
+    main(
+        [
+            "gaphor",
+            "export",
+            "-j",
+            "2",
+            "-t",
+            "-f",
+            "svg",
+            "-o",
+            str(tmp_path),
+            str(model),
+            str(other_model),
+        ]
+    )
+    captured = capsys.readouterr()
+
+    assert (tmp_path / "New model" / "main.svg").exists()
+    assert "Exported 2 diagrams" in captured.out
+
+
+def test_export_incremental(tmp_path, model, capsys):
+    args = [
+        "gaphor",
+        "export",
+        "-i",
+        "-t",
+        "-f",
+        "svg",
+        "-o",
+        str(tmp_path),
+        str(model),
+    ]
+    main(args)
+    exported = capsys.readouterr().out
+    (tmp_path / "New model" / "main.svg").unlink()
+    main(args)
+    reexported = capsys.readouterr().out
+
+    assert (tmp_path / ".gaphor-export.json").exists()
+    assert "main.svg" in exported
+    assert "main.svg" in reexported
+    assert "Exported 1 diagrams" in reexported
+    assert "unchanged" in reexported
+
+
+def test_export_prints_nothing_by_default(tmp_path, model, capsys):
+    main(["gaphor", "export", "-f", "svg", "-o", str(tmp_path), str(model)])
+
+    assert not capsys.readouterr().out
+
+
+def test_fingerprint_follows_subject_changes(element_factory):
+    diagram = element_factory.create(Diagram)
+    other_diagram = element_factory.create(Diagram)
+    klass = element_factory.create(UML.Class)
+    diagram.create(ClassItem, subject=klass)
+    other_diagram.create(ClassItem, subject=element_factory.create(UML.Class))
+
+    fingerprint = DiagramFingerprints(element_factory, "svg")(diagram)
+    other_diagram.name = "changed"
+
+    assert DiagramFingerprints(element_factory, "svg")(diagram) == fingerprint
+
+    klass.name = "changed"
+
+    assert DiagramFingerprints(element_factory, "svg")(diagram) != fingerprint
@@ -4,8 +4,9 @@ from gaphor.application import Application
 from gaphor.core.modeling import Diagram
 from gaphor.diagram.general import Line
 from gaphor.diagram.segment import Segment
-from gaphor.event import SessionShutdown
+from gaphor.event import ModelSaved, ModelSaveFailed, ModelSaving, SessionShutdown
 from gaphor.storage.recovery import sessions_dir, sha256sum
+from gaphor.storage.save import freeze_model, save_in_thread
 from gaphor.transaction import Transaction
 from gaphor.ui import recover_sessions
 
@@ -36,6 +37,28 @@ async def test_recovery_when_reloading_file(application: Application, test_model
     assert new_element_factory.lookup(diagram.id)
 
 
+@pytest.mark.asyncio
+async def test_recovery_with_background_writer(
+    application: Application, test_models, monkeypatch
+):
+    monkeypatch.setenv("GAPHOR_FEATURE_FLAG", "asyncrecovery")
+    model_file = test_models / "simple-items.gaphor"
+    session = application.new_session(filename=model_file)
+    element_factory = session.get_service("element_factory")
+    with Transaction(session.get_service("event_manager")):
+        diagram = element_factory.create(Diagram)
+
+    application.shutdown_session(session)
+
+    new_session = application.recover_session(
+        session_id=session.session_id, filename=model_file
+    )
+    await new_session.get_service("event_manager").gather_tasks()
+    new_element_factory = new_session.get_service("element_factory")
+
+    assert new_element_factory.lookup(diagram.id)
+
+
 @pytest.mark.asyncio
 async def test_recovery_when_change_is_rolled_back(
     application: Application, test_models
@@ -359,3 +382,74 @@ async def test_recovery_with_line_segments(application: Application, test_models
     recover_sessions(application)
 
     assert application.sessions
+
+
+@pytest.mark.asyncio
+async def test_recovery_with_item_in_unopened_diagram(
+    application: Application, test_models
+):
+    model_file = test_models / "simple-items.gaphor"
+    session = application.new_session(filename=model_file)
+    event_manager = session.get_service("event_manager")
+    await event_manager.gather_tasks()
+    element_factory = session.get_service("element_factory")
+    box = element_factory.lookup("DCE:680E2142-3A1D-11DC-8B61-000D93868322")
+
+    with Transaction(event_manager):
+        box.matrix.translate(10, 20)
+
+    application.shutdown_session(session)
+
+    new_session = application.recover_session(
+        session_id=session.session_id, filename=model_file
+    )
+    await new_session.get_service("event_manager").gather_tasks()
+    new_element_factory = new_session.get_service("element_factory")
+    new_box = new_element_factory.lookup(box.id)
+
+    assert new_box.matrix.tuple() == box.matrix.tuple()
+
+
+@pytest.mark.asyncio
+async def test_recovery_of_changes_made_while_saving(
+    application: Application, test_models, tmp_path
+):
+    model_file = tmp_path / "model.gaphor"
+    model_file.write_bytes((test_models / "simple-items.gaphor").read_bytes())
+    session = application.new_session(filename=model_file)
+    event_manager = session.get_service("event_manager")
+    await event_manager.gather_tasks()
+    element_factory = session.get_service("element_factory")
+
+    event_manager.handle(ModelSaving(model_file))
+    frozen = freeze_model(element_factory)
+    with Transaction(event_manager):
+        diagram = element_factory.create(Diagram)
+    await save_in_thread(model_file, frozen)
+    event_manager.handle(ModelSaved(model_file, modified=True))
+
+    application.shutdown_session(session)
+
+    new_session = application.recover_session(
+        session_id=session.session_id, filename=model_file
+    )
+    await new_session.get_service("event_manager").gather_tasks()
+    new_element_factory = new_session.get_service("element_factory")
+
+    assert new_element_factory.lookup(diagram.id)
+
+
+@pytest.mark.asyncio
+async def test_recovery_after_failed_save(application: Application, tmp_path):
+    model_file = tmp_path / "model.gaphor"
+    session = application.new_session()
+    event_manager = session.get_service("event_manager")
+    element_factory = session.get_service("element_factory")
+    recovery = session.get_service("recovery")
+
+    event_manager.handle(ModelSaving(model_file))
+    event_manager.handle(ModelSaveFailed(model_file))
+    with Transaction(event_manager):
+        element_factory.create(Diagram)
+
+    assert recovery._unsaved is None  # noqa: SLF001